@@ -410,6 +410,7 @@ const PlotViewer = {
         <h6 style="margin-bottom: 0.5rem;">Select a plot to preview</h6>
         <small>Choose from the dropdown above to view any available plot</small>
       `;
+      this.renderThumbnails(placeholderEl);
       placeholderEl.style.display = 'block';
     }
     
@@ -417,7 +418,46 @@ const PlotViewer = {
     const frameEl = document.getElementById('plotViewerFrame');
     if (frameEl) frameEl.style.display = 'none';
   },
-  
+
+  /**
+   * Show a grid of SVG thumbnails (from tools/make_thumbnails.py) below the prompt.
+   * Thumbnails are plain images, so the gallery needs no Plotly until a plot is opened.
+   */
+  renderThumbnails(containerEl) {
+    const charts = this.manifest.charts.filter(chart => chart.thumbnail);
+    if (charts.length === 0) return;
+
+    const grid = document.createElement('div');
+    grid.style.cssText = 'display: grid; grid-template-columns: repeat(auto-fill, minmax(170px, 1fr)); gap: 0.75rem; margin-top: 1.5rem; text-align: left;';
+
+    charts.forEach(chart => {
+      const card = document.createElement('button');
+      card.type = 'button';
+      card.title = chart.title;
+      card.style.cssText = 'border: 1px solid #dee2e6; border-radius: 0.375rem; background: #fff; padding: 0.25rem; cursor: pointer;';
+
+      const img = document.createElement('img');
+      img.src = `assets/plots/${chart.thumbnail}`;
+      img.alt = chart.title;
+      img.loading = 'lazy';
+      img.style.cssText = 'width: 100%; aspect-ratio: 16 / 9; display: block;';
+
+      const label = document.createElement('small');
+      label.textContent = chart.title;
+      label.style.cssText = 'display: block; overflow: hidden; text-overflow: ellipsis; white-space: nowrap; color: #495057;';
+
+      card.append(img, label);
+      card.addEventListener('click', () => {
+        const selectEl = document.getElementById('plotViewerSelect');
+        if (selectEl) selectEl.value = chart.file;
+        this.selectPlot(chart.file);
+      });
+      grid.appendChild(card);
+    });
+
+    containerEl.appendChild(grid);
+  },
+
   /**
    * Handle URL parameter for deep linking (?plot=filename.html)
    */
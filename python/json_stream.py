@@ -0,0 +1,178 @@
+"""
+Streaming JSON output with atomic file replacement.
+
+json.dumps() builds the whole document as one string before anything is written.
+iter_json() yields the same text in chunks instead: dicts and lists down to
+`depth` levels are walked here, and everything below is encoded in one piece
+by the (C-accelerated) encoder, so the largest string held at once is the
+largest value at that depth, e.g. one trace of a figure. iter_json_items()
+does the same for a mapping given as (key, value) pairs, so a generator can
+produce the values one at a time. Both match json.dumps() byte for byte with
+the same indent, separators, ensure_ascii and encoder class.
+
+AtomicFile writes to a hidden temporary file next to the target
+(".<name>.tmp") and renames it over the target with os.replace() once it is
+complete, so readers see the old file or the new one, never a partial write.
+"""
+from __future__ import annotations
+
+import filecmp
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Iterable, Iterator, Optional, Tuple
+
+CHUNK_SIZE = 1 << 16
+DEFAULT_DEPTH = 3
+
+
+def _encoder(indent, separators, ensure_ascii: bool, cls) -> json.JSONEncoder:
+    return (cls or json.JSONEncoder)(indent=indent, separators=separators, ensure_ascii=ensure_ascii)
+
+
+def _key_text(key: Any) -> str:
+    # json.dumps() accepts str, int, float, bool and None keys and writes them as strings
+    if isinstance(key, str):
+        return key
+    if key is None or isinstance(key, (bool, int, float)):
+        return json.dumps(key)
+    raise TypeError(f"keys must be str, int, float, bool or None, not {type(key).__name__}")
+
+
+def _newline(encoder: json.JSONEncoder, level: int) -> str:
+    if encoder.indent is None:
+        return ""
+    unit = " " * encoder.indent if isinstance(encoder.indent, int) else encoder.indent
+    return "\n" + unit * level
+
+
+def _encode_value(value: Any, encoder: json.JSONEncoder, depth: int, level: int) -> Iterator[str]:
+    if depth > 0 and isinstance(value, dict) and value:
+        yield from _encode_items(value.items(), encoder, depth, level)
+    elif depth > 0 and isinstance(value, (list, tuple)) and value:
+        yield "["
+        for i, item in enumerate(value):
+            yield (encoder.item_separator if i else "") + _newline(encoder, level + 1)
+            yield from _encode_value(item, encoder, depth - 1, level + 1)
+        yield _newline(encoder, level) + "]"
+    else:
+        text = encoder.encode(value)
+        if level and encoder.indent is not None:
+            # JSON strings never contain a raw newline, so every newline is indentation
+            text = text.replace("\n", _newline(encoder, level))
+        yield text
+
+
+def _encode_items(items: Iterable[Tuple[Any, Any]], encoder: json.JSONEncoder,
+                  depth: int, level: int) -> Iterator[str]:
+    first = True
+    for key, value in items:
+        yield ("{" if first else encoder.item_separator) + _newline(encoder, level + 1)
+        yield encoder.encode(_key_text(key)) + encoder.key_separator
+        yield from _encode_value(value, encoder, depth - 1, level + 1)
+        first = False
+    yield "{}" if first else _newline(encoder, level) + "}"
+
+
+def _buffered(pieces: Iterable[str], chunk_size: int) -> Iterator[str]:
+    buf, size = [], 0
+    for piece in pieces:
+        buf.append(piece)
+        size += len(piece)
+        if size >= chunk_size:
+            yield "".join(buf)
+            buf, size = [], 0
+    if buf:
+        yield "".join(buf)
+
+
+def iter_json(obj: Any, indent=None, separators=None, ensure_ascii: bool = True, cls=None,
+              depth: int = DEFAULT_DEPTH, chunk_size: int = CHUNK_SIZE) -> Iterator[str]:
+    """Chunks of json.dumps(obj, indent=..., separators=..., ensure_ascii=..., cls=...)."""
+    encoder = _encoder(indent, separators, ensure_ascii, cls)
+    return _buffered(_encode_value(obj, encoder, depth, 0), chunk_size)
+
+
+def iter_json_items(items: Iterable[Tuple[Any, Any]], indent=None, separators=None, ensure_ascii: bool = True,
+                    cls=None, depth: int = DEFAULT_DEPTH, chunk_size: int = CHUNK_SIZE) -> Iterator[str]:
+    """
+    Chunks of json.dumps(dict(items), ...), consuming items lazily: each value is
+    encoded and released before the next pair is requested.
+    """
+    encoder = _encoder(indent, separators, ensure_ascii, cls)
+    return _buffered(_encode_items(items, encoder, depth, 0), chunk_size)
+
+
+class AtomicFile:
+    """
+    Text file written as UTF-8 to ".<name>.tmp" and moved over `path` by commit().
+
+    Leaving the `with` block commits, or discards the temporary file when an
+    exception is raised. With only_if_changed=True an existing target that
+    already holds the same bytes is left untouched (keeping its mtime), and
+    `changed` is False. `bytes` and hexdigest() (SHA-256) cover everything written.
+    """
+
+    def __init__(self, path: str | os.PathLike, only_if_changed: bool = False):
+        self.path = Path(path)
+        self.tmp_path = self.path.with_name(f".{self.path.name}.tmp")
+        self.only_if_changed = only_if_changed
+        self.bytes = 0
+        self.changed: Optional[bool] = None
+        self._hash = hashlib.sha256()
+        self._fp = open(self.tmp_path, "wb")
+
+    def write(self, text: str) -> None:
+        data = text.encode("utf-8")
+        self._fp.write(data)
+        self._hash.update(data)
+        self.bytes += len(data)
+
+    def write_chunks(self, chunks: Iterable[str]) -> None:
+        for chunk in chunks:
+            self.write(chunk)
+
+    def hexdigest(self) -> str:
+        return self._hash.hexdigest()
+
+    def _same_as(self, target: Path) -> bool:
+        try:
+            return target.stat().st_size == self.bytes and filecmp.cmp(self.tmp_path, target, shallow=False)
+        except FileNotFoundError:
+            return False
+
+    def commit(self, target: str | os.PathLike | None = None) -> bool:
+        """Move the written file to target (default: path). Returns whether target was replaced."""
+        if self._fp.closed:
+            raise ValueError(f"{self.tmp_path} was already committed or discarded")
+        self._fp.close()
+        target = Path(target) if target is not None else self.path
+        if self.only_if_changed and self._same_as(target):
+            self.tmp_path.unlink()
+            self.changed = False
+        else:
+            os.replace(self.tmp_path, target)
+            self.changed = True
+        return self.changed
+
+    def discard(self) -> None:
+        if not self._fp.closed:
+            self._fp.close()
+            self.tmp_path.unlink(missing_ok=True)
+
+    def __enter__(self) -> "AtomicFile":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is not None:
+            self.discard()
+        elif not self._fp.closed:
+            self.commit()
+
+
+def write_json(obj: Any, path: str | os.PathLike, only_if_changed: bool = False, **kwargs) -> AtomicFile:
+    """Stream json.dumps(obj, **kwargs) to path atomically; returns the committed AtomicFile."""
+    with AtomicFile(path, only_if_changed) as f:
+        f.write_chunks(iter_json(obj, **kwargs))
+    return f
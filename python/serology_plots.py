@@ -2,10 +2,15 @@ from __future__ import annotations
 
 import json
 import re
+import sys
 from dataclasses import dataclass
 from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import tracing
+from json_stream import AtomicFile, iter_json, iter_json_items
+from tracing import span
 
 
 @dataclass(frozen=True)
@@ -15,7 +20,8 @@ class PlotEntry:
     fallback_title: str
 
 
-# Catalog of the 10 plots (filenames must exactly match)
+# Original catalog of the 10 plots (filenames must exactly match). Every other plot is
+# discovered by PlotRegistry; these keys and titles are kept as aliases.
 PLOT_ENTRIES: List[PlotEntry] = [
     PlotEntry("third_seroperevalence", "Third Seroperevalence.html", "Third Seroperevalence"),
     PlotEntry("another_histogram_for_participation", "Another Histogram for Participation.html", "Another Histogram for Participation"),
@@ -30,6 +36,7 @@ PLOT_ENTRIES: List[PlotEntry] = [
 ]
 
 
+@lru_cache(maxsize=1)
 def _repo_root() -> Path:
     # Assume this file lives under a subdir (e.g., python/); repo root is a parent dir
     here = Path(__file__).resolve()
@@ -73,81 +80,237 @@ def _find_plot_file(filename: str) -> Path:
     raise FileNotFoundError(f"Could not find plot HTML file: {filename} (searched docs/plots and repo root)")
 
 
-def _extract_balanced(s: str, open_char: str, close_char: str, start_index: int) -> Tuple[str, int]:
-    """Extract a balanced bracketed/brace/paren substring starting at open_char index (inclusive).
-    Returns (substring, end_position_after_closing_char)."""
-    if s[start_index] != open_char:
+def _manifest_path() -> Path:
+    return _repo_root() / "docs" / "assets" / "plots" / "manifest.json"
+
+
+# "<name>.<10 hex digits>.html" copies published by generate_plot_manifest.py --hashed
+_HASHED_HTML_RE = re.compile(r"\.[0-9a-f]{10}\.html$")
+
+
+def plot_key(filename: str) -> str:
+    """Registry key of a plot file: lower-cased stem with non-alphanumeric runs as "_"."""
+    return re.sub(r"[^0-9a-z]+", "_", Path(filename).stem.lower()).strip("_") or "plot"
+
+
+def _mtime_ns(path: Path) -> Optional[int]:
+    try:
+        return path.stat().st_mtime_ns
+    except OSError:
+        return None
+
+
+class PlotRegistry:
+    """
+    Plot catalog indexed by key, loaded lazily from the generated manifest.json plus
+    every *.html in the plots directory. PLOT_ENTRIES come first and keep their keys
+    and titles; manifest ids ("mask-shop-usage") resolve as aliases. The registry
+    reloads itself when the manifest or the plots directory changes (mtime).
+    """
+
+    def __init__(self, manifest_path=None, plots_dir=None, aliases=PLOT_ENTRIES):
+        # None means the repo defaults, resolved on each access
+        self._manifest_path = manifest_path
+        self._plots_dir = plots_dir
+        self._aliases = tuple(aliases)
+        self._signature = None
+        self._entries: List[PlotEntry] = []
+        self._by_key: Dict[str, PlotEntry] = {}
+        self._by_filename: Dict[str, PlotEntry] = {}
+
+    def _paths(self) -> Tuple[Path, Path]:
+        manifest = Path(self._manifest_path) if self._manifest_path else _manifest_path()
+        plots = Path(self._plots_dir) if self._plots_dir else _plots_dir()
+        return manifest, plots
+
+    def _refresh(self) -> None:
+        manifest, plots = self._paths()
+        signature = (manifest, _mtime_ns(manifest), plots, _mtime_ns(plots))
+        if signature != self._signature:
+            self._load(manifest, plots)
+            self._signature = signature
+
+    def _load(self, manifest: Path, plots: Path) -> None:
+        discovered: List[Tuple[str, str, Optional[str]]] = []  # (filename, title, manifest id)
+        try:
+            charts = json.loads(manifest.read_text(encoding="utf-8")).get("charts", [])
+        except (OSError, json.JSONDecodeError):
+            charts = []
+        for chart in charts:
+            if chart.get("type", "html") != "html":
+                continue
+            filename = chart.get("source") or chart.get("file")
+            if filename:
+                discovered.append((filename, chart.get("title") or Path(filename).stem, chart.get("id")))
+        if plots.is_dir():
+            for path in sorted(plots.glob("*.html")):
+                if not _HASHED_HTML_RE.search(path.name):
+                    discovered.append((path.name, path.stem, None))
+
+        entries: List[PlotEntry] = []
+        by_key: Dict[str, PlotEntry] = {}
+        by_filename: Dict[str, PlotEntry] = {}
+        for e in self._aliases:
+            entries.append(e)
+            by_key[e.key] = e
+            by_filename.setdefault(e.filename, e)
+        aliases: List[Tuple[str, PlotEntry]] = []
+        for filename, title, chart_id in discovered:
+            entry = by_filename.get(filename)
+            if entry is None:
+                key = base = plot_key(filename)
+                n = 2
+                while key in by_key:
+                    key = f"{base}_{n}"
+                    n += 1
+                entry = PlotEntry(key, filename, title)
+                entries.append(entry)
+                by_key[key] = entry
+                by_filename[filename] = entry
+            if chart_id:
+                aliases.append((chart_id, entry))
+        for alias, entry in aliases:
+            by_key.setdefault(alias, entry)
+
+        self._entries, self._by_key, self._by_filename = entries, by_key, by_filename
+
+    def reload(self) -> None:
+        """Force a reload on the next access."""
+        self._signature = None
+
+    def entries(self) -> List[PlotEntry]:
+        self._refresh()
+        return list(self._entries)
+
+    def __iter__(self):
+        return iter(self.entries())
+
+    def __len__(self) -> int:
+        self._refresh()
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        self._refresh()
+        return key in self._by_key
+
+    def get(self, key: str) -> PlotEntry:
+        """Entry for a key or alias; raises KeyError if unknown."""
+        self._refresh()
+        try:
+            return self._by_key[key]
+        except KeyError:
+            raise KeyError(f"Unknown plot key: {key}") from None
+
+    def by_filename(self, filename: str) -> Optional[PlotEntry]:
+        self._refresh()
+        return self._by_filename.get(filename)
+
+    def path(self, key: str) -> Path:
+        """HTML file of a plot; raises KeyError/FileNotFoundError."""
+        entry = self.get(key)
+        primary = self._paths()[1] / entry.filename
+        if primary.exists():
+            return primary
+        return _find_plot_file(entry.filename)
+
+
+REGISTRY = PlotRegistry()
+
+
+# Each match skips a run of ordinary characters and ends in one token: a quoted
+# string (group 1/2, escapes included) or a bracket character (group 3). The skip
+# is a tight character-class loop inside the regex engine, so long numeric arrays
+# and base64 payloads cost no Python-level work.
+_TOKEN_PATTERN = (
+    r"""[^"'\[\]{}()]*"""
+    r"""(?:("[^"\\]*(?:\\.[^"\\]*)*")|('[^'\\]*(?:\\.[^'\\]*)*')|([\[\]{}()]))"""
+)
+_TOKEN_RE = re.compile(_TOKEN_PATTERN, re.DOTALL)
+_TOKEN_RE_BYTES = re.compile(_TOKEN_PATTERN.encode("ascii"), re.DOTALL)
+
+
+def _balanced_end(s, open_char, close_char, start_index: int) -> int:
+    """Position after the close_char matching the open_char at start_index (str or bytes)."""
+    if s[start_index:start_index + 1] != open_char:
         raise ValueError("start_index does not point to the expected opening character")
     depth = 0
-    i = start_index
-    in_string = False
-    string_quote = ""
-    escape = False
-    while i < len(s):
-        ch = s[i]
-
-        if in_string:
-            if escape:
-                escape = False
-            elif ch == "\\":
-                escape = True
-            elif ch == string_quote:
-                in_string = False
-            i += 1
-            continue
-
-        if ch in ("'", '"'):
-            in_string = True
-            string_quote = ch
-        elif ch == open_char:
+    for m in (_TOKEN_RE_BYTES if isinstance(s, bytes) else _TOKEN_RE).finditer(s, start_index):
+        tok = m.group(3)
+        if tok == open_char:
             depth += 1
-        elif ch == close_char:
+        elif tok == close_char:
             depth -= 1
             if depth == 0:
-                return s[start_index : i + 1], i + 1
-        i += 1
+                return m.end()
     raise ValueError("Unbalanced brackets while parsing")
 
 
-def _extract_plotly_call_args(script_text: str) -> Tuple[str, str, str, Optional[str]]:
+def _extract_balanced(s: str, open_char: str, close_char: str, start_index: int) -> Tuple[str, int]:
+    """Extract a balanced bracketed/brace/paren substring starting at open_char index (inclusive).
+    Returns (substring, end_position_after_closing_char)."""
+    end = _balanced_end(s, open_char, close_char, start_index)
+    return s[start_index:end], end
+
+
+Span = Tuple[int, int]
+
+
+def _plotly_call_spans(text) -> Tuple[Span, Span, Span, Optional[Span]]:
     """
-    Locate Plotly.newPlot( <div_or_id>, <data>, <layout>[, <config>] ) in the given script text
-    and return (div_arg, data_json, layout_json, config_json_or_None) as strings.
+    Locate Plotly.newPlot( <div_or_id>, <data>, <layout>[, <config>] ) in text (str or bytes)
+    and return the (start, end) spans of the div argument, data array, layout object and
+    config object (None if absent).
     """
-    m = re.search(r"Plotly\.newPlot\s*\(", script_text)
+    if isinstance(text, bytes):
+        lit = str.encode
+        m = re.search(rb"Plotly\.newPlot\s*\(", text)
+    else:
+        lit = str
+        m = re.search(r"Plotly\.newPlot\s*\(", text)
     if not m:
         raise ValueError("No Plotly.newPlot(...) call found")
 
     idx = m.end()  # position after '('
     # Extract first arg up to the first comma that's not inside a string/paren
-    first_comma = script_text.find(",", idx)
+    first_comma = text.find(lit(","), idx)
     if first_comma == -1:
         raise ValueError("Malformed Plotly.newPlot call (no comma after first argument)")
-    div_arg = script_text[idx:first_comma].strip()
 
     # Extract data array
-    data_start = script_text.find("[", first_comma + 1)
+    data_start = text.find(lit("["), first_comma + 1)
     if data_start == -1:
         raise ValueError("Could not locate data array '[' after first argument")
-    data_str, after_data = _extract_balanced(script_text, "[", "]", data_start)
+    after_data = _balanced_end(text, lit("["), lit("]"), data_start)
 
     # Extract layout object
-    layout_start = script_text.find("{", after_data)
+    layout_start = text.find(lit("{"), after_data)
     if layout_start == -1:
         raise ValueError("Could not locate layout object '{' after data")
-    layout_str, after_layout = _extract_balanced(script_text, "{", "}", layout_start)
+    after_layout = _balanced_end(text, lit("{"), lit("}"), layout_start)
 
     # Optional config object before the closing ')'
-    paren_open = script_text.find("(", m.end() - 1)
-    call_paren, call_end = _extract_balanced(script_text, "(", ")", paren_open)
+    call_end = _balanced_end(text, lit("("), lit(")"), m.end() - 1)
     # Search for a '{' between after_layout and call_end
-    config_json = None
-    brace_pos = script_text.find("{", after_layout)
+    config_span = None
+    brace_pos = text.find(lit("{"), after_layout)
     if brace_pos != -1 and brace_pos < call_end:
-        config_str, _ = _extract_balanced(script_text, "{", "}", brace_pos)
-        config_json = config_str
+        config_span = (brace_pos, _balanced_end(text, lit("{"), lit("}"), brace_pos))
+
+    return (idx, first_comma), (data_start, after_data), (layout_start, after_layout), config_span
 
-    return div_arg, data_str, layout_str, config_json
+
+def _extract_plotly_call_args(script_text: str) -> Tuple[str, str, str, Optional[str]]:
+    """
+    Locate Plotly.newPlot( <div_or_id>, <data>, <layout>[, <config>] ) in the given script text
+    and return (div_arg, data_json, layout_json, config_json_or_None) as strings.
+    """
+    div, data, layout, config = _plotly_call_spans(script_text)
+    return (
+        script_text[div[0]:div[1]].strip(),
+        script_text[data[0]:data[1]],
+        script_text[layout[0]:layout[1]],
+        script_text[config[0]:config[1]] if config else None,
+    )
 
 
 def _parse_json_like(text: str) -> Any:
@@ -158,18 +321,111 @@ def _parse_json_like(text: str) -> Any:
     return json.loads(text)
 
 
+def _read_only(self, *args, **kwargs):
+    raise TypeError(f"{type(self).__name__} is read-only; use overlay() or thaw() for a modified copy")
+
+
+class FrozenDict(dict):
+    """
+    A dict that rejects mutation. It is still a dict, so json.dumps(), isinstance()
+    checks and read access work unchanged; copy() returns a plain (shallow) dict and
+    copy.deepcopy() a mutable deep copy (see thaw()).
+    """
+    __slots__ = ()
+    __setitem__ = __delitem__ = __ior__ = clear = pop = popitem = setdefault = update = _read_only
+
+    def __reduce__(self):
+        return FrozenDict, (dict(self),)
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return thaw(self)
+
+
+class FrozenList(list):
+    """A list that rejects mutation (see FrozenDict)."""
+    __slots__ = ()
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _read_only
+    append = clear = extend = insert = pop = remove = reverse = sort = _read_only
+
+    def __reduce__(self):
+        return FrozenList, (list(self),)
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return thaw(self)
+
+
+_SCALAR_TYPES = frozenset({str, int, float, bool, type(None)})
+
+
+def freeze(value: Any) -> Any:
+    """Read-only copy of a JSON value: dicts become FrozenDict, lists FrozenList."""
+    if isinstance(value, dict):
+        if type(value) is FrozenDict:
+            return value
+        return FrozenDict(zip(value.keys(), map(freeze, value.values())))
+    if isinstance(value, list):
+        if type(value) is FrozenList:
+            return value
+        # Data arrays are mostly flat lists of numbers; set(map(type, ...)) checks that at C speed
+        if _SCALAR_TYPES.issuperset(map(type, value)):
+            return FrozenList(value)
+        return FrozenList(map(freeze, value))
+    return value
+
+
+def thaw(value: Any) -> Any:
+    """Mutable deep copy of a (frozen) JSON value, much cheaper than copy.deepcopy()."""
+    if isinstance(value, dict):
+        return dict(zip(value.keys(), map(thaw, value.values())))
+    if isinstance(value, list):
+        if _SCALAR_TYPES.issuperset(map(type, value)):
+            return list(value)
+        return list(map(thaw, value))
+    return value
+
+
+def overlay(view: Dict[str, Any], changes: Dict[str, Any]) -> FrozenDict:
+    """
+    A frozen figure view with `changes` merged in, e.g.
+    overlay(fig, {"layout": {"width": 800, "autosize": False}}). Nested dicts are
+    merged key by key; only the dicts along the changed paths are copied, every
+    other value (trace data in particular) is shared with `view`.
+    """
+    merged = dict(view)
+    for key, value in changes.items():
+        base = merged.get(key)
+        if isinstance(value, dict) and isinstance(base, dict):
+            merged[key] = overlay(base, value)
+        else:
+            merged[key] = freeze(value)
+    return FrozenDict(merged)
+
+
 @lru_cache(maxsize=64)
 def load_plot_json_from_html(path: Path) -> Dict[str, Any]:
     """
     Return a dict with keys: data (list), layout (dict), and optional config (dict)
     by parsing the Plotly.newPlot(...) call inside the HTML file.
+    The result is cached and shared by every caller, so it is frozen (FrozenDict,
+    FrozenList): reading it needs no copy and it is safe to share across threads.
+    Use overlay() for per-request changes such as layout sizing, or thaw() for a
+    mutable copy.
     """
-    html = path.read_text(encoding="utf-8", errors="replace")
+    with span("read_html", path=path.name):
+        html = path.read_text(encoding="utf-8", errors="replace")
     if "Plotly.newPlot" not in html:
         raise ValueError(f"No Plotly.newPlot call found in {path}")
-    _, data_str, layout_str, config_str = _extract_plotly_call_args(html)
-    data = _parse_json_like(data_str)
-    layout = _parse_json_like(layout_str)
+    with span("extract_call", path=path.name, chars=len(html)):
+        _, data_str, layout_str, config_str = _extract_plotly_call_args(html)
+    with span("parse_json", path=path.name, chars=len(data_str) + len(layout_str)):
+        data = _parse_json_like(data_str)
+        layout = _parse_json_like(layout_str)
     result: Dict[str, Any] = {"data": data, "layout": layout}
     if config_str:
         try:
@@ -178,7 +434,145 @@ def load_plot_json_from_html(path: Path) -> Dict[str, Any]:
                 result["config"] = config
         except json.JSONDecodeError:
             pass
-    return result
+    with span("freeze", path=path.name):
+        return freeze(result)
+
+
+@dataclass(frozen=True)
+class TraceIndex:
+    """(start, end) byte offsets of the parts of a Plotly.newPlot call in a saved HTML file."""
+    data: Span
+    layout: Span
+    config: Optional[Span]
+    traces: Tuple[Span, ...]  # one span per trace object of the data array
+    names: Tuple[Optional[str], ...]  # trace "name", None when unnamed
+
+
+_KEY_SEPARATOR_RE = re.compile(rb"\s*:\s*")
+# A JSON string or scalar literal (Plotly accepts numbers as trace names)
+_NAME_VALUE_RE = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"|[-+.\w]+')
+
+
+def _decode_json_bytes(raw: bytes) -> Any:
+    return _parse_json_like(raw.decode("utf-8", errors="replace"))
+
+
+def _index_traces(html: bytes, data: Span) -> Tuple[List[Span], List[Optional[str]]]:
+    """Spans and names of the objects directly inside the data array, without decoding them."""
+    spans: List[Span] = []
+    names: List[Optional[str]] = []
+    depth = 0
+    start = 0
+    for m in _TOKEN_RE_BYTES.finditer(html, data[0], data[1]):
+        bracket = m.group(3)
+        if bracket is None:
+            # A top-level "name" key of a trace: decode just its value
+            if depth == 2 and m.group(1) == b'"name"':
+                sep = _KEY_SEPARATOR_RE.match(html, m.end())
+                value = sep and _NAME_VALUE_RE.match(html, sep.end())
+                if value:
+                    name = _decode_json_bytes(value.group())
+                    names[-1] = None if name is None else str(name)
+            continue
+        if bracket in b"[{(":
+            depth += 1
+            if depth == 2 and bracket == b"{":
+                start = m.end() - 1
+                names.append(None)
+        else:
+            depth -= 1
+            if depth == 1 and bracket == b"}":
+                spans.append((start, m.end()))
+    return spans, names
+
+
+@lru_cache(maxsize=64)
+def _trace_index(path: Path, mtime_ns: int, size: int) -> TraceIndex:
+    with span("index_traces", path=path.name, bytes=size):
+        html = path.read_bytes()
+        _, data, layout, config = _plotly_call_spans(html)
+        traces, names = _index_traces(html, data)
+    return TraceIndex(data, layout, config, tuple(traces), tuple(names))
+
+
+def trace_index(path: Path) -> TraceIndex:
+    """Byte-offset index of a saved plot's traces; cached until the file's mtime or size changes."""
+    st = path.stat()
+    return _trace_index(path, st.st_mtime_ns, st.st_size)
+
+
+def load_plot_traces(path: Path, traces) -> Dict[str, Any]:
+    """
+    Like load_plot_json_from_html(), but decode only the requested traces (positions
+    or trace names) plus layout and config, read from their byte spans in the file.
+    The result is frozen like a full load, so both views of a figure behave alike.
+    """
+    index = trace_index(path)
+    positions: List[int] = []
+    for t in traces:
+        if isinstance(t, str):
+            if t not in index.names:
+                raise KeyError(f"No trace named {t!r} in {path.name}")
+            positions.append(index.names.index(t))
+        elif -len(index.traces) <= t < len(index.traces):
+            positions.append(t)
+        else:
+            raise IndexError(f"Trace {t} out of range, {path.name} has {len(index.traces)} traces")
+
+    def read(where: Span) -> Any:
+        f.seek(where[0])
+        return _decode_json_bytes(f.read(where[1] - where[0]))
+
+    with span("read_traces", path=path.name, traces=len(positions)), open(path, "rb") as f:
+        result: Dict[str, Any] = {"data": [read(index.traces[i]) for i in positions], "layout": read(index.layout)}
+        if index.config:
+            try:
+                config = read(index.config)
+                if isinstance(config, dict):
+                    result["config"] = config
+            except json.JSONDecodeError:
+                pass
+    with span("freeze"):
+        return freeze(result)
+
+
+# Trace attributes that carry one entry per plotted point
+_POINT_KEYS = ("x", "y", "z", "values", "labels", "lat", "lon", "r", "theta", "a", "b", "c")
+
+# Byte width of the typed-array dtypes Plotly uses for base64 "bdata" payloads
+_DTYPE_SIZES = {"i1": 1, "u1": 1, "i2": 2, "u2": 2, "i4": 4, "u4": 4, "i8": 8, "u8": 8, "f4": 4, "f8": 8}
+
+
+def _array_length(value: Any) -> int:
+    """Number of elements in a trace array (plain list, nested list or Plotly typed array)."""
+    if isinstance(value, list):
+        if value and isinstance(value[0], list):
+            return sum(len(row) for row in value if isinstance(row, list))
+        return len(value)
+    if isinstance(value, dict) and isinstance(value.get("bdata"), str):
+        shape = value.get("shape")
+        if shape:
+            n = 1
+            for dim in str(shape).split(","):
+                n *= int(dim)
+            return n
+        b64 = value["bdata"]
+        nbytes = len(b64) * 3 // 4 - b64[-2:].count("=")
+        return nbytes // _DTYPE_SIZES.get(str(value.get("dtype", "f8")).lstrip("<>|="), 8)
+    return 0
+
+
+def figure_stats(fig: Dict[str, Any]) -> Dict[str, int]:
+    """
+    Returns {"traces": n_traces, "points": n_points} for a figure dict.
+    The point count of a trace is the length of its longest data array.
+    """
+    data = fig.get("data") or []
+    points = 0
+    for trace in data:
+        if isinstance(trace, dict):
+            points += max((_array_length(trace.get(k)) for k in _POINT_KEYS), default=0)
+    return {"traces": len(data), "points": points}
 
 
 def list_plots() -> List[Dict[str, str]]:
@@ -187,9 +581,9 @@ def list_plots() -> List[Dict[str, str]]:
     [{key, title, filename}, ...]
     """
     items: List[Dict[str, str]] = []
-    for e in PLOT_ENTRIES:
+    for e in REGISTRY:
         try:
-            plot_path = _find_plot_file(e.filename)
+            plot_path = REGISTRY.path(e.key)
             fig_json = load_plot_json_from_html(plot_path)
             # Use layout.title.text if present; otherwise fallback
             title = e.fallback_title
@@ -205,30 +599,59 @@ def list_plots() -> List[Dict[str, str]]:
     return items
 
 
-def get_figure_json(key: str) -> Dict[str, Any]:
+def get_figure_json(key: str, traces: Optional[List[Union[int, str]]] = None) -> Dict[str, Any]:
     """
     Returns a JSON-compatible dict for the requested plot key:
     {"data": [...], "layout": {...}, "config": {...?}}
+    With `traces` (positions or trace names), "data" holds only those traces and only they are decoded.
     Raises KeyError if the key is unknown, FileNotFoundError/ValueError if the HTML is missing or malformed.
     """
-    entry = next((e for e in PLOT_ENTRIES if e.key == key), None)
-    if not entry:
-        raise KeyError(f"Unknown plot key: {key}")
-    path = _find_plot_file(entry.filename)
-    return load_plot_json_from_html(path)
+    path = REGISTRY.path(key)
+    if traces is None:
+        return load_plot_json_from_html(path)
+    return load_plot_traces(path, traces)
+
+
+def get_trace_names(key: str) -> List[Optional[str]]:
+    """Trace names of a plot (None for unnamed traces), read from the trace index without decoding the data."""
+    return list(trace_index(REGISTRY.path(key)).names)
+
+
+def iter_all_figures_json(cached: bool = True) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Yields (key, figure_json) for all plots, one figure at a time; a plot that cannot
+    be loaded yields {"error", "filename"} instead. With cached=False the figures
+    bypass the load_plot_json_from_html cache, so a consumer that streams them out
+    holds only one figure in memory at a time.
+    """
+    load = load_plot_json_from_html if cached else load_plot_json_from_html.__wrapped__
+    for e in REGISTRY:
+        with span("figure", key=e.key):
+            try:
+                fig = load(REGISTRY.path(e.key))
+            except Exception as ex:
+                fig = {"error": str(ex), "filename": f"docs/plots/{e.filename}"}
+        yield e.key, fig
 
 
 def get_all_figures_json() -> Dict[str, Dict[str, Any]]:
     """
     Returns a mapping {key: figure_json} for all plots.
     """
-    out: Dict[str, Dict[str, Any]] = {}
-    for e in PLOT_ENTRIES:
-        try:
-            out[e.key] = get_figure_json(e.key)
-        except Exception as ex:
-            out[e.key] = {"error": str(ex), "filename": f"docs/plots/{e.filename}"}
-    return out
+    with span("get_all_figures_json"):
+        return dict(iter_all_figures_json())
+
+
+def _print_json(chunks: Iterable[str], output: Optional[str]) -> None:
+    """Write JSON chunks to stdout, or atomically to output (replaced only once complete)."""
+    if output:
+        with AtomicFile(output) as f:
+            f.write_chunks(chunks)
+            f.write("\n")
+    else:
+        for chunk in chunks:
+            sys.stdout.write(chunk)
+        sys.stdout.write("\n")
 
 
 if __name__ == "__main__":
@@ -236,14 +659,32 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Aggregate Plotly figures from saved HTML files.")
     parser.add_argument("--list", action="store_true", help="List available plots")
     parser.add_argument("--key", type=str, help="Print JSON for a single plot key")
-    parser.add_argument("--all", action="store_true", help="Print JSON for all plots")
+    parser.add_argument("--traces", type=str,
+                        help="With --key: comma-separated trace positions or names to return")
+    parser.add_argument("--trace-names", action="store_true", help="With --key: print only the trace names")
+    parser.add_argument("--all", action="store_true", help="Print JSON for all plots, streamed one plot at a time")
+    parser.add_argument("--output", metavar="PATH",
+                        help="Write the JSON to PATH instead of stdout; PATH is replaced only once complete")
+    parser.add_argument("--trace", metavar="PATH",
+                        help="Write Chrome trace-event JSON with per-stage timings and peak memory to PATH")
     args = parser.parse_args()
 
+    if args.trace:
+        tracing.enable(args.trace)
+
     if args.list:
-        print(json.dumps(list_plots(), indent=2, ensure_ascii=False))
+        _print_json(iter_json(list_plots(), indent=2, ensure_ascii=False), args.output)
+    elif args.key and args.trace_names:
+        _print_json(iter_json(get_trace_names(args.key), indent=2, ensure_ascii=False), args.output)
     elif args.key:
-        print(json.dumps(get_figure_json(args.key), indent=2, ensure_ascii=False))
+        selected = None
+        if args.traces:
+            selected = [int(t) if t.lstrip("-").isdigit() else t for t in args.traces.split(",")]
+        _print_json(iter_json(get_figure_json(args.key, traces=selected), indent=2, ensure_ascii=False),
+                    args.output)
     elif args.all:
-        print(json.dumps(get_all_figures_json(), indent=2, ensure_ascii=False))
+        with span("get_all_figures_json"):
+            _print_json(iter_json_items(iter_all_figures_json(cached=False), indent=2, ensure_ascii=False),
+                        args.output)
     else:
-        parser.print_help()
\ No newline at end of file
+        parser.print_help()
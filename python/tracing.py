@@ -0,0 +1,156 @@
+"""
+Opt-in stage tracing for the export and extraction code paths.
+
+Set MUSPAD_TRACE=<path> (or pass --trace <path> to a CLI, which calls enable())
+to record nested timing spans with tracemalloc peak memory. The spans are written
+as Chrome trace-event JSON, viewable in chrome://tracing or https://ui.perfetto.dev.
+
+When tracing is disabled span() returns a shared no-op context manager, so the
+instrumentation costs one global lookup and an empty with-block per stage.
+"""
+
+from __future__ import annotations
+
+import atexit
+import json
+import os
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+ENV_VAR = "MUSPAD_TRACE"
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self) -> "_NullSpan":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        return None
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("tracer", "name", "args", "start_ns", "start_mem", "peak")
+
+    def __init__(self, tracer: "Tracer", name: str, args: Dict[str, Any]):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+        self.peak = 0
+
+    def __enter__(self) -> "_Span":
+        stack = self.tracer._stack()
+        current, peak = tracemalloc.get_traced_memory()
+        if stack:
+            # Fold the parent's peak so far into it before resetting the counter for this span
+            stack[-1].peak = max(stack[-1].peak, peak)
+        tracemalloc.reset_peak()
+        self.start_mem = current
+        self.peak = current
+        stack.append(self)
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        end_ns = time.perf_counter_ns()
+        current, peak = tracemalloc.get_traced_memory()
+        self.peak = max(self.peak, peak)
+        stack = self.tracer._stack()
+        if stack and stack[-1] is self:
+            stack.pop()
+        if stack:
+            stack[-1].peak = max(stack[-1].peak, self.peak)
+        self.tracer._record(self, end_ns, current)
+
+
+class Tracer:
+    """Collects spans from all threads and writes them as Chrome trace events."""
+
+    def __init__(self, path: str | os.PathLike):
+        self.path = Path(path)
+        self.events: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._origin_ns = time.perf_counter_ns()
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def _stack(self) -> List[_Span]:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _record(self, s: _Span, end_ns: int, end_mem: int) -> None:
+        args = {str(k): v if isinstance(v, (int, float, str, bool)) or v is None else str(v) for k, v in s.args.items()}
+        args["peak_bytes"] = s.peak
+        args["peak_delta_bytes"] = s.peak - s.start_mem
+        args["retained_bytes"] = end_mem - s.start_mem
+        event = {
+            "name": s.name,
+            "cat": "muspad",
+            "ph": "X",
+            "ts": (s.start_ns - self._origin_ns) / 1000.0,
+            "dur": (end_ns - s.start_ns) / 1000.0,
+            "pid": os.getpid(),
+            "tid": threading.get_ident(),
+            "args": args,
+        }
+        with self._lock:
+            self.events.append(event)
+
+    def span(self, name: str, args: Dict[str, Any]) -> _Span:
+        return _Span(self, name, args)
+
+    def write(self) -> Path:
+        with self._lock:
+            events = sorted(self.events, key=lambda e: e["ts"])
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text(json.dumps({"traceEvents": events, "displayTimeUnit": "ms"}), encoding="utf-8")
+        return self.path
+
+
+_tracer: Optional[Tracer] = None
+
+
+def span(name: str, **args: Any):
+    """
+    Context manager timing one stage: `with span("to_json", key="prevalence"): ...`.
+    Keyword arguments are attached to the trace event. No-op unless tracing is enabled.
+    """
+    if _tracer is None:
+        return _NULL_SPAN
+    return _tracer.span(name, args)
+
+
+def enable(path: str | os.PathLike) -> Tracer:
+    """Start recording spans; the trace is written to path at interpreter exit (or via flush())."""
+    global _tracer
+    if _tracer is None:
+        _tracer = Tracer(path)
+        atexit.register(flush)
+    else:
+        _tracer.path = Path(path)
+    return _tracer
+
+
+def enabled() -> bool:
+    return _tracer is not None
+
+
+def flush() -> Optional[Path]:
+    """Write the collected spans now. Returns the trace path, or None when tracing is off."""
+    if _tracer is None:
+        return None
+    return _tracer.write()
+
+
+if os.environ.get(ENV_VAR):
+    enable(os.environ[ENV_VAR])
@@ -0,0 +1,41 @@
+import json
+
+import pytest
+
+import synthetic_data
+from aggregate_store import append_batch, init_store, verify_store
+from export_plotly_json import REQUIRED_COLUMNS, SerologyAggregates, aggregate_csv
+
+
+def test_append_matches_full_recompute(tmp_path):
+    history = synthetic_data.write_csv(tmp_path / "history.csv", 3_000, columns=REQUIRED_COLUMNS)
+    batch = synthetic_data.write_csv(tmp_path / "batch.csv", 1_000, seed=1, columns=REQUIRED_COLUMNS)
+    store_path = tmp_path / "store.json"
+    init_store(history, store_path, chunksize=800)
+    store, affected, timings = append_batch(batch, store_path, chunksize=800)
+
+    full = aggregate_csv(history).merge(aggregate_csv(batch))
+    assert store["aggregates"] == json.loads(json.dumps(full.to_dict()))
+    assert store["rows"] == 4_000
+    assert [b["rows"] for b in store["batches"]] == [3_000, 1_000]
+    assert affected
+    assert set(timings) == {"load", "aggregate", "merge"}
+    assert verify_store(store_path)["match"]
+
+
+def test_appending_the_same_batch_twice_raises(tmp_path):
+    history = synthetic_data.write_csv(tmp_path / "history.csv", 1_000, columns=REQUIRED_COLUMNS)
+    batch = synthetic_data.write_csv(tmp_path / "batch.csv", 500, seed=1, columns=REQUIRED_COLUMNS)
+    store_path = tmp_path / "store.json"
+    init_store(history, store_path)
+    append_batch(batch, store_path)
+    with pytest.raises(ValueError, match="already folded"):
+        append_batch(batch, store_path)
+    store, _, _ = append_batch(batch, store_path, force=True)
+    assert store["rows"] == 2_000
+
+
+def test_aggregates_round_trip():
+    df3 = synthetic_data.make_df3(2_000, columns=REQUIRED_COLUMNS)
+    agg = SerologyAggregates.from_frame(df3)
+    assert SerologyAggregates.from_dict(json.loads(json.dumps(agg.to_dict()))).to_dict() == agg.to_dict()
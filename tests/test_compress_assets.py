@@ -0,0 +1,69 @@
+import gzip
+import os
+
+from compress_assets import compress_assets, compress_file, is_fresh, remove_orphans
+
+
+def _asset(path, text):
+    path.write_text(text * 200, encoding="utf-8")
+    return path
+
+
+def test_compress_file_writes_a_fresh_sibling(tmp_path):
+    path = _asset(tmp_path / "fig.json", '{"a": 1}')
+    gz_path = tmp_path / "fig.json.gz"
+
+    assert compress_file(path)[2] == "written"
+    assert gzip.decompress(gz_path.read_bytes()) == path.read_bytes()
+    assert is_fresh(path, gz_path)
+    assert compress_file(path)[2] == "up-to-date"
+
+
+def test_older_mtime_is_not_fresh(tmp_path):
+    path = _asset(tmp_path / "fig.json", '{"a": 1}')
+    compress_file(path)
+    st = path.stat()
+    # Same size, new content, and an mtime from before the .gz was written (cp -p, rsync -t)
+    _asset(path, '{"b": 2}')
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns - 10**9))
+
+    assert not is_fresh(path, tmp_path / "fig.json.gz")
+    assert compress_file(path)[2] == "written"
+    assert gzip.decompress((tmp_path / "fig.json.gz").read_bytes()) == path.read_bytes()
+
+
+def test_size_change_with_same_mtime_is_not_fresh(tmp_path):
+    path = _asset(tmp_path / "fig.json", '{"a": 1}')
+    compress_file(path)
+    st = path.stat()
+    _asset(path, '{"a": 12}')
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns))
+
+    assert not is_fresh(path, tmp_path / "fig.json.gz")
+
+
+def test_missing_or_truncated_gz_is_not_fresh(tmp_path):
+    path = _asset(tmp_path / "fig.json", '{"a": 1}')
+    assert not is_fresh(path, tmp_path / "fig.json.gz")
+    (tmp_path / "fig.json.gz").write_bytes(b"")
+    assert not is_fresh(path, tmp_path / "fig.json.gz")
+
+
+def test_small_files_are_skipped_and_orphans_removed(tmp_path):
+    small = tmp_path / "small.json"
+    small.write_text("{}", encoding="utf-8")
+    (tmp_path / "small.json.gz").write_bytes(gzip.compress(b"{}"))
+    orphan = tmp_path / "gone.json.gz"
+    orphan.write_bytes(gzip.compress(b"{}"))
+
+    assert compress_file(small)[2] == "skipped"
+    assert not (tmp_path / "small.json.gz").exists()
+    assert remove_orphans([tmp_path]) == [orphan]
+
+
+def test_compress_assets_reports_every_asset(tmp_path):
+    _asset(tmp_path / "a.json", '{"a": 1}')
+    _asset(tmp_path / "b.html", "<p>hi</p>")
+    report = compress_assets([tmp_path])
+    assert sorted((os.path.basename(r["file"]), r["status"]) for r in report) == [("a.json", "written"),
+                                                                                  ("b.html", "written")]
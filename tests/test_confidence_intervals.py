@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+import confidence_intervals
+from confidence_intervals import bootstrap_interval, error_bars, margin_of_error, wilson_interval
+
+SUCCESSES = np.array([0, 3, 50, 480, 999, 0])
+TOTALS = np.array([20, 40, 100, 1_000, 1_000, 0])
+
+
+def test_wilson_known_values():
+    low, high = wilson_interval([50, 0], [100, 20])
+    np.testing.assert_allclose(low, [40.383, 0.0], atol=1e-3)
+    np.testing.assert_allclose(high, [59.617, 16.113], atol=1e-3)
+
+
+def test_empty_strata_are_nan_and_shape_is_kept():
+    k, n = SUCCESSES.reshape(2, 3), TOTALS.reshape(2, 3)
+    for low, high in (wilson_interval(k, n), bootstrap_interval(k, n, replicates=200)):
+        assert low.shape == high.shape == (2, 3)
+        assert np.isnan(low[1, 2]) and np.isnan(high[1, 2])
+        assert not np.isnan(low[:1]).any()
+
+
+def test_invalid_counts_raise():
+    with pytest.raises(ValueError):
+        wilson_interval([5], [4])
+    with pytest.raises(ValueError):
+        bootstrap_interval([1, 2], [3])
+
+
+def test_bootstrap_matches_a_per_stratum_loop():
+    low, high = bootstrap_interval(SUCCESSES, TOTALS, replicates=2_000, seed=7)
+    rng = np.random.default_rng(7)
+    for i in np.flatnonzero(TOTALS > 0):
+        draws = rng.binomial(TOTALS[i], SUCCESSES[i] / TOTALS[i], size=2_000)
+        np.testing.assert_allclose([low[i], high[i]], np.percentile(draws, [2.5, 97.5]) / TOTALS[i] * 100)
+
+
+def test_bootstrap_blocks_do_not_change_the_result(monkeypatch):
+    expected = bootstrap_interval(SUCCESSES, TOTALS, replicates=1_000)
+    monkeypatch.setattr(confidence_intervals, "MAX_MATRIX_CELLS", 2_500)
+    np.testing.assert_array_equal(bootstrap_interval(SUCCESSES, TOTALS, replicates=1_000), expected)
+
+
+def test_bootstrap_agrees_with_wilson_for_large_strata():
+    k, n = np.array([480, 4_000]), np.array([1_000, 10_000])
+    np.testing.assert_allclose(bootstrap_interval(k, n), wilson_interval(k, n), atol=0.3)
+
+
+def test_error_bars_are_non_negative():
+    plus, minus = error_bars(SUCCESSES, TOTALS, method="bootstrap", replicates=500)
+    assert (plus >= 0).all() and (minus >= 0).all()
+    assert plus[-1] == minus[-1] == 0
+    with pytest.raises(ValueError):
+        error_bars(SUCCESSES, TOTALS, method="jackknife")
+
+
+def test_margin_of_error():
+    np.testing.assert_allclose(margin_of_error([1_000, 0])[:1], [3.099], atol=1e-3)
+    assert np.isnan(margin_of_error([0]))[0]
+    assert margin_of_error([1_000], sampling_fraction=0.5)[0] < margin_of_error([1_000])[0]
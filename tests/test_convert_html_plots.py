@@ -0,0 +1,46 @@
+import json
+
+import pytest
+
+import synthetic_data
+from convert_html_plots import FIGURES_DIRNAME, UNIFIED_MANIFEST, convert_html_plots, update_plots
+
+
+@pytest.fixture
+def plots_dir(tmp_path):
+    plots = tmp_path / "plots"
+    synthetic_data.make_plot_html(plots / "Extra Plot.html", 20_000, traces=2, title="Mine")
+    return plots
+
+
+def test_converts_plots_of_another_plots_dir(tmp_path, plots_dir):
+    out = tmp_path / "out"
+    manifest = convert_html_plots(out, plots_dir)
+
+    assert [c["source"] for c in manifest["charts"]] == ["plots/Extra Plot.html"]
+    chart = manifest["charts"][0]
+    assert chart["file"] == f"{FIGURES_DIRNAME}/extra_plot.json"
+    assert chart["traces"] == 2
+    fig = json.loads((out / chart["file"]).read_text(encoding="utf-8"))
+    assert fig["layout"]["title"]["text"] == "Mine"
+    assert json.loads((out / UNIFIED_MANIFEST).read_text(encoding="utf-8")) == manifest
+
+
+def test_chart_without_key_or_id_is_skipped(tmp_path, plots_dir):
+    out = tmp_path / "out"
+    out.mkdir()
+    (out / "manifest.json").write_text(json.dumps({"charts": [{"file": "gone.html", "type": "html"}]}))
+    manifest = convert_html_plots(out, plots_dir)
+
+    assert [c["source"] for c in manifest["charts"]] == ["plots/Extra Plot.html"]
+    assert not (out / FIGURES_DIRNAME / "None.json").exists()
+
+
+def test_update_plots_patches_one_entry(tmp_path, plots_dir):
+    out = tmp_path / "out"
+    convert_html_plots(out, plots_dir)
+    synthetic_data.make_plot_html(plots_dir / "Second.html", 20_000, traces=1, title="Second")
+    manifest = update_plots(["Second.html"], out, plots_dir)
+
+    assert sorted(c["file"] for c in manifest["charts"]) == [f"{FIGURES_DIRNAME}/extra_plot.json",
+                                                              f"{FIGURES_DIRNAME}/second.json"]
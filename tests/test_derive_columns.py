@@ -0,0 +1,67 @@
+import pandas as pd
+import pytest
+
+import derive_columns
+import synthetic_data
+
+
+@pytest.fixture
+def frame():
+    return pd.DataFrame({
+        "vacc_first_date": ["2021-03-01", "2021-03-06T23:30:00", None, "not a date"],
+        "vacc_second_date": ["2021-04-12", "2021-03-27", "2021-05-01", "2021-05-01"],
+        "age_22": [25, None, None, 90],
+        "age_23": [None, 41, None, None],
+        "birth_year": [None, 1990, 1960, None],
+    })
+
+
+def test_dose_interval_rounds_like_the_browser(frame):
+    derived = derive_columns.derive_frame(frame, date_columns=[])
+    assert derived[derive_columns.DOSE_INTERVAL_COLUMN].tolist() == [42, 20, pd.NA, pd.NA]
+
+
+def test_period_keys_use_iso_monday_weeks():
+    days = pd.DatetimeIndex(["2021-01-03", "2021-01-04", "2021-12-31"])
+    assert derive_columns.period_keys(days) == {
+        "week": ["2020-12-28", "2021-01-04", "2021-12-27"],
+        "month": ["2021-01", "2021-01", "2021-12"],
+        "quarter": ["Q1 2021", "Q1 2021", "Q4 2021"],
+        "year": ["2021", "2021", "2021"],
+    }
+
+
+def test_age_group_falls_back_across_waves(frame):
+    derived = derive_columns.derive_frame(frame, date_columns=[])
+    groups = derived[derive_columns.HARMONIZED_AGE_COLUMN]
+    assert groups.astype(object).tolist()[:3] == ["18-29", "40-49", "60-69"]
+    assert groups.iloc[3] == "80+"
+
+
+def test_missing_dates_stay_missing(frame):
+    derived = derive_columns.derive_frame(frame, date_columns=["vacc_first_date"])
+    assert derived["vacc_first_date_week"].isna().tolist() == [False, False, True, True]
+    assert derived["vacc_first_date_week"].iloc[1] == "2021-03-01"
+
+
+def test_derive_csv_chunked_matches_derive_columns(tmp_path):
+    source = synthetic_data.make_df3(3_000, seed=1)
+    csv_path = tmp_path / "df3.csv"
+    source.to_csv(csv_path, index=False)
+    expected = derive_columns.derive_columns(pd.read_csv(csv_path, low_memory=False))
+
+    report = derive_columns.derive_csv(csv_path, tmp_path / "out.csv", chunksize=700)
+    assert report["rows"] == 3_000
+    assert set(report["stages"]) == {"dose_interval", "period_keys", "age_groups", "write"}
+    expected.to_csv(tmp_path / "expected.csv", index=False)
+    pd.testing.assert_frame_equal(pd.read_csv(tmp_path / "out.csv", low_memory=False),
+                                  pd.read_csv(tmp_path / "expected.csv", low_memory=False))
+
+
+def test_derive_csv_rewrites_in_place(tmp_path):
+    csv_path = tmp_path / "df3.csv"
+    pd.DataFrame({"vacc_first_date": ["2021-03-01"], "vacc_second_date": ["2021-03-22"]}).to_csv(csv_path, index=False)
+    report = derive_columns.derive_csv(csv_path)
+    assert report["output"] == str(csv_path)
+    assert pd.read_csv(csv_path)[derive_columns.DOSE_INTERVAL_COLUMN].tolist() == [21]
+    assert [p.name for p in tmp_path.iterdir()] == ["df3.csv"]
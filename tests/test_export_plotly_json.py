@@ -0,0 +1,77 @@
+import json
+
+import pandas as pd
+import pytest
+
+import export_plotly_json
+import synthetic_data
+from export_plotly_json import (REQUIRED_COLUMNS, SerologyAggregates, aggregate_csv, export_figures,
+                                export_figures_from_csv)
+
+FIGURES = ["serology_seroprevalence.json", "vaccination_coverage.json", "vaccine_brand_distribution.json",
+           "seroprevalence_age_waves.json"]
+
+
+@pytest.fixture(scope="module")
+def csv_path(tmp_path_factory):
+    return synthetic_data.write_csv(tmp_path_factory.mktemp("data") / "df3.csv", 5_000, columns=REQUIRED_COLUMNS)
+
+
+def _read_outputs(out_dir):
+    return {name: (out_dir / name).read_text(encoding="utf-8") for name in FIGURES}
+
+
+def test_chunked_aggregates_match_in_memory(csv_path):
+    full = SerologyAggregates.from_frame(pd.read_csv(csv_path))
+    assert aggregate_csv(csv_path, chunksize=700) == full
+
+
+@pytest.mark.parametrize("options", [{}, {"precision": 3}])
+def test_streaming_export_matches_in_memory(csv_path, tmp_path, options):
+    export_figures(pd.read_csv(csv_path), tmp_path / "memory", **options)
+    export_figures_from_csv(csv_path, tmp_path / "stream", chunksize=700, **options)
+    assert _read_outputs(tmp_path / "stream") == _read_outputs(tmp_path / "memory")
+
+
+def test_precision_shrinks_figures_and_keeps_the_template(csv_path, tmp_path):
+    out = export_figures(pd.read_csv(csv_path), tmp_path, precision=3)
+    for name in FIGURES:
+        fig = json.loads((tmp_path / name).read_text(encoding="utf-8"))
+        assert "template" in fig["layout"]
+        assert out["sizes"][name]["bytes"] < out["sizes"][name]["full_precision_bytes"]
+    assert "template" not in json.loads((tmp_path / "plotly_manifest.json").read_text(encoding="utf-8"))
+
+
+@pytest.mark.parametrize("wrapper", ["_compute_seroprevalence_fig", "_compute_vaccination_fig",
+                                     "_compute_vaccine_brand_mix_fig", "_compute_seroprevalence_by_age_waves_fig"])
+def test_figure_wrappers_accept_precomputed_aggregates(csv_path, monkeypatch, wrapper):
+    df3 = pd.read_csv(csv_path)
+    agg = SerologyAggregates.from_frame(df3)
+    expected = getattr(export_plotly_json, wrapper)(df3)
+
+    def no_scan(*args, **kwargs):
+        raise AssertionError("df3 was aggregated again")
+
+    monkeypatch.setattr(SerologyAggregates, "from_frame", no_scan)
+    assert str(getattr(export_plotly_json, wrapper)(agg)) == str(expected)
+
+
+def test_preview_sample_keeps_wave_and_site_shares():
+    df3 = synthetic_data.make_df3(20_000, columns=export_plotly_json.PREVIEW_COLUMNS)
+    sample = export_plotly_json.preview_sample(df3, 2_000, seed=1)
+    assert len(sample) == 2_000 and sample.index.is_unique
+    for wave in export_plotly_json.SERO_WAVES:
+        assert abs(sample[wave].notna().mean() - df3[wave].notna().mean()) < 0.01
+    site_shares = sample["standort"].value_counts(normalize=True) - df3["standort"].value_counts(normalize=True)
+    assert site_shares.abs().max() < 0.01
+    with pytest.raises(ValueError):
+        export_plotly_json.preview_sample(df3, 0)
+
+
+def test_preview_export_labels_every_figure(csv_path, tmp_path):
+    out = export_figures(pd.read_csv(csv_path), tmp_path, preview=1_000)
+    assert {k: out["preview"][k] for k in ("rows", "sample", "seed")} == {"rows": 5_000, "sample": 1_000, "seed": 0}
+    assert set(out["preview"]["margins"]) == set(FIGURES)
+    for name in FIGURES:
+        fig = json.loads((tmp_path / name).read_text(encoding="utf-8"))
+        assert any(a["text"].startswith("Preview: n = ") for a in fig["layout"]["annotations"])
@@ -0,0 +1,54 @@
+import pytest
+
+import synthetic_data
+from export_plotly_json import REQUIRED_COLUMNS, SerologyAggregates, build_figures
+from filtered_figures import FilteredFigures, canonical_filter, filter_hash
+
+
+@pytest.fixture(scope="module")
+def df3():
+    return synthetic_data.make_df3(4_000, columns=[*REQUIRED_COLUMNS, "standort", "sex", "age_22",
+                                                   "s22_sampling_date_new"])
+
+
+def test_equivalent_specs_share_a_cache_key():
+    a = {"standort": ["freiburg", "aachen"], "sex": 2, "age_22": {"min": 30, "max": 49}}
+    b = {"age_22": {"max": 49, "min": 30}, "sex": ["2.0"], "standort": ["aachen", "freiburg", "aachen"]}
+    assert canonical_filter(a) == canonical_filter(b)
+    assert filter_hash(a) == filter_hash(b)
+    assert filter_hash(a) != filter_hash({**a, "age_22": {"min": 30, "max": 50}})
+    assert filter_hash({"sex": [2]}) != filter_hash({"sex": {"min": 2, "max": 2}})
+
+
+def test_unknown_range_bound_raises():
+    with pytest.raises(ValueError):
+        canonical_filter({"age_22": {"from": 30}})
+
+
+def test_figures_are_memoized_per_filter(df3):
+    filtered = FilteredFigures(df3)
+    first = filtered.figures({"standort": ["freiburg"], "sex": [2]})
+    assert filtered.figures({"sex": ["2"], "standort": "freiburg"}) is first
+    filtered.figures({"standort": ["freiburg"], "sex": [1]})
+    assert filtered.cache_info() == {"mask_hits": 1, "mask_misses": 3, "figure_hits": 1, "figure_misses": 2,
+                                     "masks": 3, "figures": 2}
+
+
+def test_filtered_figures_match_a_fresh_export(df3):
+    spec = {"standort": ["freiburg", "aachen"], "age_22": {"min": 30, "max": 49},
+            "s22_sampling_date_new": {"min": "2022-05-01"}}
+    result = FilteredFigures(df3).figures(spec)
+    rows = (df3["standort"].isin(["freiburg", "aachen"]) & df3["age_22"].between(30, 49)
+            & (df3["s22_sampling_date_new"] >= "2022-05-01"))
+    figures, _ = build_figures(SerologyAggregates.from_frame(df3[rows]))
+    assert result["rows"] == int(rows.sum()) > 0
+    assert result["figures"] == {name: fig.to_json() for name, fig in figures.items()}
+
+
+def test_caches_are_bounded(df3):
+    filtered = FilteredFigures(df3, maxsize=2, mask_cache_size=2)
+    for low in range(20, 25):
+        filtered.figures({"age_22": {"min": low}})
+    assert filtered.cache_info()["figures"] == 2 and filtered.cache_info()["masks"] == 2
+    with pytest.raises(KeyError):
+        filtered.figures({"no_such_column": [1]})
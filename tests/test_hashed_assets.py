@@ -0,0 +1,47 @@
+import os
+
+from hashed_assets import collect_garbage, content_hash, hashed_filename, is_hashed_filename, publish
+
+
+def _publish_versions(directory, filename, contents):
+    names = []
+    for i, content in enumerate(contents):
+        name = publish(directory, filename, content)
+        # Distinct, increasing mtimes regardless of the file system's timestamp resolution
+        os.utime(directory / name, ns=(i * 10**9, i * 10**9))
+        names.append(name)
+    return names
+
+
+def test_publish_names_by_content(tmp_path):
+    name = publish(tmp_path, "Prevalence.html", b"<p>1</p>")
+    assert name == hashed_filename("Prevalence.html", content_hash(b"<p>1</p>"))
+    assert is_hashed_filename(name) and not is_hashed_filename("Prevalence.html")
+    assert (tmp_path / name).read_bytes() == b"<p>1</p>"
+    assert publish(tmp_path, "Prevalence.html", b"<p>1</p>") == name
+    assert sorted(p.name for p in tmp_path.iterdir()) == [name]
+
+
+def test_collect_garbage_keeps_newest_versions(tmp_path):
+    old, middle, new = _publish_versions(tmp_path, "Prevalence.html", [b"1", b"2", b"3"])
+    (tmp_path / (old + ".gz")).write_bytes(b"gz")
+    (tmp_path / "Prevalence.html").write_bytes(b"source")
+    other = publish(tmp_path, "Prevalence 2.html", b"1")
+
+    removed = collect_garbage(tmp_path, "Prevalence.html", retain=2)
+
+    assert sorted(p.name for p in removed) == [old, old + ".gz"]
+    assert sorted(p.name for p in tmp_path.iterdir()) == sorted(["Prevalence.html", middle, new, other])
+
+
+def test_collect_garbage_keeps_at_least_the_current_version(tmp_path):
+    names = _publish_versions(tmp_path, "fig.json", [b"1", b"2"])
+    collect_garbage(tmp_path, "fig.json", retain=0)
+    assert [p.name for p in tmp_path.iterdir()] == [names[-1]]
+
+
+def test_republished_version_becomes_current(tmp_path):
+    first, second = _publish_versions(tmp_path, "fig.json", [b"1", b"2"])
+    publish(tmp_path, "fig.json", b"1")
+    collect_garbage(tmp_path, "fig.json", retain=1)
+    assert [p.name for p in tmp_path.iterdir()] == [first]
@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from histogram_pyramid import EMPTY_CATEGORY, build_pyramid, histogram, load_pyramid, pyramid_csv, write_pyramid
+
+
+def _bin_numeric(values, nbins, lo=None, hi=None):
+    """binNumeric() of docs/index.html: nbins equal bins over [min, max], the last one closed."""
+    values = values[np.isfinite(values)]
+    lo = values.min() if lo is None else lo
+    hi = values.max() if hi is None else hi
+    width = (hi - lo) / nbins
+    counts = [int(((values >= lo + i * width) & (values < lo + (i + 1) * width)).sum()) for i in range(nbins)]
+    counts[-1] += int((values == hi).sum())
+    return counts
+
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(0)
+    n = 20_000
+    frame = pd.DataFrame({
+        "age": rng.integers(18, 90, n).astype(float),
+        "weight": np.round(rng.normal(75, 12, n), 1),
+        "score": rng.lognormal(0, 1, n),
+        "site": rng.choice(["a", "b", "c"], n).astype(object),
+    })
+    frame.loc[::11, "age"] = np.nan
+    frame.loc[::13, "site"] = None
+    return frame
+
+
+@pytest.fixture
+def columns(frame, tmp_path):
+    write_pyramid(tmp_path / "pyramid.json", build_pyramid(frame, ["age", "weight", "score"], by="site"))
+    return load_pyramid(tmp_path / "pyramid.json")
+
+
+@pytest.mark.parametrize("column", ["age", "weight"])
+@pytest.mark.parametrize("nbins", [7, 10, 30, 64])
+def test_discrete_columns_match_bin_numeric_for_any_bin_count(frame, columns, column, nbins):
+    assert columns[column]["discrete"]
+    assert histogram(columns[column], nbins)["counts"] == _bin_numeric(frame[column].to_numpy(), nbins)
+
+
+@pytest.mark.parametrize("nbins", [2, 32, 1024])
+def test_continuous_columns_match_at_powers_of_two(frame, columns, nbins):
+    assert not columns["score"]["discrete"]
+    assert histogram(columns["score"], nbins)["counts"] == _bin_numeric(frame["score"].to_numpy(), nbins)
+
+
+def test_split_counts_add_up_per_category(frame, columns):
+    split = columns["age"]["split"]
+    assert set(split) == {"a", "b", "c", EMPTY_CATEGORY}
+    assert sum(split.values()).tolist() == columns["age"]["counts"].tolist()
+    # Category histograms share the bins of the whole column
+    full = frame["age"].to_numpy()
+    values = frame.loc[frame["site"] == "b", "age"].to_numpy()
+    expected = _bin_numeric(values, 30, np.nanmin(full), np.nanmax(full))
+    assert histogram(columns["age"], 30, "b")["counts"] == expected
+
+
+def test_streaming_build_matches_in_memory(frame, tmp_path):
+    frame.to_csv(tmp_path / "df3.csv", index=False)
+    frame = pd.read_csv(tmp_path / "df3.csv")
+    write_pyramid(tmp_path / "memory.json", build_pyramid(frame, ["age", "weight", "score"], by="site"))
+    write_pyramid(tmp_path / "stream.json", pyramid_csv(tmp_path / "df3.csv", ["age", "weight", "score"],
+                                                         by="site", chunksize=3_000))
+    assert (tmp_path / "stream.json").read_text() == (tmp_path / "memory.json").read_text()
@@ -0,0 +1,54 @@
+import hashlib
+import json
+
+import pytest
+
+from json_stream import AtomicFile, iter_json, iter_json_items, write_json
+
+VALUE = {"a": [1, 2.5, {"b": None, "ü": [True, [], {}]}], "c": {"d": "x\ny"}, "e": [], 3: "int key"}
+
+
+@pytest.mark.parametrize("kwargs", [{}, {"indent": 2}, {"separators": (",", ":"), "ensure_ascii": False}])
+@pytest.mark.parametrize("depth", [0, 1, 3])
+def test_iter_json_matches_dumps(kwargs, depth):
+    expected = json.dumps(VALUE, **kwargs)
+    assert "".join(iter_json(VALUE, depth=depth, chunk_size=4, **kwargs)) == expected
+    assert "".join(iter_json_items(iter(VALUE.items()), depth=depth, **kwargs)) == expected
+
+
+def test_iter_json_items_consumes_lazily():
+    produced = []
+
+    def items():
+        for i in range(3):
+            produced.append(i)
+            yield f"k{i}", [i] * 3
+
+    chunks = iter_json_items(items(), chunk_size=1)
+    next(chunks)
+    assert len(produced) < 3
+    assert "".join(chunks)
+
+
+def test_write_json_leaves_no_temporary_file(tmp_path):
+    target = tmp_path / "out.json"
+    written = write_json({"a": 1}, target, indent=2)
+    assert json.loads(target.read_text(encoding="utf-8")) == {"a": 1}
+    assert written.changed and written.hexdigest() == hashlib.sha256(target.read_bytes()).hexdigest()
+    mtime = target.stat().st_mtime_ns
+    assert not write_json({"a": 1}, target, only_if_changed=True, indent=2).changed
+    assert target.stat().st_mtime_ns == mtime
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["out.json"]
+
+
+def test_atomic_file_keeps_the_old_file_on_error(tmp_path):
+    target = tmp_path / "out.json"
+    target.write_text("old", encoding="utf-8")
+    with pytest.raises(RuntimeError):
+        with AtomicFile(target) as f:
+            f.write("new")
+            raise RuntimeError
+    assert target.read_text(encoding="utf-8") == "old"
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["out.json"]
+    with pytest.raises(ValueError):
+        f.commit()
@@ -0,0 +1,19 @@
+import json
+
+import synthetic_data
+from make_thumbnails import THUMBS_DIRNAME, make_thumbnails
+
+
+def test_thumbnails_of_another_plots_dir(tmp_path):
+    plots = tmp_path / "plots"
+    synthetic_data.make_plot_html(plots / "Extra Plot.html", 20_000, traces=2)
+    out = tmp_path / "out"
+    out.mkdir()
+    (out / "manifest.json").write_text(json.dumps({"charts": []}), encoding="utf-8")
+
+    index = make_thumbnails(out, plots)
+
+    assert list(index) == ["extra-plot"]
+    svg = (out / THUMBS_DIRNAME / index["extra-plot"]["file"]).read_text(encoding="utf-8")
+    assert svg.startswith("<svg")
+    assert make_thumbnails(out, plots) == index
@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import synthetic_data
+from normalization import (MISSING, NEGATIVE, OTHER, POSITIVE, SEROSTATUS_VOCABULARY, YES_NO_VOCABULARY,
+                           encode_serostatus, encode_yes_no, is_serostatus_column, is_yes_no_column,
+                           normalize_frame, token)
+
+
+@pytest.mark.parametrize("value, expected", [(1, "1"), (1.0, "1"), ("1.0", "1"), (" 1 ", "1"), (True, "1"),
+                                             (np.float64(0.0), "0"), ("Seropositive ", "seropositive"),
+                                             (0.5, "0.5"), ("0.50", "0.50")])
+def test_token(value, expected):
+    assert token(value) == expected
+
+
+def test_every_spelling_gets_the_same_code():
+    values = pd.Series(["seropositive", "Negative", 1.0, "0.0", " + ", None, np.nan, "maybe", 0])
+    assert encode_serostatus(values).tolist() == [POSITIVE, NEGATIVE, POSITIVE, NEGATIVE, POSITIVE,
+                                                  MISSING, MISSING, OTHER, NEGATIVE]
+    assert encode_yes_no(pd.Series(["ja", "Nein", "1", 2.0])).tolist() == [POSITIVE, NEGATIVE, POSITIVE, OTHER]
+    assert encode_serostatus(values).dtype == np.int8
+
+
+def test_column_classification():
+    assert is_serostatus_column("X20_21_serostatus") and is_serostatus_column("s22_nc_qualitative")
+    assert is_yes_no_column("X20_21_kurzfragen_cov19_vaccination_first_yn")
+    assert not is_serostatus_column("age_22") and not is_yes_no_column("age_22")
+
+
+def test_normalize_frame_matches_per_element_map():
+    df3 = synthetic_data.make_df3(3_000)
+    codes = normalize_frame(df3)
+    assert len(codes.columns) > 5 and codes.index.equals(df3.index)
+    for name in codes.columns:
+        vocabulary = SEROSTATUS_VOCABULARY if is_serostatus_column(name) else YES_NO_VOCABULARY
+        expected = df3[name].map(lambda v: MISSING if pd.isna(v) else vocabulary.get(token(v), OTHER))
+        assert codes[name].tolist() == expected.tolist()
+
+
+def test_csv_round_trip_keeps_codes(tmp_path):
+    df3 = synthetic_data.make_df3(1_000, columns=["X20_21_serostatus", "s22_nc_qualitative", "s23_nc_qualitative"])
+    df3.to_csv(tmp_path / "df3.csv", index=False)
+    pd.testing.assert_frame_equal(normalize_frame(pd.read_csv(tmp_path / "df3.csv", dtype=str)), normalize_frame(df3))
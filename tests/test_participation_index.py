@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import synthetic_data
+from participation_index import ID_COLUMN, ParticipationIndex, load_index, wave_columns, write_index
+
+
+@pytest.fixture(scope="module")
+def frame():
+    columns = [c for cs in wave_columns().values() for c in cs[:3]]
+    return synthetic_data.make_df3(5_000, columns=[ID_COLUMN] + columns)
+
+
+@pytest.fixture(scope="module")
+def index(frame):
+    return ParticipationIndex.from_frame(frame)
+
+
+def test_round_trip(index, tmp_path):
+    write_index(tmp_path / "index.json", index)
+    loaded = load_index(tmp_path / "index.json")
+    np.testing.assert_array_equal(loaded.ids, index.ids)
+    np.testing.assert_array_equal(loaded.masks, index.masks)
+    assert loaded.waves == index.waves
+
+
+def test_string_ids_round_trip():
+    frame = pd.DataFrame({ID_COLUMN: ["a7", "b2", "a7"], "s22_submitdate": [None, "2022-05-01", "2022-05-02"]})
+    index = ParticipationIndex.from_frame(frame)
+    loaded = ParticipationIndex.from_dict(index.to_dict())
+    assert loaded.ids.tolist() == ["a7", "b2"]
+    np.testing.assert_array_equal(loaded.lookup(["a7", "zz"]), index.lookup(["a7", "zz"]))
+
+
+def test_long_format_and_chunks_match_wide(frame, index):
+    long = pd.concat([frame[[ID_COLUMN, *cs]] for cs in wave_columns(frame.columns).values()], ignore_index=True)
+    np.testing.assert_array_equal(ParticipationIndex.from_frame(long).masks, index.masks)
+    merged = ParticipationIndex.from_frame(frame.iloc[:2_000]).merge(ParticipationIndex.from_frame(frame.iloc[2_000:]))
+    np.testing.assert_array_equal(merged.ids, index.ids)
+    np.testing.assert_array_equal(merged.masks, index.masks)
+
+
+def test_queries_match_wide_columns(frame, index):
+    present = {wave: frame[cs].notna().any(axis=1).to_numpy() for wave, cs in wave_columns(frame.columns).items()}
+    assert index.participation_counts()["per_wave"] == {wave: int(p.sum()) for wave, p in present.items()}
+    expected = np.array([[(present[a] & present[b]).sum() for b in index.waves] for a in index.waves])
+    np.testing.assert_array_equal(index.retention_matrix(), expected)
+    cohort = present["s22"] & present["s23"] & ~present["w22"]
+    assert index.cohort_size(["s22", "s23"], ["w22"]) == cohort.sum()
+    assert sorted(index.cohort(["s22", "s23"], ["w22"]).tolist()) == sorted(frame[ID_COLUMN][cohort].tolist())
@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from quantile_sketches import (KLLSketch, build_sketches, load_sketches, observed_rank_error, union_sketch,
+                               verify, write_sketches)
+
+QS = np.linspace(0.01, 0.99, 99)
+
+
+def _values(n, seed=0):
+    return np.random.default_rng(seed).lognormal(3, 1, n)
+
+
+def test_small_sketch_is_exact():
+    values = _values(150)
+    sketch = KLLSketch(k=200).update(values)
+    assert sketch.compactions == 0 and sketch.rank_error() == 0.0
+    np.testing.assert_allclose(sketch.quantiles(QS), np.quantile(values, QS))
+    assert sketch.box_stats()["n"] == 150
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_rank_error_stays_within_bound(seed):
+    values = _values(200_000, seed)
+    sketch = KLLSketch(k=200, seed=(seed,)).update(values)
+    # Bound for all 99 quantiles at once, with probability 0.99
+    bound = sketch.rank_error(0.01 / len(QS))
+    assert 0 < bound < 0.05
+    assert observed_rank_error(sketch, np.sort(values), QS) <= bound
+    assert (sketch.n, sketch.min, sketch.max) == (len(values), values.min(), values.max())
+
+
+def test_merged_sketch_keeps_the_bound():
+    parts = [_values(50_000, seed) for seed in range(4)]
+    merged = KLLSketch(k=200)
+    for seed, values in enumerate(parts):
+        merged.merge(KLLSketch(k=200, seed=(seed,)).update(values))
+    union = np.sort(np.concatenate(parts))
+    assert merged.n == len(union)
+    assert observed_rank_error(merged, union, QS) <= merged.rank_error(0.01 / len(QS))
+
+
+def test_union_of_strata_matches_selected_rows(tmp_path):
+    rng = np.random.default_rng(1)
+    frame = pd.DataFrame({"x": rng.normal(50, 10, 20_000), "site": rng.choice(["a", "b", "c"], 20_000)})
+    frame.loc[::7, "x"] = np.nan
+    sketches = build_sketches(frame, ["x"], ["site"])
+    write_sketches(tmp_path / "sketches.json", sketches, rows=len(frame))
+    loaded = load_sketches(tmp_path / "sketches.json")
+
+    union = union_sketch(loaded, "x", "site", ["a", "c"])
+    selected = frame.loc[frame["site"].isin(["a", "c"]), "x"].dropna().to_numpy()
+    assert union.n == len(selected)
+    assert observed_rank_error(union, np.sort(selected), QS) <= union.rank_error(0.01 / len(QS))
+    report = verify(frame, loaded)["x"]
+    assert report["sketches"] == 4 and report["max_observed"] <= report["max_bound"]
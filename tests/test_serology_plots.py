@@ -0,0 +1,159 @@
+import copy
+import json
+import os
+import pickle
+
+import pytest
+
+import serology_plots
+import synthetic_data
+from serology_plots import FrozenDict, FrozenList, PlotEntry, PlotRegistry, freeze, overlay, plot_key, thaw
+
+
+def _registry(tmp_path, charts=(), aliases=()):
+    plots = tmp_path / "plots"
+    plots.mkdir(exist_ok=True)
+    manifest = tmp_path / "manifest.json"
+    manifest.write_text(json.dumps({"charts": list(charts)}), encoding="utf-8")
+    return PlotRegistry(manifest_path=manifest, plots_dir=plots, aliases=aliases), plots
+
+
+def test_plot_key():
+    assert plot_key("Box Plot Health Status.html") == "box_plot_health_status"
+    assert plot_key("distribution_level.html") == "distribution_level"
+    assert plot_key("!!.html") == "plot"
+
+
+def test_registry_discovers_plots_and_manifest_ids(tmp_path):
+    registry, plots = _registry(tmp_path, charts=[{"id": "mask-shop-usage", "title": "Masks",
+                                                   "file": "mask shop usage.html", "type": "html"}],
+                                aliases=[PlotEntry("npi", "NPI.html", "NPI")])
+    for name in ("NPI.html", "mask shop usage.html", "Mask-Shop Usage.html", "NPI.0123456789.html"):
+        (plots / name).write_text("<html></html>", encoding="utf-8")
+
+    assert [e.key for e in registry] == ["npi", "mask_shop_usage", "mask_shop_usage_2"]
+    assert registry.get("mask-shop-usage") is registry.get("mask_shop_usage")
+    assert registry.get("mask_shop_usage").fallback_title == "Masks"
+    assert registry.by_filename("NPI.html").key == "npi"
+    assert registry.path("npi") == plots / "NPI.html"
+    assert "npi" in registry and "nope" not in registry
+    with pytest.raises(KeyError):
+        registry.get("nope")
+
+
+def test_registry_reloads_when_the_plots_dir_changes(tmp_path):
+    registry, plots = _registry(tmp_path)
+    assert len(registry) == 0
+    (plots / "New Plot.html").write_text("<html></html>", encoding="utf-8")
+    # Directory mtimes can be coarse; bump it so the change is visible
+    st = plots.stat()
+    os.utime(plots, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    assert [e.key for e in registry] == ["new_plot"]
+
+
+def test_list_plots_reads_titles_from_the_registry(tmp_path, monkeypatch):
+    registry, plots = _registry(tmp_path)
+    synthetic_data.make_plot_html(plots / "Extra Plot.html", 5_000, title="Mine")
+    monkeypatch.setattr(serology_plots, "REGISTRY", registry)
+    monkeypatch.setattr(serology_plots, "_repo_root", lambda: tmp_path)
+    serology_plots.load_plot_json_from_html.cache_clear()
+
+    assert serology_plots.list_plots() == [{"key": "extra_plot", "title": "Mine", "filename": "plots/Extra Plot.html"}]
+    assert len(serology_plots.get_figure_json("extra_plot")["data"]) == 1
+
+
+_TRICKY_DATA = [
+    {"type": "bar", "name": "a \"quoted\" [name]", "x": [1, 2], "y": [3, 4], "marker": {"name": "inner"}},
+    {"type": "scatter", "x": [1], "y": [{"nested": "}]"}]},
+    {"type": "pie", "name": 2020, "values": [1, 2, 3], "labels": ["a", "b", "c"]},
+]
+
+
+@pytest.fixture
+def tricky_plot(tmp_path):
+    path = tmp_path / "tricky.html"
+    path.write_text('<html><script>Plotly.newPlot("p", ' + json.dumps(_TRICKY_DATA) + ', {"title": {"text": "T"}}, '
+                    '{"responsive": true})</script></html>', encoding="utf-8")
+    return path
+
+
+def test_trace_index_names(tricky_plot):
+    index = serology_plots.trace_index(tricky_plot)
+    assert index.names == ('a "quoted" [name]', None, "2020")
+    assert len(index.traces) == 3
+
+
+@pytest.mark.parametrize("traces, positions", [([1], [1]), ([-1, 0], [2, 0]), (["2020", 'a "quoted" [name]'], [2, 0])])
+def test_partial_load_matches_full_load(tricky_plot, traces, positions):
+    full = serology_plots.load_plot_json_from_html(tricky_plot)
+    partial = serology_plots.load_plot_traces(tricky_plot, traces)
+    assert partial["data"] == [full["data"][i] for i in positions]
+    assert partial["layout"] == full["layout"] and partial["config"] == full["config"]
+
+
+def test_partial_load_errors(tricky_plot):
+    with pytest.raises(IndexError):
+        serology_plots.load_plot_traces(tricky_plot, [3])
+    with pytest.raises(KeyError):
+        serology_plots.load_plot_traces(tricky_plot, ["missing"])
+
+
+def test_trace_index_follows_file_changes(tmp_path):
+    path = synthetic_data.make_plot_html(tmp_path / "p.html", 10_000, traces=2)
+    assert len(serology_plots.trace_index(path).traces) == 2
+    synthetic_data.make_plot_html(path, 10_000, traces=3)
+    assert len(serology_plots.trace_index(path).traces) == 3
+    assert serology_plots.load_plot_traces(path, ["series 2"])["data"][0]["name"] == "series 2"
+
+
+@pytest.fixture(scope="module")
+def plot_path(tmp_path_factory):
+    return synthetic_data.make_plot_html(tmp_path_factory.mktemp("plots") / "plot.html", 20_000, traces=3)
+
+
+@pytest.fixture
+def figure(plot_path):
+    return serology_plots.load_plot_json_from_html(plot_path)
+
+
+@pytest.mark.parametrize("mutate", [
+    lambda fig: fig.__setitem__("layout", {}),
+    lambda fig: fig["layout"].update(width=1),
+    lambda fig: fig["layout"].pop("title"),
+    lambda fig: fig["data"].append({}),
+    lambda fig: fig["data"][0].setdefault("name", "x"),
+    lambda fig: fig["data"].sort(),
+])
+def test_cached_figure_rejects_mutation(figure, mutate):
+    with pytest.raises(TypeError):
+        mutate(figure)
+
+
+def test_partial_load_is_frozen(plot_path):
+    fig = serology_plots.load_plot_traces(plot_path, [1])
+    assert isinstance(fig, FrozenDict) and isinstance(fig["data"], FrozenList)
+    with pytest.raises(TypeError):
+        fig["layout"]["width"] = 1
+
+
+def test_deepcopy_and_thaw_are_mutable(figure):
+    for copied in (copy.deepcopy(figure), thaw(figure)):
+        copied["layout"]["width"] = 1
+        copied["data"].append({})
+        assert type(copied) is dict and type(copied["data"]) is list
+    assert "width" not in figure["layout"]
+    assert copy.copy(figure) is figure
+
+
+def test_overlay_copies_only_the_changed_path(figure):
+    view = overlay(figure, {"layout": {"width": 640}})
+    assert view["layout"]["width"] == 640 and "width" not in figure["layout"]
+    assert view["data"] is figure["data"]
+    assert isinstance(view, FrozenDict)
+
+
+def test_frozen_views_pickle_and_compare():
+    value = {"a": [1, {"b": [2.5, None]}], "c": "x"}
+    frozen = freeze(value)
+    assert frozen == value and thaw(frozen) == value
+    assert pickle.loads(pickle.dumps(frozen)) == value
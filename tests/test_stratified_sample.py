@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from stratified_sample import allocate, sample_indices, stratified_sample, stratum_codes
+
+
+def _codes(sizes, seed=0):
+    codes = np.repeat(np.arange(len(sizes)), sizes)
+    return np.random.default_rng(seed).permutation(codes)
+
+
+def test_allocate_is_proportional_and_exact():
+    sizes = [500, 300, 199, 1, 0]
+    alloc = allocate(sizes, 100)
+    assert alloc.sum() == 100
+    assert np.all(np.abs(alloc - np.array(sizes) * 100 / sum(sizes)) < 1)
+    assert allocate(sizes, 5_000).tolist() == sizes
+
+
+@pytest.mark.parametrize("n", [1, 37, 1_000, 9_999])
+def test_sample_has_the_allocated_rows_per_stratum(n):
+    sizes = [6_000, 2_500, 1_000, 490, 7, 3]
+    codes = _codes(sizes)
+    picked = sample_indices(codes, n, seed=1)
+    assert len(picked) == n and np.all(np.diff(picked) > 0)
+    assert np.bincount(codes[picked], minlength=len(sizes)).tolist() == allocate(sizes, n).tolist()
+
+
+def test_sample_is_seeded():
+    codes = _codes([4_000, 1_000])
+    assert np.array_equal(sample_indices(codes, 500, seed=3), sample_indices(codes, 500, seed=3))
+    assert not np.array_equal(sample_indices(codes, 500, seed=3), sample_indices(codes, 500, seed=4))
+    assert np.array_equal(sample_indices(codes, 5_000), np.arange(5_000))
+
+
+def test_rows_are_drawn_uniformly_within_a_stratum():
+    codes = _codes([200, 50])
+    hits = np.zeros(len(codes))
+    for seed in range(400):
+        hits[sample_indices(codes, 25, seed=seed)] += 1
+    # Every row is picked with probability 0.1, i.e. 40 times in expectation (sd ~6)
+    assert hits.min() > 15 and hits.max() < 70
+    assert hits[codes == 0].sum() == 400 * 20 and hits[codes == 1].sum() == 400 * 5
+
+
+def test_stratum_codes_cross_keys_and_keep_missing_values():
+    site = pd.Series(["a", "b", None, "a", "b"])
+    wave = np.array([0, 0, 1, 1, 0])
+    codes, n_codes = stratum_codes([site, wave])
+    assert n_codes == 6
+    assert codes[1] == codes[4] and len(set(codes.tolist())) == 4
+    with pytest.raises(ValueError):
+        stratum_codes([])
+
+
+def test_stratified_sample_keeps_shares():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({"site": rng.choice(["a", "b", "c"], 30_000, p=[0.6, 0.3, 0.1]), "x": np.arange(30_000)})
+    sample = stratified_sample(df, 3_000, [df["site"]], seed=2)
+    assert len(sample) == 3_000
+    shares = sample["site"].value_counts()
+    expected = df["site"].value_counts() / 10
+    assert (shares - expected).abs().max() <= 1
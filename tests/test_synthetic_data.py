@@ -0,0 +1,47 @@
+import pandas as pd
+import pytest
+
+import serology_plots
+import synthetic_data
+from data_catalog import DATA_CATALOG
+
+
+def test_make_df3_is_seeded():
+    a = synthetic_data.make_df3(500, seed=3)
+    pd.testing.assert_frame_equal(a, synthetic_data.make_df3(500, seed=3))
+    assert not a.equals(synthetic_data.make_df3(500, seed=4))
+    assert list(a.columns) == [f["name"] for f in DATA_CATALOG]
+
+
+def test_column_subset_keeps_values():
+    full = synthetic_data.make_df3(500)
+    subset = synthetic_data.make_df3(500, columns=["age_22", "standort", "s22_serostatus"])
+    pd.testing.assert_frame_equal(subset, full[subset.columns])
+
+
+def test_skipped_wave_is_missing_in_every_column():
+    frame = synthetic_data.make_df3(2_000)
+    s22 = [c for c in frame.columns if c.startswith("s22_")]
+    skipped = frame[s22].isna().all(axis=1)
+    assert abs(skipped.mean() - (1 - synthetic_data.WAVES["s22_"][0])) < 0.05
+
+
+def test_write_csv_chunks_continue_ids(tmp_path):
+    path = synthetic_data.write_csv(tmp_path / "df3.csv", 2_500, columns=["merge_id", "age_22"], chunk_rows=1_000)
+    frame = pd.read_csv(path)
+    assert len(frame) == 2_500
+    assert frame["merge_id"].tolist() == list(range(2_500))
+
+
+def test_make_plot_html_size_and_traces(tmp_path):
+    path = synthetic_data.make_plot_html(tmp_path / "p.html", 200_000, traces=3, title="T")
+    assert abs(path.stat().st_size - 200_000) / 200_000 < 0.05
+    fig = serology_plots.load_plot_json_from_html(path)
+    assert len(fig["data"]) == 3
+    assert fig["layout"]["title"]["text"] == "T"
+
+
+@pytest.mark.parametrize("text, size", [("10k", 10_000), ("1M", 1_000_000), ("100KB", 100_000),
+                                        ("200MB", 200_000_000), ("2.5k", 2_500), ("42", 42)])
+def test_parse_size(text, size):
+    assert synthetic_data.parse_size(text) == size
@@ -0,0 +1,52 @@
+import json
+
+import synthetic_data
+from convert_html_plots import FIGURES_DIRNAME, UNIFIED_MANIFEST, convert_html_plots
+from watch_assets import AssetWatcher, PollingWatcher
+
+
+def _watcher(tmp_path):
+    plots = tmp_path / "plots"
+    synthetic_data.make_plot_html(plots / "Extra Plot.html", 20_000, traces=2)
+    out = tmp_path / "out"
+    convert_html_plots(out, plots)
+    csv_path = tmp_path / "df3.csv"
+    csv_path.write_text("merge_id\n1\n", encoding="utf-8")
+    return AssetWatcher(csv_path, plots, out)
+
+
+def test_classify_routes_each_source_to_its_stage(tmp_path):
+    w = _watcher(tmp_path)
+    assert w.figures_dir in w.watched_dirs()
+
+    assert w.classify([w.plots_dir / "Extra Plot.html"]) == {"csv": False, "plots": {"Extra Plot.html"},
+                                                             "figures": False}
+    assert w.classify([w.csv_path])["csv"]
+    assert w.classify([w.out_dir / "serology_seroprevalence.json"])["figures"]
+    assert w.classify([w.figures_dir / "extra_plot.json"])["figures"]
+    assert w.classify([w.figures_dir])["figures"]
+    assert not w.classify([w.out_dir / UNIFIED_MANIFEST, w.figures_dir / "extra_plot.json.gz"])["figures"]
+
+
+def test_own_outputs_are_not_changes(tmp_path):
+    w = _watcher(tmp_path)
+    w._remember_outputs()
+    assert not w.classify([w.figures_dir / "extra_plot.json"])["figures"]
+
+
+def test_edited_converted_figure_refreshes_its_entry(tmp_path):
+    w = _watcher(tmp_path)
+    w._remember_outputs()
+    poller = PollingWatcher(w.watched_dirs())
+    fig_path = w.figures_dir / "extra_plot.json"
+    fig = json.loads(fig_path.read_text(encoding="utf-8"))
+    fig["data"] = fig["data"][:1]
+    fig_path.write_text(json.dumps(fig), encoding="utf-8")
+
+    stages = w.classify(poller.poll(0))
+    assert stages == {"csv": False, "plots": set(), "figures": True}
+    w.rebuild(stages)
+
+    chart = json.loads((w.out_dir / UNIFIED_MANIFEST).read_text(encoding="utf-8"))["charts"][0]
+    assert chart["file"] == f"{FIGURES_DIRNAME}/extra_plot.json"
+    assert (chart["bytes"], chart["traces"]) == (fig_path.stat().st_size, 1)
@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import synthetic_data
+from zip_aggregates import (REQUIRED_COLUMNS, SERO_COLUMN, UNKNOWN, VACC_FIRST_COLUMN, VACC_SECOND_COLUMN,
+                            ZIP_COLUMN, build_table, lookup, merge_counts, normalize_zip, zip_counts)
+
+
+@pytest.fixture(scope="module")
+def counts():
+    return zip_counts(synthetic_data.make_df3(20_000, columns=REQUIRED_COLUMNS))
+
+
+def _parents(table):
+    """(parent n, published children n, parent prefix) for every published parent, including the top."""
+    cells = table["cells"]
+    levels = table["levels"]
+    for depth, level in enumerate(levels):
+        parent_level = levels[depth - 1] if depth else 0
+        parents = [""] if not depth else [p for p in cells if p != UNKNOWN and len(p) == parent_level]
+        for parent in parents:
+            children = [k for k in cells
+                        if k != UNKNOWN and len(k) == level and k.startswith(parent)]
+            n_children = sum(cells[k][0] for k in children)
+            if not depth and UNKNOWN in cells:
+                n_children += cells[UNKNOWN][0]
+            yield (table["total"][0] if not depth else cells[parent][0]), n_children, parent
+
+
+@pytest.mark.parametrize("min_count", [1, 3, 10])
+def test_children_and_other_add_up_to_parent(counts, min_count):
+    table = build_table(counts, min_count=min_count)
+    for parent_n, children_n, parent in _parents(table):
+        other = table["other"].get(parent, [0])[0]
+        assert children_n + other == parent_n, parent
+        assert other == 0 or other >= min_count
+
+
+@pytest.mark.parametrize("min_count", [3, 10])
+def test_no_small_cell_is_published(counts, min_count):
+    table = build_table(counts, min_count=min_count)
+    assert all(row[0] >= min_count for row in table["cells"].values())
+    assert all(row[0] >= min_count for row in table["other"].values())
+    # Nothing is published below a suppressed prefix
+    for prefix in table["cells"]:
+        if prefix != UNKNOWN and len(prefix) > table["levels"][0]:
+            parent_level = max(level for level in table["levels"] if level < len(prefix))
+            assert prefix[:parent_level] in table["cells"]
+
+
+def test_secondary_suppression():
+    zips = ["79100"] * 12 + ["79101"] * 11 + ["79102"] * 2 + ["80000"] * 30 + [None] * 4
+    frame = pd.DataFrame({ZIP_COLUMN: zips, SERO_COLUMN: ["positive"] * 5 + ["negative"] * 54,
+                          VACC_FIRST_COLUMN: 1.0, VACC_SECOND_COLUMN: np.nan})
+    table = build_table(zip_counts(frame), min_count=10)
+    # "unknown" (4 rows) alone would be recoverable from the total, so "79" (25 rows) is suppressed too
+    assert set(table["cells"]) == {"80", "800", "80000"}
+    assert table["other"][""][0] == 29
+    assert table["total"][0] == 59
+    # Second dose has no answers at all: the rate and its denominator are withheld
+    assert lookup(table, "80")["dose2_rate"] is None and lookup(table, "80")["dose2_n"] is None
+    assert lookup(table, "79") is None
+    with pytest.raises(ValueError):
+        lookup(table, "7910")
+
+
+def test_chunked_counts_match(counts):
+    frame = synthetic_data.make_df3(20_000, columns=REQUIRED_COLUMNS)
+    chunks = [zip_counts(frame.iloc[i:i + 3_000]) for i in range(0, len(frame), 3_000)]
+    pd.testing.assert_frame_equal(merge_counts(chunks), counts)
+
+
+def test_normalize_zip():
+    values = ["7910", "07910", 7910.0, None, "abc", " 12345 ", "123456"]
+    assert normalize_zip(values).tolist() == ["07910", "07910", "07910", "", "", "12345", ""]
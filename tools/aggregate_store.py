@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Persisted serology aggregates that new survey data can be folded into without
+re-reading the history.
+
+The store is the SerologyAggregates of every row seen so far (counts per
+serostatus code, per dose, per vaccine brand and per wave x age group x status),
+plus a log of the batches folded in. `append` aggregates only the new CSV,
+merges it into the stored counts and re-exports the figures, so its cost grows
+with the batch, not with the history. A batch is either new participants (full
+rows) or a newly merged wave (the wave's columns plus age_group_22_1 for the
+participants who have it); columns a batch lacks count as missing. Batches must
+not repeat rows already counted: a file whose content was appended before is
+refused unless --force is given, and `verify` recomputes everything from
+scratch and compares aggregates and figure JSON with the store.
+
+Figures whose inputs the batch did not change are reported as unaffected and,
+since export only rewrites files whose content changed, are left untouched.
+
+Usage:
+    python3 aggregate_store.py init <df3.csv> [--store PATH] [--out-dir DIR]
+    python3 aggregate_store.py append <new_rows.csv> [--store PATH] [--force] [--verify [CSV ...]]
+    python3 aggregate_store.py verify [CSV ...] [--store PATH]
+    python3 aggregate_store.py export [--store PATH] [--out-dir DIR]
+"""
+import hashlib
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from confidence_intervals import DEFAULT_REPLICATES, METHODS as CI_METHODS
+from export_plotly_json import (DEFAULT_CHUNKSIZE, REQUIRED_COLUMNS, SerologyAggregates, build_figures,
+                                export_aggregates)
+from figure_compaction import dumps_compact
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "python"))
+import tracing  # noqa: E402
+from tracing import span  # noqa: E402
+
+STORE_VERSION = 1
+STORE_FILENAME = ".aggregate_store.json"
+DEFAULT_OUT_DIR = "docs/assets/plots"
+
+# Aggregate fields each exported figure is built from
+FIGURE_FIELDS = {
+    "serology_seroprevalence.json": ("sero_counts",),
+    "vaccination_coverage.json": ("n1_valid", "n1_yes", "n2_valid", "n2_yes"),
+    "vaccine_brand_distribution.json": ("brand_counts",),
+    "seroprevalence_age_waves.json": ("wave_age_status",),
+}
+
+
+def _file_digest(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()[:16]
+
+
+def aggregate_batch(csv_path: str | os.PathLike, chunksize: int = DEFAULT_CHUNKSIZE):
+    """
+    Stream csv_path (REQUIRED_COLUMNS only) and return (aggregates, rows, columns),
+    where columns are the REQUIRED_COLUMNS the file has.
+    """
+    agg = SerologyAggregates()
+    rows = 0
+    columns = []
+    with span("aggregate_batch", path=str(csv_path), chunksize=chunksize):
+        for chunk in pd.read_csv(csv_path, usecols=lambda c: c in REQUIRED_COLUMNS, chunksize=chunksize):
+            agg.merge(SerologyAggregates.from_frame(chunk))
+            rows += len(chunk)
+            columns = [c for c in REQUIRED_COLUMNS if c in chunk.columns]
+    return agg, rows, columns
+
+
+def load_store(store_path: str | os.PathLike) -> dict:
+    with open(store_path, encoding="utf-8") as f:
+        store = json.load(f)
+    if store.get("version") != STORE_VERSION:
+        raise ValueError(f"{store_path}: unsupported aggregate store version {store.get('version')!r}")
+    return store
+
+
+def save_store(store_path: str | os.PathLike, store: dict) -> None:
+    """Write the store atomically, so an interrupted append leaves the previous state."""
+    store_path = Path(store_path)
+    store_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = store_path.with_name(f".{store_path.name}.tmp")
+    tmp_path.write_text(dumps_compact(store), encoding="utf-8")
+    os.replace(tmp_path, store_path)
+
+
+def _batch_record(csv_path: Path, digest: str, rows: int, columns: list) -> dict:
+    return {"source": str(csv_path), "sha256": digest, "rows": rows, "columns": columns}
+
+
+def affected_figures(before: dict, after: dict) -> list:
+    """Filenames of the figures whose aggregate fields differ between two to_dict() states."""
+    return [filename for filename, fields in FIGURE_FIELDS.items()
+            if any(before[name] != after[name] for name in fields)]
+
+
+def init_store(csv_path: str | os.PathLike, store_path: str | os.PathLike,
+               chunksize: int = DEFAULT_CHUNKSIZE) -> dict:
+    """Aggregate the full history in csv_path into a new store (replacing any existing one)."""
+    csv_path = Path(csv_path)
+    agg, rows, columns = aggregate_batch(csv_path, chunksize)
+    store = {
+        "version": STORE_VERSION,
+        "rows": rows,
+        "batches": [_batch_record(csv_path, _file_digest(csv_path), rows, columns)],
+        "aggregates": agg.to_dict(),
+    }
+    save_store(store_path, store)
+    return store
+
+
+def append_batch(csv_path: str | os.PathLike, store_path: str | os.PathLike,
+                 chunksize: int = DEFAULT_CHUNKSIZE, force: bool = False):
+    """
+    Fold the rows of csv_path into the store. Returns (store, affected figure
+    filenames, timings in seconds). Raises ValueError when the same file content
+    was appended before, unless force=True.
+    """
+    csv_path = Path(csv_path)
+    timings = {}
+    start = time.perf_counter()
+    store = load_store(store_path)
+    digest = _file_digest(csv_path)
+    if not force:
+        for i, batch in enumerate(store["batches"]):
+            if batch["sha256"] == digest:
+                raise ValueError(f"{csv_path} was already folded into the store (batch {i}, from "
+                                 f"{batch['source']}); pass --force to count its rows again")
+    timings["load"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch, rows, columns = aggregate_batch(csv_path, chunksize)
+    timings["aggregate"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    with span("merge"):
+        before = store["aggregates"]
+        after = SerologyAggregates.from_dict(before).merge(batch).to_dict()
+        # Compare through JSON so values match the reloaded store exactly
+        after = json.loads(dumps_compact(after))
+    store["aggregates"] = after
+    store["rows"] += rows
+    store["batches"].append(_batch_record(csv_path, digest, rows, columns))
+    save_store(store_path, store)
+    timings["merge"] = time.perf_counter() - start
+    return store, affected_figures(before, after), timings
+
+
+def _figure_texts(agg: SerologyAggregates) -> dict:
+    figures, _ = build_figures(agg)
+    return {filename: fig.to_json() for filename, fig in figures.items()}
+
+
+def verify_store(store_path: str | os.PathLike, csv_paths=None, chunksize: int = DEFAULT_CHUNKSIZE) -> dict:
+    """
+    Recompute the aggregates from scratch (from csv_paths, by default every batch
+    source recorded in the store) and compare them and the figure JSON built from
+    them with the store. Returns {"match", "rows", "fields", "figures"}, listing
+    the aggregate fields and figures that differ.
+    """
+    store = load_store(store_path)
+    csv_paths = csv_paths or [batch["source"] for batch in store["batches"]]
+    full = SerologyAggregates()
+    rows = 0
+    with span("verify", sources=len(csv_paths)):
+        for path in csv_paths:
+            agg, n, _ = aggregate_batch(path, chunksize)
+            full.merge(agg)
+            rows += n
+        expected = json.loads(dumps_compact(full.to_dict()))
+        stored = store["aggregates"]
+        fields = [name for name in expected if expected[name] != stored[name]]
+        expected_texts = _figure_texts(full)
+        stored_texts = _figure_texts(SerologyAggregates.from_dict(stored))
+        figures = [f for f in expected_texts if expected_texts[f] != stored_texts[f]]
+    return {
+        "match": not fields and not figures,
+        "rows": {"recomputed": rows, "store": store["rows"]},
+        "sources": [str(p) for p in csv_paths],
+        "fields": fields,
+        "figures": figures,
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--store", default=None,
+                        help=f"Aggregate store (default: OUT_DIR/{STORE_FILENAME})")
+    common.add_argument("--out-dir", default=DEFAULT_OUT_DIR, help="Output directory for figures and manifest")
+    common.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE, help="Rows per CSV chunk")
+    common.add_argument("--trace", metavar="PATH",
+                        help="Write Chrome trace-event JSON with per-stage timings and peak memory to PATH")
+    export_options = argparse.ArgumentParser(add_help=False)
+    export_options.add_argument("--no-export", action="store_true", help="Update the store without writing figures")
+    export_options.add_argument("--ci", choices=CI_METHODS, default=None,
+                                help="Add 95%% confidence-interval error bars (Wilson or bootstrap) to every figure")
+    export_options.add_argument("--replicates", type=int, default=DEFAULT_REPLICATES,
+                                help="Bootstrap resamples per stratum when --ci bootstrap is set")
+    export_options.add_argument("--precision", type=int, default=None,
+                                help="Round float payloads to this many decimals")
+
+    parser = argparse.ArgumentParser(description="Incrementally maintained serology aggregates and figures.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    init_parser = commands.add_parser("init", parents=[common, export_options],
+                                      help="Aggregate the full df3 CSV into a new store")
+    init_parser.add_argument("csv_path", help="Path to the df3 CSV")
+    append_parser = commands.add_parser("append", parents=[common, export_options],
+                                        help="Fold new rows (or a new wave) into the store")
+    append_parser.add_argument("csv_path", help="CSV with only the new rows or wave columns")
+    append_parser.add_argument("--force", action="store_true", help="Append even if this file was appended before")
+    append_parser.add_argument("--verify", nargs="*", default=None, metavar="CSV",
+                               help="Afterwards compare with a full recompute (of the given CSVs, "
+                                    "default: every recorded batch)")
+    verify_parser = commands.add_parser("verify", parents=[common],
+                                        help="Compare the store with a full recompute")
+    verify_parser.add_argument("csv_paths", nargs="*", help="Full-history CSVs (default: every recorded batch)")
+    commands.add_parser("export", parents=[common, export_options], help="Write the figures from the store")
+    args = parser.parse_args()
+
+    if args.trace:
+        tracing.enable(args.trace)
+
+    store_path = Path(args.store) if args.store else Path(args.out_dir) / STORE_FILENAME
+    out = {"store": str(store_path)}
+    try:
+        if args.command == "init":
+            start = time.perf_counter()
+            store = init_store(args.csv_path, store_path, args.chunksize)
+            out.update(rows=store["rows"], seconds=round(time.perf_counter() - start, 3))
+        elif args.command == "append":
+            store, affected, timings = append_batch(args.csv_path, store_path, args.chunksize, args.force)
+            out.update(rows=store["rows"], appended_rows=store["batches"][-1]["rows"], affected=affected,
+                       seconds={stage: round(s, 3) for stage, s in timings.items()})
+        elif args.command == "verify":
+            out["verify"] = verify_store(store_path, args.csv_paths, args.chunksize)
+        else:
+            store = load_store(store_path)
+            out["rows"] = store["rows"]
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    if args.command != "verify" and not args.no_export:
+        start = time.perf_counter()
+        agg = SerologyAggregates.from_dict(store["aggregates"])
+        export = export_aggregates(agg, args.out_dir, ci=args.ci, replicates=args.replicates,
+                                   precision=args.precision)
+        out["export"] = {"manifest": export["manifest"], "stats": export["stats"],
+                         "seconds": round(time.perf_counter() - start, 3)}
+    if args.command == "append" and args.verify is not None:
+        out["verify"] = verify_store(store_path, args.verify, args.chunksize)
+
+    print(json.dumps(out, indent=2))
+    if "verify" in out and not out["verify"]["match"]:
+        sys.exit(1)
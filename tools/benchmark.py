@@ -0,0 +1,621 @@
+#!/usr/bin/env python3
+"""
+Benchmark harness for the export, extraction and manifest code paths.
+
+Row-scaled cases run on seeded synthetic df3 frames/CSVs (see synthetic_data.py),
+file-scaled cases on synthetic Plotly HTML files, strata-scaled cases on seeded
+(successes, totals) arrays. Each case is timed `--repeat`
+times per size and the results are written as JSON so runs can be compared:
+
+Usage:
+    python3 benchmark.py [--quick] [--rows 10k,100k,1M,10M] [--html-sizes 100KB,10MB,200MB]
+                         [--strata 100,300,1000] [--only case,...] [--repeat N] [--out bench_results.json]
+    python3 benchmark.py --compare old.json new.json
+"""
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "python"))
+
+import synthetic_data  # noqa: E402
+
+ROW_SIZES = [10_000, 100_000, 1_000_000, 10_000_000]
+HTML_SIZES = [100_000, 1_000_000, 10_000_000, 50_000_000, 200_000_000]
+QUICK_ROW_SIZES = [10_000, 100_000]
+QUICK_HTML_SIZES = [100_000, 1_000_000]
+STRATA_SIZES = [100, 300, 1000]
+QUICK_STRATA_SIZES = [100]
+
+# name -> (kind, function); kind "rows" cases get a Workload with a df3 and CSV,
+# kind "html" cases get a Workload with a directory of synthetic plots,
+# kind "strata" cases get a Workload with per-stratum successes and totals
+CASES = {}
+
+
+def case(name, kind):
+    def register(fn):
+        CASES[name] = (kind, fn)
+        return fn
+    return register
+
+
+class Workload:
+    """Inputs shared by all cases of one size; built lazily and cached."""
+
+    def __init__(self, kind, size, workdir: Path):
+        self.kind = kind
+        self.size = size
+        self.workdir = workdir
+        self._df3 = None
+        self._csv = None
+        self._plots = None
+        self._strata = None
+
+    @property
+    def df3(self):
+        if self._df3 is None:
+            from export_plotly_json import REQUIRED_COLUMNS
+            self._df3 = synthetic_data.make_df3(self.size, columns=REQUIRED_COLUMNS)
+        return self._df3
+
+    @property
+    def csv_path(self):
+        if self._csv is None:
+            from export_plotly_json import REQUIRED_COLUMNS
+            self._csv = synthetic_data.write_csv(self.workdir / "df3.csv", self.size, columns=REQUIRED_COLUMNS)
+        return self._csv
+
+    @property
+    def plots_dir(self):
+        """One synthetic plot per serology_plots.PLOT_ENTRIES name, all of `size` bytes (hard links)."""
+        if self._plots is None:
+            import serology_plots
+            plots = self.workdir / "plots"
+            plots.mkdir(parents=True, exist_ok=True)
+            first = None
+            for e in serology_plots.PLOT_ENTRIES:
+                target = plots / e.filename
+                if first is None:
+                    synthetic_data.make_plot_html(target, self.size, traces=3, title=e.fallback_title)
+                    first = target
+                    continue
+                try:
+                    os.link(first, target)
+                except OSError:
+                    shutil.copyfile(first, target)
+            self._plots = plots
+        return self._plots
+
+    @property
+    def plot_file(self):
+        return next(iter(sorted(self.plots_dir.glob("*.html"))))
+
+    @property
+    def strata(self):
+        """(successes, totals) for `size` strata of 50-5000 participants each."""
+        if self._strata is None:
+            import numpy as np
+            rng = np.random.default_rng(self.size)
+            totals = rng.integers(50, 5000, self.size)
+            self._strata = (rng.binomial(totals, rng.uniform(0.02, 0.6, self.size)), totals)
+        return self._strata
+
+    def scratch_copy(self, name="scratch"):
+        """Fresh copy of the plots directory for tools that rewrite files in place."""
+        target = self.workdir / name
+        if target.exists():
+            shutil.rmtree(target)
+        shutil.copytree(self.plots_dir, target)
+        return target
+
+
+@contextlib.contextmanager
+def _serving_plots(plots_dir):
+    """Point serology_plots at plots_dir inside the block only."""
+    import serology_plots
+    original = serology_plots._plots_dir
+    serology_plots._plots_dir = lambda: plots_dir
+    try:
+        yield
+    finally:
+        serology_plots._plots_dir = original
+
+
+# ---------------------------------------------------------------------------
+# Cases. Each returns a callable to time; code before the return is setup.
+# Equivalence with reference implementations is checked by the tests in tests/.
+# ---------------------------------------------------------------------------
+
+@case("export_figures", "rows")
+def _export_figures(w: Workload):
+    from export_plotly_json import export_figures
+    df3 = w.df3
+    return lambda: export_figures(df3, w.workdir / "out")
+
+
+@case("export_figures_preview", "rows")
+def _export_figures_preview(w: Workload):
+    """--preview 10000: the figures from a stratified sample."""
+    from export_plotly_json import PREVIEW_COLUMNS, export_figures
+    df3 = synthetic_data.make_df3(w.size, columns=PREVIEW_COLUMNS)
+    return lambda: export_figures(df3, w.workdir / "out_preview", preview=10_000)
+
+
+@case("export_figures_from_csv", "rows")
+def _export_figures_from_csv(w: Workload):
+    from export_plotly_json import export_figures_from_csv
+    csv_path = w.csv_path
+    return lambda: export_figures_from_csv(csv_path, w.workdir / "out_csv")
+
+
+@case("normalize_codes", "rows")
+def _normalize_codes(w: Workload):
+    from normalization import normalize_frame
+    df3 = w.df3
+    return lambda: normalize_frame(df3)
+
+
+@case("normalize_map", "rows")
+def _normalize_map(w: Workload):
+    """Reference: the former per-element series.map() normalization, over the same columns."""
+    from normalization import is_serostatus_column, is_yes_no_column
+    import pandas as pd
+    df3 = w.df3
+    columns = [c for c in df3.columns if is_serostatus_column(c) or is_yes_no_column(c)]
+    positive = {"1", "true", "t", "yes", "y", "seropositive", "positive", "pos", "+", "reactive"}
+    negative = {"0", "false", "f", "no", "n", "seronegative", "negative", "neg", "-", "non-reactive", "nonreactive"}
+
+    def norm(v):
+        if pd.isna(v):
+            return None
+        s = str(v).strip().lower()
+        if s in positive:
+            return "seropositive"
+        if s in negative:
+            return "seronegative"
+        return None
+
+    return lambda: {c: df3[c].map(norm) for c in columns}
+
+
+@case("derive_columns", "rows")
+def _derive_columns(w: Workload):
+    """Dose intervals, period keys of three date columns and harmonized age groups."""
+    from derive_columns import derive_frame
+    frame = synthetic_data.make_df3(w.size, columns=["X20_21_vacc_first_date", "X20_21_vacc_second_date",
+                                                     "s22_sampling_date_new", "age_22", "age_23", "birth_year"])
+    return lambda: derive_frame(frame)
+
+
+@case("aggregate_store_append", "rows")
+def _aggregate_store_append(w: Workload):
+    """Fold a fixed 10k-row batch into a store holding `size` rows and re-export; flat in `size`."""
+    from aggregate_store import append_batch, init_store
+    from export_plotly_json import REQUIRED_COLUMNS, SerologyAggregates, export_aggregates
+    store_path = w.workdir / "aggregate_store.json"
+    init_store(w.csv_path, store_path)
+    batch = synthetic_data.write_csv(w.workdir / "batch.csv", 10_000, seed=1, columns=REQUIRED_COLUMNS)
+
+    def run():
+        store, _, _ = append_batch(batch, store_path, force=True)
+        export_aggregates(SerologyAggregates.from_dict(store["aggregates"]), w.workdir / "out_store")
+    return run
+
+
+_SKETCH_COLUMNS = ["age_22", "X20_21_wohlbefinden_weight_new"]
+_SKETCH_STRATA = ["standort", "sex", "age_group_22_1"]
+_SKETCH_UNION = ["freiburg", "aachen", "magdeburg", "hannover"]
+
+
+@case("quantile_sketches_build", "rows")
+def _quantile_sketches_build(w: Workload):
+    """KLL sketches of two numeric columns, overall and per value of three strata."""
+    from quantile_sketches import build_sketches
+    frame = synthetic_data.make_df3(w.size, columns=_SKETCH_COLUMNS + _SKETCH_STRATA)
+    return lambda: build_sketches(frame, _SKETCH_COLUMNS, _SKETCH_STRATA)
+
+
+@case("box_stats_sketch_union", "rows")
+def _box_stats_sketch_union(w: Workload):
+    """Box statistics of four standorte by merging their sketches; compare box_stats_exact_sort."""
+    from quantile_sketches import build_sketches, union_sketch
+    frame = synthetic_data.make_df3(w.size, columns=_SKETCH_COLUMNS + _SKETCH_STRATA)
+    sketches = build_sketches(frame, _SKETCH_COLUMNS, _SKETCH_STRATA)
+    return lambda: [union_sketch(sketches, c, "standort", _SKETCH_UNION).box_stats() for c in _SKETCH_COLUMNS]
+
+
+@case("box_stats_exact_sort", "rows")
+def _box_stats_exact_sort(w: Workload):
+    """Reference: the same box statistics by filtering and sorting the values, as the browser does."""
+    import numpy as np
+    frame = synthetic_data.make_df3(w.size, columns=_SKETCH_COLUMNS + _SKETCH_STRATA)
+    selected = frame["standort"].isin(_SKETCH_UNION).to_numpy()
+    columns = [frame[c].to_numpy(dtype="float64") for c in _SKETCH_COLUMNS]
+
+    def run():
+        for values in columns:
+            values = np.sort(values[selected & ~np.isnan(values)])
+            np.quantile(values, [0.25, 0.5, 0.75])
+    return run
+
+
+@case("histogram_pyramid_build", "rows")
+def _histogram_pyramid_build(w: Workload):
+    """Base bin counts of two numeric columns, overall and split by standort."""
+    from histogram_pyramid import build_pyramid
+    frame = synthetic_data.make_df3(w.size, columns=_SKETCH_COLUMNS + ["standort"])
+    return lambda: build_pyramid(frame, _SKETCH_COLUMNS, by="standort")
+
+
+@case("histogram_from_pyramid", "rows")
+def _histogram_from_pyramid(w: Workload):
+    """30-bin histograms per standort by summing base bins; compare histogram_rebin_per_category."""
+    from histogram_pyramid import base_layout, build_pyramid, coarsen, targets
+    frame = synthetic_data.make_df3(w.size, columns=_SKETCH_COLUMNS + ["standort"])
+    pyramid = build_pyramid(frame, _SKETCH_COLUMNS, by="standort")
+    columns = [{**pyramid["ranges"][c], **pyramid["columns"][c], "discrete": base_layout(pyramid["ranges"][c])[2]}
+               for c in _SKETCH_COLUMNS]
+
+    def run():
+        for column in columns:
+            column_targets = targets(column, 30)
+            for counts in column["split"].values():
+                coarsen(counts, column_targets, 30)
+    return run
+
+
+@case("histogram_rebin_per_category", "rows")
+def _histogram_rebin_per_category(w: Workload):
+    """Reference: the dashboard's approach, filtering each category's values for every bin."""
+    import numpy as np
+    frame = synthetic_data.make_df3(w.size, columns=_SKETCH_COLUMNS + ["standort"])
+    categories = frame["standort"].fillna("(empty)").to_numpy()
+
+    def run():
+        for c in _SKETCH_COLUMNS:
+            values = frame[c].to_numpy(dtype="float64")
+            lo, hi = np.nanmin(values), np.nanmax(values)
+            width = (hi - lo) / 30
+            for category in np.unique(categories):
+                xs = values[(categories == category) & ~np.isnan(values)]
+                [((xs >= lo + i * width) & (xs < lo + (i + 1) * width)).sum() for i in range(30)]
+    return run
+
+
+def _wave_frame(n_rows):
+    from participation_index import ID_COLUMN, wave_columns
+    columns = [c for cs in wave_columns().values() for c in cs[:4]]
+    return synthetic_data.make_df3(n_rows, columns=[ID_COLUMN] + columns)
+
+
+@case("participation_index_build", "rows")
+def _participation_index_build(w: Workload):
+    """Participant x wave bitmask index from four columns per wave."""
+    from participation_index import ParticipationIndex
+    frame = _wave_frame(w.size)
+    return lambda: ParticipationIndex.from_frame(frame)
+
+
+@case("retention_from_index", "rows")
+def _retention_from_index(w: Workload):
+    """Wave counts, retention matrix and one cohort from the index; compare retention_from_columns."""
+    from participation_index import ParticipationIndex
+    index = ParticipationIndex.from_frame(_wave_frame(w.size))
+
+    def run():
+        index.participation_counts()
+        index.retention_matrix(normalize=True)
+        index.cohort(present=["s22", "s23"], absent=["w22"])
+    return run
+
+
+@case("retention_from_columns", "rows")
+def _retention_from_columns(w: Workload):
+    """Reference: the same queries recomputed from the wide wave columns."""
+    from participation_index import wave_columns
+    frame = _wave_frame(w.size)
+    waves = wave_columns(frame.columns)
+
+    def run():
+        present = {wave: frame[cs].notna().any(axis=1).to_numpy() for wave, cs in waves.items()}
+        {wave: int(p.sum()) for wave, p in present.items()}
+        [[int((present[a] & present[b]).sum()) for b in waves] for a in waves]
+        frame["merge_id"].to_numpy()[present["s22"] & present["s23"] & ~present["w22"]]
+    return run
+
+
+@case("zip_table_build", "rows")
+def _zip_table_build(w: Workload):
+    """Counts per zip code, then the suppressed 2/3/5-digit prefix table."""
+    from zip_aggregates import REQUIRED_COLUMNS, build_table, zip_counts
+    frame = synthetic_data.make_df3(w.size, columns=REQUIRED_COLUMNS)
+    return lambda: build_table(zip_counts(frame))
+
+
+@case("zip_prefix_scan", "rows")
+def _zip_prefix_scan(w: Workload):
+    """Reference: rows and seropositives of 100 3-digit prefixes by scanning the rows, as the search filter does."""
+    from normalization import POSITIVE, encode_serostatus
+    from zip_aggregates import REQUIRED_COLUMNS, SERO_COLUMN, ZIP_COLUMN
+    frame = synthetic_data.make_df3(w.size, columns=REQUIRED_COLUMNS)
+    zips = frame[ZIP_COLUMN].astype(str)
+    sero = encode_serostatus(frame[SERO_COLUMN])
+    prefixes = [f"{i:03d}" for i in range(0, 1000, 10)]
+
+    def run():
+        for prefix in prefixes:
+            rows = zips.str.startswith(prefix).to_numpy()
+            int(rows.sum()), int((sero[rows] == POSITIVE).sum())
+    return run
+
+
+@case("load_plot_json_from_html", "html")
+def _load_plot_json(w: Workload):
+    import serology_plots
+    path = w.plot_file
+
+    def run():
+        serology_plots.load_plot_json_from_html.cache_clear()
+        serology_plots.load_plot_json_from_html(path)
+    return run
+
+
+@case("load_plot_traces", "html")
+def _load_plot_traces(w: Workload):
+    """One of three traces via the (warm) byte-offset index, against the full decode above."""
+    import serology_plots
+    path = w.plot_file
+    serology_plots.trace_index(path)
+    return lambda: serology_plots.load_plot_traces(path, [1])
+
+
+@case("figure_overlay", "html")
+def _figure_overlay(w: Workload):
+    """Per-request responsive layout on the (warm) cached figure: a copy-on-write overlay of the frozen view."""
+    import serology_plots
+    fig = serology_plots.load_plot_json_from_html(w.plot_file)
+    return lambda: serology_plots.overlay(fig, {"layout": {"autosize": True, "width": None, "height": None}})
+
+
+@case("figure_deepcopy", "html")
+def _figure_deepcopy(w: Workload):
+    """Reference: the same layout change on a copy.deepcopy() of the cached figure, as a mutable cache needs."""
+    import copy
+    import serology_plots
+    fig = serology_plots.load_plot_json_from_html(w.plot_file)
+
+    def run():
+        copied = copy.deepcopy(fig)
+        copied["layout"].update(autosize=True, width=None, height=None)
+    return run
+
+
+@case("all_figures_stream", "html")
+def _all_figures_stream(w: Workload):
+    """The serology_plots --all output, streamed one figure at a time to a temporary file and renamed."""
+    import serology_plots
+    from json_stream import AtomicFile, iter_json_items
+    plots_dir = w.plots_dir
+
+    def run():
+        with _serving_plots(plots_dir), AtomicFile(w.workdir / "all_figures.json") as f:
+            f.write_chunks(iter_json_items(serology_plots.iter_all_figures_json(cached=False),
+                                           indent=2, ensure_ascii=False))
+    return run
+
+
+@case("all_figures_dumps", "html")
+def _all_figures_dumps(w: Workload):
+    """Reference: every figure in memory, then one json.dumps() string, as --all did before streaming."""
+    import serology_plots
+    plots_dir = w.plots_dir
+
+    def run():
+        serology_plots.load_plot_json_from_html.cache_clear()
+        with _serving_plots(plots_dir):
+            text = json.dumps(serology_plots.get_all_figures_json(), indent=2, ensure_ascii=False)
+        (w.workdir / "all_figures.json").write_text(text, encoding="utf-8")
+    return run
+
+
+@case("list_plots", "html")
+def _list_plots(w: Workload):
+    import serology_plots
+    plots_dir = w.plots_dir
+
+    def run():
+        serology_plots.load_plot_json_from_html.cache_clear()
+        with _serving_plots(plots_dir):
+            serology_plots.list_plots()
+    return run
+
+
+@case("generate_manifest_cold", "html")
+def _generate_manifest_cold(w: Workload):
+    from generate_plot_manifest import CACHE_FILENAME, generate_manifest
+    plots_dir = w.plots_dir
+    out = w.workdir / "manifest" / "manifest.json"
+
+    def run():
+        (out.parent / CACHE_FILENAME).unlink(missing_ok=True)
+        generate_manifest(plots_dir, out)
+    return run
+
+
+@case("generate_manifest_warm", "html")
+def _generate_manifest_warm(w: Workload):
+    from generate_plot_manifest import generate_manifest
+    plots_dir = w.plots_dir
+    out = w.workdir / "manifest_warm" / "manifest.json"
+    with contextlib.redirect_stdout(io.StringIO()):
+        generate_manifest(plots_dir, out)
+    return lambda: generate_manifest(plots_dir, out)
+
+
+@case("make_plots_responsive", "html")
+def _make_plots_responsive(w: Workload):
+    from make_plots_responsive import process_html_file
+    path = w.scratch_copy() / w.plot_file.name
+    return lambda: process_html_file(path)
+
+
+@case("rebuild_clean_html", "html")
+def _rebuild_clean_html(w: Workload):
+    from rebuild_clean_html import rebuild_html_file
+    path = w.scratch_copy() / w.plot_file.name
+    return lambda: rebuild_html_file(path)
+
+
+@case("add_postmessage_safely", "html")
+def _add_postmessage(w: Workload):
+    from add_postmessage_safely import process_file_safely
+    path = w.scratch_copy() / w.plot_file.name
+    return lambda: process_file_safely(path)
+
+
+@case("fix_syntax_errors", "html")
+def _fix_syntax_errors(w: Workload):
+    from fix_syntax_errors import fix_syntax_errors
+    plots_dir = w.scratch_copy()
+    return lambda: fix_syntax_errors(plots_dir)
+
+
+@case("wilson_ci", "strata")
+def _wilson_ci(w: Workload):
+    from confidence_intervals import wilson_interval
+    successes, totals = w.strata
+    return lambda: wilson_interval(successes, totals)
+
+
+@case("bootstrap_ci", "strata")
+def _bootstrap_ci(w: Workload):
+    from confidence_intervals import bootstrap_interval
+    successes, totals = w.strata
+    return lambda: bootstrap_interval(successes, totals, replicates=10_000)
+
+
+@case("bootstrap_ci_loop", "strata")
+def _bootstrap_ci_loop(w: Workload):
+    """Reference: one resampling call and percentile per stratum."""
+    import numpy as np
+    successes, totals = w.strata
+
+    def run():
+        rng = np.random.default_rng(0)
+        for k, n in zip(successes, totals):
+            draws = rng.binomial(n, k / n, size=10_000)
+            np.percentile(draws, [2.5, 97.5])
+    return run
+
+
+# ---------------------------------------------------------------------------
+
+def _time_case(fn_factory, workload, repeat):
+    with contextlib.redirect_stdout(io.StringIO()):
+        fn = fn_factory(workload)
+        timings = []
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - t0)
+    return timings
+
+
+def _git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=Path(__file__).resolve().parent, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(row_sizes, html_sizes, only=None, repeat=3, strata_sizes=()):
+    results = []
+    with tempfile.TemporaryDirectory(prefix="muspad-bench-") as tmp:
+        for kind, sizes in (("rows", row_sizes), ("html", html_sizes), ("strata", strata_sizes)):
+            names = [n for n, (k, _) in CASES.items() if k == kind and (not only or n in only)]
+            if not names:
+                continue
+            for size in sizes:
+                workdir = Path(tmp) / f"{kind}-{size}"
+                workdir.mkdir()
+                workload = Workload(kind, size, workdir)
+                for name in names:
+                    timings = _time_case(CASES[name][1], workload, repeat)
+                    row = {
+                        "case": name,
+                        "kind": kind,
+                        "size": size,
+                        "repeat": repeat,
+                        "seconds": timings,
+                        "best": min(timings),
+                        "median": statistics.median(timings),
+                    }
+                    results.append(row)
+                    print(f"{name:<28} {kind:>4} {size:>12,}  best {row['best']:.4f}s  median {row['median']:.4f}s")
+                shutil.rmtree(workdir, ignore_errors=True)
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "git": _git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "results": results,
+    }
+
+
+def compare(old_path, new_path):
+    """Print the median-time ratio new/old for every (case, size) present in both runs."""
+    old = {(r["case"], r["size"]): r for r in json.loads(Path(old_path).read_text())["results"]}
+    new = {(r["case"], r["size"]): r for r in json.loads(Path(new_path).read_text())["results"]}
+    print(f"{'case':<28} {'size':>12} {'old':>10} {'new':>10} {'ratio':>7}")
+    for key in sorted(old.keys() & new.keys()):
+        o, n = old[key]["median"], new[key]["median"]
+        print(f"{key[0]:<28} {key[1]:>12,} {o:>10.4f} {n:>10.4f} {n / o if o else float('inf'):>7.2f}")
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Benchmark export, extraction and manifest generation.")
+    parser.add_argument("--quick", action="store_true",
+                        help="Small sizes only (10k-100k rows, 100KB-1MB files, 100 strata)")
+    parser.add_argument("--rows", help="Comma-separated row counts, e.g. 10k,1M,10M")
+    parser.add_argument("--html-sizes", help="Comma-separated HTML file sizes, e.g. 100KB,10MB,200MB")
+    parser.add_argument("--strata", help="Comma-separated stratum counts for the CI cases, e.g. 100,1000")
+    parser.add_argument("--only", help="Comma-separated case names to run")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--out", default="bench_results.json", help="Where to write the JSON results")
+    parser.add_argument("--list", action="store_true", help="List the available cases")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="Compare two result files")
+    args = parser.parse_args()
+
+    if args.list:
+        for name, (kind, _) in CASES.items():
+            print(f"{name:<28} {kind}")
+    elif args.compare:
+        compare(*args.compare)
+    else:
+        rows = QUICK_ROW_SIZES if args.quick else ROW_SIZES
+        html = QUICK_HTML_SIZES if args.quick else HTML_SIZES
+        strata = QUICK_STRATA_SIZES if args.quick else STRATA_SIZES
+        if args.rows:
+            rows = [synthetic_data.parse_size(s) for s in args.rows.split(",")]
+        if args.html_sizes:
+            html = [synthetic_data.parse_size(s) for s in args.html_sizes.split(",")]
+        if args.strata:
+            strata = [synthetic_data.parse_size(s) for s in args.strata.split(",")]
+        only = set(args.only.split(",")) if args.only else None
+        report = run_benchmarks(rows, html, only=only, repeat=args.repeat, strata_sizes=strata)
+        Path(args.out).write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"Wrote {args.out}")
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Finalize generated dashboard assets by writing precompressed .gz siblings.
+
+Static hosts that support precompressed files (and any local server that looks
+for "<file>.gz") can then serve figure JSON, manifests, packed datasets and plot
+HTML without compressing them on every request. Files smaller than the size
+threshold are left alone, and a .gz that still matches its source is not
+rewritten: it carries the source's exact mtime, and its gzip trailer records
+the source size, so a source replaced by other content with an older or equal
+mtime (cp -p, tar, rsync -t, checking out an older revision) is recompressed
+unless it also has exactly the same size.
+
+Usage:
+    python3 compress_assets.py [dir ...] [--min-size BYTES]
+
+Default:
+    python3 compress_assets.py docs/assets/plots docs/plots docs/data --min-size 1024
+"""
+import gzip
+import os
+import struct
+from pathlib import Path
+
+DEFAULT_DIRS = ["docs/assets/plots", "docs/plots", "docs/data"]
+
+# Figure JSON and manifests, plot HTML, packed datasets and thumbnails
+COMPRESSIBLE_SUFFIXES = {".json", ".html", ".csv", ".bin", ".svg"}
+
+DEFAULT_MIN_SIZE = 1024
+
+
+def _gzip_bytes(data: bytes) -> bytes:
+    # mtime=0 keeps the output byte-identical across rebuilds of the same input
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def _iter_assets(dirs):
+    for d in dirs:
+        root = Path(d)
+        if not root.exists():
+            continue
+        for path in sorted(root.rglob("*")):
+            if path.is_file() and path.suffix.lower() in COMPRESSIBLE_SUFFIXES:
+                yield path
+
+
+def _gzip_source_size(gz_path: Path) -> int:
+    """Uncompressed size modulo 2**32, from the ISIZE field that ends every gzip member."""
+    with open(gz_path, "rb") as f:
+        f.seek(-4, os.SEEK_END)
+        return struct.unpack("<I", f.read(4))[0]
+
+
+def is_fresh(path: Path, gz_path: Path) -> bool:
+    """True if gz_path was written by compress_file() from the current content of path."""
+    try:
+        st, gz_st = path.stat(), gz_path.stat()
+        return gz_st.st_mtime_ns == st.st_mtime_ns and _gzip_source_size(gz_path) == st.st_size % 2**32
+    except OSError:
+        return False
+
+
+def compress_file(path: Path, min_size: int = DEFAULT_MIN_SIZE):
+    """
+    Write <path>.gz next to path if the file is at least min_size bytes.
+    Returns (original_bytes, compressed_bytes, status) where status is one of
+    "written", "up-to-date" or "skipped".
+    """
+    gz_path = path.with_name(path.name + ".gz")
+    st = path.stat()
+
+    if st.st_size < min_size:
+        if gz_path.exists():
+            gz_path.unlink()
+        return st.st_size, None, "skipped"
+
+    if is_fresh(path, gz_path):
+        return st.st_size, gz_path.stat().st_size, "up-to-date"
+
+    compressed = _gzip_bytes(path.read_bytes())
+    tmp_path = gz_path.with_name(gz_path.name + ".tmp")
+    tmp_path.write_bytes(compressed)
+    os.replace(tmp_path, gz_path)
+    # Stamp the sibling with the source mtime so the freshness check is exact
+    os.utime(gz_path, ns=(st.st_atime_ns, st.st_mtime_ns))
+    return st.st_size, len(compressed), "written"
+
+
+def remove_orphans(dirs) -> list:
+    """Delete .gz files whose source file no longer exists."""
+    removed = []
+    for d in dirs:
+        root = Path(d)
+        if not root.exists():
+            continue
+        for gz_path in root.rglob("*.gz"):
+            source = gz_path.with_name(gz_path.name[:-3])
+            if source.suffix.lower() in COMPRESSIBLE_SUFFIXES and not source.exists():
+                gz_path.unlink()
+                removed.append(gz_path)
+    return removed
+
+
+def compress_assets(dirs=None, min_size: int = DEFAULT_MIN_SIZE) -> list:
+    """Compress every eligible asset under dirs and print a size report."""
+    dirs = dirs or DEFAULT_DIRS
+    report = []
+    for path in _iter_assets(dirs):
+        original, compressed, status = compress_file(path, min_size)
+        report.append({"file": str(path), "original": original, "compressed": compressed, "status": status})
+
+    for gz_path in remove_orphans(dirs):
+        print(f"Removed orphaned {gz_path}")
+
+    if not report:
+        print(f"No assets found in {', '.join(str(d) for d in dirs)}")
+        return report
+
+    print(f"{'asset':<60} {'original':>12} {'gzip':>12} {'ratio':>7}  status")
+    total_original = total_compressed = 0
+    for row in report:
+        if row["compressed"] is None:
+            print(f"{row['file']:<60} {row['original']:>12,} {'-':>12} {'-':>7}  {row['status']}")
+            continue
+        total_original += row["original"]
+        total_compressed += row["compressed"]
+        ratio = row["compressed"] / row["original"] if row["original"] else 0.0
+        print(f"{row['file']:<60} {row['original']:>12,} {row['compressed']:>12,} {ratio:>7.1%}  {row['status']}")
+    if total_original:
+        print(f"{'total (compressed assets)':<60} {total_original:>12,} {total_compressed:>12,} "
+              f"{total_compressed / total_original:>7.1%}")
+    return report
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Write precompressed .gz siblings for dashboard assets.")
+    parser.add_argument("dirs", nargs="*", default=DEFAULT_DIRS, help="Asset directories to scan")
+    parser.add_argument("--min-size", type=int, default=DEFAULT_MIN_SIZE,
+                        help="Only compress files of at least this many bytes")
+    args = parser.parse_args()
+
+    compress_assets(args.dirs, args.min_size)
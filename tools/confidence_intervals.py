@@ -0,0 +1,119 @@
+"""
+Batch confidence intervals for proportions, computed for every stratum at once.
+
+Strata are given as parallel arrays of successes and totals (e.g. one entry per
+site x age group x wave, or per category of a multinomial). Wilson score intervals
+are closed-form; bootstrap intervals draw a (strata x replicates) binomial
+resampling matrix with NumPy and take percentiles along the replicate axis, so
+there is no Python loop over strata. The marginal of one category of a
+multinomial is binomial, so the same matrix serves multi-category strata: pass
+the category counts as successes and the stratum totals as totals.
+
+margin_of_error() gives the worst-case half-width for a sample of a given size,
+as shown on preview figures built from a stratified sample.
+
+All functions return percentages (0-100); strata with a total of 0 get NaN.
+"""
+from statistics import NormalDist
+
+import numpy as np
+
+DEFAULT_CONFIDENCE = 0.95
+DEFAULT_REPLICATES = 10_000
+METHODS = ("wilson", "bootstrap")
+
+# Upper bound on the resampling matrix (strata x replicates) held in memory at once
+# (32 MB of int64 draws); larger problems are processed in blocks of strata
+MAX_MATRIX_CELLS = 4_000_000
+
+
+def _as_arrays(successes, totals):
+    k = np.asarray(successes, dtype="float64")
+    n = np.asarray(totals, dtype="float64")
+    if k.shape != n.shape:
+        raise ValueError(f"successes and totals must have the same shape, got {k.shape} and {n.shape}")
+    if np.any(k < 0) or np.any(k > n):
+        raise ValueError("successes must lie between 0 and totals")
+    return k, n
+
+
+def wilson_interval(successes, totals, confidence=DEFAULT_CONFIDENCE):
+    """Wilson score interval per stratum. Returns (low, high) arrays in percent."""
+    k, n = _as_arrays(successes, totals)
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        p = k / n
+        denom = 1 + z * z / n
+        center = (p + z * z / (2 * n)) / denom
+        half = z * np.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denom
+    low = np.clip(center - half, 0, 1) * 100
+    high = np.clip(center + half, 0, 1) * 100
+    return low, high
+
+
+def bootstrap_interval(successes, totals, confidence=DEFAULT_CONFIDENCE,
+                       replicates=DEFAULT_REPLICATES, seed=0):
+    """
+    Percentile bootstrap interval per stratum from `replicates` binomial resamples.
+    Returns (low, high) arrays in percent. Seeded, so repeated exports are identical.
+    """
+    k, n = _as_arrays(successes, totals)
+    shape = k.shape
+    k, n = k.ravel(), n.ravel()
+    low = np.full(k.shape, np.nan)
+    high = np.full(k.shape, np.nan)
+    valid = np.flatnonzero(n > 0)
+
+    rng = np.random.default_rng(seed)
+    q = [50 - confidence * 50, 50 + confidence * 50]
+    block = max(1, MAX_MATRIX_CELLS // max(replicates, 1))
+    for start in range(0, valid.size, block):
+        idx = valid[start:start + block]
+        n_idx = n[idx].astype("int64")
+        # Strata-major (strata x replicates), so the percentiles run over contiguous rows
+        draws = rng.binomial(n_idx[:, None], (k[idx] / n[idx])[:, None], size=(idx.size, replicates))
+        lo, hi = np.percentile(draws, q, axis=1)
+        low[idx] = lo / n_idx * 100
+        high[idx] = hi / n_idx * 100
+    return low.reshape(shape), high.reshape(shape)
+
+
+def proportion_intervals(successes, totals, method="wilson", confidence=DEFAULT_CONFIDENCE,
+                         replicates=DEFAULT_REPLICATES, seed=0):
+    """Point estimate and interval per stratum: (percent, low, high) arrays."""
+    k, n = _as_arrays(successes, totals)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        percent = k / n * 100
+    if method == "wilson":
+        low, high = wilson_interval(k, n, confidence)
+    elif method == "bootstrap":
+        low, high = bootstrap_interval(k, n, confidence, replicates, seed)
+    else:
+        raise ValueError(f"Unknown interval method: {method!r} (expected one of {METHODS})")
+    return percent, low, high
+
+
+def error_bars(successes, totals, method="wilson", confidence=DEFAULT_CONFIDENCE,
+               replicates=DEFAULT_REPLICATES, seed=0):
+    """
+    Asymmetric error-bar lengths (plus, minus) in percentage points, as used by
+    Plotly's error_y.array / error_y.arrayminus. Empty strata get 0-length bars.
+    """
+    percent, low, high = proportion_intervals(successes, totals, method, confidence, replicates, seed)
+    plus = np.nan_to_num(np.maximum(high - percent, 0))
+    minus = np.nan_to_num(np.maximum(percent - low, 0))
+    return plus, minus
+
+
+def margin_of_error(totals, sampling_fraction=0.0, confidence=DEFAULT_CONFIDENCE):
+    """
+    Worst-case (p = 50%) margin of error in percentage points of a proportion
+    estimated from `totals` sampled rows, with the finite-population correction
+    for a sample that is `sampling_fraction` of the population. Proportionally
+    allocated stratified samples are at least this precise. Empty strata get NaN.
+    """
+    n = np.asarray(totals, dtype="float64")
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        moe = z * np.sqrt(0.25 / n * (1 - sampling_fraction)) * 100
+    return np.where(n > 0, moe, np.nan)
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Convert the saved Plotly HTML plots into standalone figure JSON files (in the
+figures/ subdirectory of out_dir, apart from the manifests) and merge
+manifest.json (HTML plots) and plotly_manifest.json (exported figures) into a
+single dashboard_manifest.json, so every chart can be rendered with one Plotly
+instance instead of an iframe per plot.
+
+Usage:
+    python3 convert_html_plots.py [out_dir] [plots_dir]
+
+Default:
+    python3 convert_html_plots.py docs/assets/plots docs/plots
+"""
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "python"))
+import serology_plots  # noqa: E402
+
+UNIFIED_MANIFEST = "dashboard_manifest.json"
+# Converted figures live here, so a plot named e.g. manifest.html cannot overwrite a manifest
+FIGURES_DIRNAME = "figures"
+
+
+def _dump_compact(fig) -> bytes:
+    return json.dumps(fig, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def _read_manifest(path: Path) -> dict:
+    if not path.exists():
+        return {"charts": []}
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except json.JSONDecodeError as e:
+        print(f"Warning: Ignoring unreadable manifest {path}: {e}")
+        return {"charts": []}
+
+
+def _write_if_changed(path: Path, content: bytes) -> bool:
+    """Write content unless path already holds exactly these bytes; returns True if written."""
+    try:
+        if path.stat().st_size == len(content) and path.read_bytes() == content:
+            return False
+    except FileNotFoundError:
+        pass
+    path.write_bytes(content)
+    return True
+
+
+def write_figure_json(fig, out_path: Path) -> dict:
+    """Write one figure (data, layout, config) as compact JSON and return its size and trace count."""
+    payload = {k: fig[k] for k in ("data", "layout", "config") if k in fig}
+    encoded = _dump_compact(payload)
+    _write_if_changed(out_path, encoded)
+    stats = serology_plots.figure_stats(payload)
+    return {"bytes": len(encoded), "traces": stats["traces"]}
+
+
+def _registry(out_path: Path, plots_path: Path) -> serology_plots.PlotRegistry:
+    """Plot registry of out_dir's manifest.json and the plots found in plots_dir."""
+    return serology_plots.PlotRegistry(manifest_path=out_path / "manifest.json", plots_dir=plots_path)
+
+
+def _html_charts(out_path: Path, plots_path: Path, registry: serology_plots.PlotRegistry) -> list:
+    """Every HTML chart listed in manifest.json or registered and present in plots_dir."""
+    html_charts = list(_read_manifest(out_path / "manifest.json").get("charts", []))
+    listed = {c.get("file") for c in html_charts}
+    for e in registry:
+        # The registry always knows the repo's own plots; another plots_dir need not have them
+        if e.filename not in listed and (plots_path / e.filename).exists():
+            html_charts.append({"id": e.key.replace("_", "-"), "title": e.fallback_title, "file": e.filename, "type": "html"})
+    return html_charts
+
+
+def _convert_chart(chart: dict, out_path: Path, plots_path: Path, registry: serology_plots.PlotRegistry):
+    """
+    Convert one HTML chart from plots_path to figures/<key>.json and return its unified
+    manifest entry (None if the file is missing or the chart has neither a key nor an id).
+    """
+    filename = chart.get("file", "")
+    registered = registry.by_filename(filename)
+    name = registered.key if registered else chart.get("id")
+    if not name:
+        print(f"  - Skipping {filename or chart!r}: chart has no key or id")
+        return None
+    title = chart.get("title") or (registered.fallback_title if registered else filename)
+    try:
+        fig = serology_plots.load_plot_json_from_html(plots_path / filename)
+    except FileNotFoundError:
+        print(f"  - Skipping {filename}: file not found")
+        return None
+    except Exception as e:
+        print(f"  ✗ Keeping {filename} as HTML: {e}")
+        return {
+            "id": chart.get("id"),
+            "title": title,
+            "file": f"../../plots/{filename}",
+            "type": "html",
+            "bytes": (plots_path / filename).stat().st_size,
+            "traces": None,
+        }
+
+    json_name = f"{FIGURES_DIRNAME}/{name}.json"
+    (out_path / FIGURES_DIRNAME).mkdir(exist_ok=True)
+    info = write_figure_json(fig, out_path / json_name)
+    print(f"  ✓ {filename} -> {json_name} ({info['bytes']} bytes, {info['traces']} traces)")
+    return {
+        "id": chart.get("id"),
+        "title": title,
+        "file": json_name,
+        "type": "json",
+        "source": f"plots/{filename}",
+        **info,
+    }
+
+
+def _file_stats(fig_path: Path) -> dict:
+    """Size and trace count of a figure JSON file as it is on disk (None where unreadable)."""
+    if not fig_path.exists():
+        return {"bytes": None, "traces": None}
+    try:
+        fig = json.loads(fig_path.read_text(encoding="utf-8"))
+        traces = serology_plots.figure_stats(fig)["traces"]
+    except json.JSONDecodeError as e:
+        print(f"Warning: Failed to read {fig_path}: {e}")
+        traces = None
+    return {"bytes": fig_path.stat().st_size, "traces": traces}
+
+
+def _figure_entries(out_path: Path) -> list:
+    """Unified manifest entries for the figures listed in plotly_manifest.json."""
+    entries = []
+    for chart in _read_manifest(out_path / "plotly_manifest.json").get("charts", []):
+        fig_path = out_path / chart["file"]
+        entry = dict(chart)
+        entry["type"] = "json"
+        entry.update(_file_stats(fig_path))
+        entries.append(entry)
+    return entries
+
+
+def _is_html_entry(entry: dict) -> bool:
+    if entry.get("type") == "html":
+        return str(entry.get("file", "")).startswith("../../plots/")
+    return str(entry.get("source", "")).startswith("plots/")
+
+
+def _entry_filename(entry: dict) -> str:
+    if entry.get("type") == "html":
+        return Path(entry["file"]).name
+    return Path(entry["source"]).name
+
+
+def _write_unified(out_path: Path, charts: list) -> dict:
+    manifest = {
+        "version": 1,
+        "basePath": "assets/plots/",
+        "charts": charts,
+    }
+    manifest_path = out_path / UNIFIED_MANIFEST
+    _write_if_changed(manifest_path, json.dumps(manifest, indent=2, ensure_ascii=False).encode("utf-8"))
+    print(f"Generated {manifest_path} with {len(charts)} charts")
+    return manifest
+
+
+def convert_html_plots(out_dir="docs/assets/plots", plots_dir="docs/plots"):
+    """
+    Write figures/<key>.json for every HTML plot and return the unified manifest dict.
+
+    Every chart listed in out_dir's manifest.json or found in plots_dir is parsed
+    from plots_dir (registered plots are named by their key, others by their id).
+    Charts that exist but cannot be parsed stay in the manifest as type "html".
+    """
+    out_path = Path(out_dir)
+    plots_path = Path(plots_dir)
+    out_path.mkdir(parents=True, exist_ok=True)
+
+    registry = _registry(out_path, plots_path)
+    charts = []
+    for chart in _html_charts(out_path, plots_path, registry):
+        entry = _convert_chart(chart, out_path, plots_path, registry)
+        if entry is not None:
+            charts.append(entry)
+
+    return _write_unified(out_path, charts + _figure_entries(out_path))
+
+
+def update_plots(filenames, out_dir="docs/assets/plots", plots_dir="docs/plots"):
+    """
+    Re-convert only the given HTML plots (base names) and patch their entries in
+    dashboard_manifest.json; entries of deleted plots are dropped. The exported
+    figure entries are refreshed from plotly_manifest.json. Falls back to a full
+    convert_html_plots() when there is no unified manifest yet.
+    """
+    out_path = Path(out_dir)
+    plots_path = Path(plots_dir)
+    manifest_path = out_path / UNIFIED_MANIFEST
+    if not manifest_path.exists():
+        return convert_html_plots(out_dir, plots_dir)
+
+    wanted = set(filenames)
+    registry = _registry(out_path, plots_path)
+    by_file = {c.get("file"): c for c in _html_charts(out_path, plots_path, registry)}
+    converted = {}
+    for filename in wanted:
+        chart = by_file.get(filename, {"id": Path(filename).stem.replace(" ", "-").lower(), "file": filename})
+        serology_plots.load_plot_json_from_html.cache_clear()
+        converted[filename] = _convert_chart(chart, out_path, plots_path, registry)
+
+    charts = []
+    for entry in _read_manifest(manifest_path).get("charts", []):
+        if not _is_html_entry(entry):
+            continue
+        filename = _entry_filename(entry)
+        if filename in converted:
+            entry = converted.pop(filename)
+        if entry is not None:
+            charts.append(entry)
+    charts.extend(e for e in converted.values() if e is not None)
+
+    return _write_unified(out_path, charts + _figure_entries(out_path))
+
+
+def refresh_figures(out_dir="docs/assets/plots"):
+    """
+    Rebuild the exported-figure entries of dashboard_manifest.json and refresh the size
+    and trace count of the converted plots in figures/, keeping the other HTML plot entries.
+    """
+    out_path = Path(out_dir)
+    html_entries = [e for e in _read_manifest(out_path / UNIFIED_MANIFEST).get("charts", []) if _is_html_entry(e)]
+    for entry in html_entries:
+        if entry.get("type") == "json":
+            entry.update(_file_stats(out_path / entry["file"]))
+    return _write_unified(out_path, html_entries + _figure_entries(out_path))
+
+
+if __name__ == "__main__":
+    out_dir = sys.argv[1] if len(sys.argv) > 1 else "docs/assets/plots"
+    plots_dir = sys.argv[2] if len(sys.argv) > 2 else "docs/plots"
+
+    convert_html_plots(out_dir, plots_dir)
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Materialize the derived columns the dashboard otherwise computes per row in the browser.
+
+- dose_interval_days         second minus first vaccination date, in days (what
+                             computeDoseIntervalDays() did after Papa.parse)
+- <date column>_week         Monday of the ISO week, "YYYY-MM-DD"
+- <date column>_month        "YYYY-MM"
+- <date column>_quarter      "Q1 2021"
+- <date column>_year         "2021"
+- age_group_harmonized       one age-group scheme (the age_group_22_1 bins) for every
+                             participant: age in 2022 from age_22, else age_23 - 1,
+                             else 2022 - birth_year
+
+The period keys use the label formats of binDates() in docs/index.html, which counts
+them directly instead of parsing every date. Dates go through pandas' vectorized
+ISO 8601 parser (other formats are re-parsed separately), are factorized by calendar
+day, and the keys are formatted once per distinct day and kept as categoricals, so
+the per-row cost is a few array operations. With --chunksize the CSV is streamed, so memory is bounded
+by the chunk size. The output replaces the file atomically when it is complete.
+
+Usage:
+    python3 derive_columns.py <df3.csv> [out.csv] [--chunksize N] [--date-columns a,b,...]
+"""
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from data_catalog import CATALOG_BY_NAME, DATA_CATALOG
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "python"))
+import tracing  # noqa: E402
+from tracing import span  # noqa: E402
+
+# Same candidates, in the same order, as computeDoseIntervalDays() in docs/index.html
+FIRST_DOSE_COLUMNS = ["X20_21_vacc_first_date", "vacc_first_date", "first_vaccination_date", "first_dose_date"]
+SECOND_DOSE_COLUMNS = ["X20_21_vacc_second_date", "vacc_second_date", "second_vaccination_date", "second_dose_date"]
+DOSE_INTERVAL_COLUMN = "dose_interval_days"
+
+PERIODS = ("week", "month", "quarter", "year")
+DATE_COLUMNS = [f["name"] for f in DATA_CATALOG if f["type"] == "date"]
+
+HARMONIZED_AGE_COLUMN = "age_group_harmonized"
+AGE_LABELS = CATALOG_BY_NAME["age_group_22_1"]["options"]  # 18-29, 30-39, ..., 80+
+AGE_BINS = [18, 30, 40, 50, 60, 70, 80, np.inf]
+AGE_REFERENCE_YEAR = 2022
+
+DEFAULT_CHUNKSIZE = 250_000
+
+
+def _parse_dates(values: pd.Series) -> np.ndarray:
+    """datetime64[ns] per row (NaT when missing or unparsable), naive timestamps read as UTC."""
+    # Vectorized ISO 8601 fast path; only values it rejects are re-parsed format by format
+    parsed = pd.to_datetime(values, errors="coerce", format="ISO8601", utc=True)
+    retry = parsed.isna() & values.notna()
+    if retry.any():
+        parsed[retry] = pd.to_datetime(values[retry].astype(str), errors="coerce", format="mixed", utc=True)
+    return parsed.dt.tz_localize(None).to_numpy(dtype="datetime64[ns]")
+
+
+def _factorize_days(values: pd.Series):
+    """
+    (codes, days): codes index the DatetimeIndex `days` of the distinct calendar days
+    of values (-1 where missing), so per-day work runs once per distinct day.
+    """
+    day_numbers = _parse_dates(values).astype("datetime64[D]")
+    codes, uniques = pd.factorize(day_numbers, use_na_sentinel=True)
+    return codes, pd.DatetimeIndex(uniques)
+
+
+def period_keys(days: pd.DatetimeIndex) -> dict:
+    """{period: list of keys} for the given (distinct, non-missing) days."""
+    years = days.year.astype(str)
+    return {
+        "week": list((days - pd.to_timedelta(days.dayofweek, unit="D")).strftime("%Y-%m-%d")),
+        "month": list(days.strftime("%Y-%m")),
+        "quarter": ["Q" + q + " " + y for q, y in zip(days.quarter.astype(str), years)],
+        "year": list(years),
+    }
+
+
+def _as_categorical(keys: list, codes: np.ndarray) -> pd.Categorical:
+    """Row values keys[codes] (missing where codes == -1) without materializing strings per row."""
+    categories, key_codes = np.unique(np.asarray(keys, dtype=object), return_inverse=True)
+    lookup = np.append(key_codes.astype("int64"), -1)
+    return pd.Categorical.from_codes(lookup[codes], categories=list(categories))
+
+
+def _dose_interval(df: pd.DataFrame):
+    first = next((c for c in FIRST_DOSE_COLUMNS if c in df.columns), None)
+    second = next((c for c in SECOND_DOSE_COLUMNS if c in df.columns), None)
+    if first is None or second is None:
+        return None
+    delta = (_parse_dates(df[second]) - _parse_dates(df[first])) / np.timedelta64(1, "D")
+    # Math.round in the browser rounds halves up
+    return pd.array(np.floor(delta + 0.5), dtype="Int64")
+
+
+def _harmonized_age_group(df: pd.DataFrame):
+    candidates = []
+    if "age_22" in df.columns:
+        candidates.append(pd.to_numeric(df["age_22"], errors="coerce"))
+    if "age_23" in df.columns:
+        candidates.append(pd.to_numeric(df["age_23"], errors="coerce") - 1)
+    if "birth_year" in df.columns:
+        candidates.append(AGE_REFERENCE_YEAR - pd.to_numeric(df["birth_year"], errors="coerce"))
+    if not candidates:
+        return None
+    age = candidates[0]
+    for fallback in candidates[1:]:
+        age = age.fillna(fallback)
+    return pd.cut(age, AGE_BINS, right=False, labels=AGE_LABELS)
+
+
+@contextmanager
+def _stage(name: str, timings: dict):
+    """Trace a stage as a span and add its wall time to timings[name]."""
+    start = time.perf_counter()
+    with span(f"derive_{name}"):
+        try:
+            yield
+        finally:
+            timings[name] = timings.get(name, 0.0) + time.perf_counter() - start
+
+
+def derive_frame(df: pd.DataFrame, date_columns=None, timings=None) -> pd.DataFrame:
+    """
+    Return the derived columns of df (same index). date_columns defaults to the
+    catalog's date columns present in df. Stage durations in seconds are added to
+    `timings` when a dict is given.
+    """
+    if date_columns is None:
+        date_columns = [c for c in DATE_COLUMNS if c in df.columns]
+    timings = {} if timings is None else timings
+    out = {}
+
+    with _stage("dose_interval", timings):
+        interval = _dose_interval(df)
+        if interval is not None:
+            out[DOSE_INTERVAL_COLUMN] = interval
+    with _stage("period_keys", timings):
+        for column in date_columns:
+            codes, days = _factorize_days(df[column])
+            for period, keys in period_keys(days).items():
+                out[f"{column}_{period}"] = _as_categorical(keys, codes)
+    with _stage("age_groups", timings):
+        groups = _harmonized_age_group(df)
+        if groups is not None:
+            out[HARMONIZED_AGE_COLUMN] = groups
+    return pd.DataFrame(out, index=df.index)
+
+
+def _append(df: pd.DataFrame, derived: pd.DataFrame) -> pd.DataFrame:
+    return pd.concat([df.drop(columns=[c for c in derived.columns if c in df.columns]), derived], axis=1)
+
+
+def derive_columns(df: pd.DataFrame, date_columns=None) -> pd.DataFrame:
+    """df with its derived columns appended (existing ones are recomputed)."""
+    return _append(df, derive_frame(df, date_columns))
+
+
+def derive_csv(csv_path, out_path=None, chunksize=None, date_columns=None) -> dict:
+    """
+    Add the derived columns to a df3 CSV (in place when out_path is None) and
+    return a report with row count, per-stage timings and throughput.
+    """
+    csv_path = Path(csv_path)
+    out_path = Path(out_path) if out_path else csv_path
+    tmp_path = out_path.with_name(f".{out_path.name}.tmp")
+    timings = {}
+    rows = 0
+    columns = []
+    start = time.perf_counter()
+    with span("derive_csv", path=str(csv_path), chunksize=chunksize):
+        try:
+            reader = pd.read_csv(csv_path, chunksize=chunksize or DEFAULT_CHUNKSIZE, low_memory=False)
+            for chunk in reader:
+                derived = derive_frame(chunk, date_columns, timings)
+                with _stage("write", timings):
+                    _append(chunk, derived).to_csv(tmp_path, mode="a" if rows else "w", header=not rows, index=False)
+                rows += len(chunk)
+                columns = list(derived.columns)
+            os.replace(tmp_path, out_path)
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
+    seconds = time.perf_counter() - start
+    return {
+        "input": str(csv_path),
+        "output": str(out_path),
+        "rows": rows,
+        "derived_columns": columns,
+        "seconds": round(seconds, 3),
+        "rows_per_second": round(rows / seconds) if seconds else None,
+        "stages": {k: round(v, 3) for k, v in timings.items()},
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Materialize dose intervals, period keys and age groups in a df3 CSV.")
+    parser.add_argument("csv_path", help="Path to the df3 CSV")
+    parser.add_argument("out_path", nargs="?", default=None, help="Output CSV (default: rewrite csv_path)")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE, help="Rows per chunk")
+    parser.add_argument("--date-columns", default=None,
+                        help="Comma-separated date columns to derive period keys for (default: catalog date columns)")
+    parser.add_argument("--trace", metavar="PATH",
+                        help="Write Chrome trace-event JSON with per-stage timings and peak memory to PATH")
+    args = parser.parse_args()
+
+    if args.trace:
+        tracing.enable(args.trace)
+
+    date_columns = args.date_columns.split(",") if args.date_columns else None
+    print(json.dumps(derive_csv(args.csv_path, args.out_path, args.chunksize, date_columns), indent=2))
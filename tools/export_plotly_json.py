@@ -1,52 +1,257 @@
 from __future__ import annotations
 import os
+from collections import Counter
+from dataclasses import dataclass, field
 from pathlib import Path
 import json
+import sys
+import numpy as np
 import pandas as pd
 import plotly.express as px
 
+from confidence_intervals import DEFAULT_REPLICATES, METHODS as CI_METHODS, error_bars, margin_of_error
+from figure_compaction import round_floats
+from hashed_assets import DEFAULT_RETAIN, collect_garbage, publish_written
+from normalization import MISSING, N_CODES, NEGATIVE, POSITIVE, normalize_frame
+from stratified_sample import sample_indices, stratum_codes
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "python"))
+import tracing  # noqa: E402
+from json_stream import AtomicFile, iter_json  # noqa: E402
+from tracing import span  # noqa: E402
+
 DATASET_TAG = "X20_21"  # Fixed per request
 
+SERO_COLUMN = "X20_21_serostatus"
+VACC_FIRST_COLUMN = "X20_21_kurzfragen_cov19_vaccination_first_yn"
+VACC_SECOND_COLUMN = "X20_21_kurzfragen_cov19_vaccination_second_yn"
+BRAND_COLUMN = "X20_21_kurzfragen_cov19_vaccination_first_type"
+AGE_GROUP_COLUMN = "age_group_22_1"
+SERO_WAVES = ["X20_21_serostatus", "s22_nc_qualitative", "s23_nc_qualitative"]
+
+# Every column the figures read; streaming mode loads only these
+REQUIRED_COLUMNS = [SERO_COLUMN, VACC_FIRST_COLUMN, VACC_SECOND_COLUMN, BRAND_COLUMN, AGE_GROUP_COLUMN, *SERO_WAVES[1:]]
+
+# Columns counted by their normalization code
+CODE_COLUMNS = [*SERO_WAVES, VACC_FIRST_COLUMN, VACC_SECOND_COLUMN]
+
+DEFAULT_CHUNKSIZE = 250_000
+
+# --preview strata, together with the pattern of SERO_WAVES each participant has a status in
+PREVIEW_STRATA = ["standort", AGE_GROUP_COLUMN]
+PREVIEW_COLUMNS = [*REQUIRED_COLUMNS, "standort"]
+
+def _add_error_columns(df: pd.DataFrame, successes, totals, ci: str | None, replicates: int) -> dict:
+    """
+    Add ci_plus/ci_minus interval columns to df and return the matching px.bar
+    error_y keyword arguments (empty when ci is None, leaving the figure unchanged).
+    """
+    if not ci:
+        return {}
+    with span("confidence_intervals", method=ci, strata=len(df), replicates=replicates):
+        plus, minus = error_bars(successes, totals, method=ci, replicates=replicates)
+    df["ci_plus"] = plus
+    df["ci_minus"] = minus
+    return {"error_y": "ci_plus", "error_y_minus": "ci_minus"}
+
 def _ensure_out_dir(out_dir: str | os.PathLike) -> Path:
     out_path = Path(out_dir)
     out_path.mkdir(parents=True, exist_ok=True)
     return out_path
 
-def _normalize_serostatus(series: pd.Series) -> pd.Series:
+def _write_asset(out_path: Path, filename: str, chunks, hashed: bool, retain: int):
     """
-    Map raw serostatus values into exactly two labels:
-    - 'seropositive'
-    - 'seronegative'
-    Drop anything unmapped or NaN.
+    Stream text chunks to out_path/filename, or under its content-hashed name when
+    hashed=True. The chunks go to a temporary file that atomically replaces the
+    target once complete. A file that already holds exactly this text is left
+    untouched, so its mtime (and any precompressed .gz or watcher downstream) only
+    changes when the content does. Returns (path, bytes written).
     """
-    def norm(v):
-        if pd.isna(v):
-            return None
-        s = str(v).strip().lower()
-        if s in {"1", "true", "t", "yes", "y", "seropositive", "positive", "pos", "+", "reactive"}:
-            return "seropositive"
-        if s in {"0", "false", "f", "no", "n", "seronegative", "negative", "neg", "-", "non-reactive", "nonreactive"}:
-            return "seronegative"
-        if s in {"seropositive", "seronegative"}:
-            return s
-        return None
-
-    mapped = series.map(norm).dropna()
-    cat = pd.Categorical(mapped, categories=["seronegative", "seropositive"], ordered=True)
-    return pd.Series(cat, index=mapped.index)
-
-def _compute_seroprevalence_fig(df3: pd.DataFrame):
+    with AtomicFile(out_path / filename, only_if_changed=not hashed) as f:
+        f.write_chunks(chunks)
+        if hashed:
+            name = publish_written(out_path, filename, f)
+    if not hashed:
+        return f.path, f.bytes
+    collect_garbage(out_path, filename, retain)
+    return out_path / name, f.bytes
+
+def _serialize_figure(fig, precision: int | None):
+    """
+    JSON text chunks of one figure; with precision, floats are rounded (see
+    figure_compaction). Returns (chunks, full_precision_bytes) where
+    full_precision_bytes is the size of the figure without rounding.
+    """
+    text = fig.to_json()
+    full_precision_bytes = len(text.encode("utf-8"))
+    if precision is None:
+        return [text], full_precision_bytes
+    with span("compact"):
+        fig_dict = json.loads(text)
+        del text
+        fig_dict = round_floats(fig_dict, precision)
+    # Same text as dumps_compact(fig_dict), encoded while it is written
+    return iter_json(fig_dict, separators=(",", ":"), ensure_ascii=False), full_precision_bytes
+
+@dataclass
+class SerologyAggregates:
+    """
+    Mergeable partial aggregates behind the four serology figures.
+
+    Every field is a count, so aggregates of disjoint row sets (e.g. CSV chunks)
+    combine with merge() into exactly the aggregates of their union, and the
+    figures built from them match the in-memory result. Serostatus and yes/no
+    values are counted by their normalization code (normalization.NEGATIVE,
+    POSITIVE or OTHER), so every wave is keyed the same way.
+    """
+    sero_counts: Counter = field(default_factory=Counter)  # serostatus code -> rows
+    n1_valid: int = 0
+    n1_yes: int = 0
+    n2_valid: int = 0
+    n2_yes: int = 0
+    brand_counts: Counter = field(default_factory=Counter)  # first-dose brand -> rows
+    wave_age_status: Counter = field(default_factory=Counter)  # (wave, age_group, status code) -> rows
+
+    @classmethod
+    def from_frame(cls, df3: pd.DataFrame, codes: pd.DataFrame | None = None) -> "SerologyAggregates":
+        """
+        Aggregate df3. `codes` may hold precomputed normalization codes of CODE_COLUMNS
+        for the same rows (e.g. a masked slice of normalize_frame(df3, CODE_COLUMNS)).
+        Absent columns count as missing, so a batch carrying only some columns (e.g.
+        one newly merged wave) aggregates to its share of the full table.
+        """
+        with span("aggregate", rows=len(df3)):
+            with span("normalize"):
+                if codes is None:
+                    codes = normalize_frame(df3, [c for c in CODE_COLUMNS if c in df3.columns])
+                missing = np.full(len(df3), MISSING, dtype=np.int8)
+
+                def code_values(column):
+                    return codes[column].to_numpy() if column in codes.columns else missing
+
+                first = code_values(VACC_FIRST_COLUMN)
+                second = code_values(VACC_SECOND_COLUMN)
+
+            with span("wave_age_counts"):
+                # One bincount per wave over age_index * N_CODES + status code
+                if AGE_GROUP_COLUMN in df3.columns:
+                    age_index, age_labels = pd.factorize(df3[AGE_GROUP_COLUMN], use_na_sentinel=True)
+                else:
+                    age_index, age_labels = np.full(len(df3), -1, dtype=np.intp), []
+                wave_age_status = Counter()
+                for wave in SERO_WAVES:
+                    status = code_values(wave)
+                    keep = (age_index >= 0) & (status != MISSING)
+                    counts = np.bincount(age_index[keep] * N_CODES + status[keep],
+                                         minlength=len(age_labels) * N_CODES)
+                    for flat in np.flatnonzero(counts):
+                        age, code = divmod(int(flat), N_CODES)
+                        wave_age_status[(wave, age_labels[age], code)] = int(counts[flat])
+
+            with span("value_counts"):
+                sero = code_values(SERO_COLUMN)
+                sero_counts = Counter({code: int(n) for code, n in enumerate(np.bincount(sero[sero != MISSING],
+                                                                                           minlength=N_CODES)) if n})
+                brand_counts = Counter(df3[BRAND_COLUMN].value_counts(sort=False).to_dict()
+                                       if BRAND_COLUMN in df3.columns else {})
+
+        return cls(
+            sero_counts=sero_counts,
+            n1_valid=int((first != MISSING).sum()),
+            n1_yes=int((first == POSITIVE).sum()),
+            n2_valid=int((second != MISSING).sum()),
+            n2_yes=int((second == POSITIVE).sum()),
+            brand_counts=brand_counts,
+            wave_age_status=wave_age_status,
+        )
+
+    def merge(self, other: "SerologyAggregates") -> "SerologyAggregates":
+        """Fold other into self in place and return self."""
+        self.sero_counts.update(other.sero_counts)
+        self.n1_valid += other.n1_valid
+        self.n1_yes += other.n1_yes
+        self.n2_valid += other.n2_valid
+        self.n2_yes += other.n2_yes
+        self.brand_counts.update(other.brand_counts)
+        self.wave_age_status.update(other.wave_age_status)
+        return self
+
+    def to_dict(self) -> dict:
+        """
+        JSON-serializable form: the scalar counts plus each Counter as a sorted list of
+        [key..., count] rows, so keys keep their types (codes, brands, age labels).
+        """
+        def rows(counter, key_parts):
+            items = [[*(v.item() if isinstance(v, np.generic) else v for v in (key if key_parts > 1 else (key,))),
+                      int(n)] for key, n in counter.items() if n]
+            return sorted(items, key=lambda row: [str(v) for v in row[:-1]])
+
+        return {
+            "sero_counts": rows(self.sero_counts, 1),
+            "n1_valid": self.n1_valid,
+            "n1_yes": self.n1_yes,
+            "n2_valid": self.n2_valid,
+            "n2_yes": self.n2_yes,
+            "brand_counts": rows(self.brand_counts, 1),
+            "wave_age_status": rows(self.wave_age_status, 3),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "SerologyAggregates":
+        """Inverse of to_dict()."""
+        return cls(
+            sero_counts=Counter({key: n for key, n in data["sero_counts"]}),
+            n1_valid=data["n1_valid"],
+            n1_yes=data["n1_yes"],
+            n2_valid=data["n2_valid"],
+            n2_yes=data["n2_yes"],
+            brand_counts=Counter({key: n for key, n in data["brand_counts"]}),
+            wave_age_status=Counter({(wave, age, code): n for wave, age, code, n in data["wave_age_status"]}),
+        )
+
+def aggregate_csv(csv_path: str | os.PathLike, chunksize: int = DEFAULT_CHUNKSIZE) -> SerologyAggregates:
+    """
+    Stream csv_path in chunks of `chunksize` rows, reading only REQUIRED_COLUMNS,
+    and return the merged aggregates. Peak memory is bounded by the chunk size.
+    """
+    agg = SerologyAggregates()
+    with span("aggregate_csv", path=str(csv_path), chunksize=chunksize):
+        reader = pd.read_csv(csv_path, usecols=lambda c: c in REQUIRED_COLUMNS, chunksize=chunksize)
+        while True:
+            with span("read_csv_chunk"):
+                chunk = next(reader, None)
+            if chunk is None:
+                break
+            agg.merge(SerologyAggregates.from_frame(chunk))
+    return agg
+
+def _aggregates(data: pd.DataFrame | SerologyAggregates) -> SerologyAggregates:
+    """
+    Aggregates for the _compute_*_fig wrappers: precomputed ones are used as they are,
+    so a caller building several figures aggregates df3 once instead of once per figure.
+    """
+    return data if isinstance(data, SerologyAggregates) else SerologyAggregates.from_frame(data)
+
+def _compute_seroprevalence_fig(df3: pd.DataFrame | SerologyAggregates):
+    return _build_seroprevalence_fig(_aggregates(df3))
+
+def _build_seroprevalence_fig(agg: SerologyAggregates, ci: str | None = None,
+                              replicates: int = DEFAULT_REPLICATES):
     px.defaults.width = 800
     px.defaults.height = 500
 
-    # Use value_counts(normalize=True) on the raw column directly, then reorder
-    sero_counts = df3["X20_21_serostatus"].value_counts(normalize=True) * 100
-    
+    # Share of each serostatus code among non-missing rows, then reorder
+    total = sum(agg.sero_counts.values())
+    sero_counts = {k: v / total * 100 for k, v in agg.sero_counts.items()} if total else {}
+
     # Create dataframe with proper ordering: seronegative first, then seropositive
     sero_df = pd.DataFrame({
         "serostatus": ["seronegative", "seropositive"],
-        "percent": [sero_counts.get("seronegative", 0), sero_counts.get("seropositive", 0)]
+        "percent": [sero_counts.get(NEGATIVE, 0), sero_counts.get(POSITIVE, 0)]
     })
+    error_kwargs = _add_error_columns(
+        sero_df, [agg.sero_counts.get(NEGATIVE, 0), agg.sero_counts.get(POSITIVE, 0)],
+        [total, total], ci, replicates)
 
     base_title = "COVID-19 Seroprevalence (%)"
     title = f"{base_title} ({DATASET_TAG})"
@@ -57,6 +262,7 @@ def _compute_seroprevalence_fig(df3: pd.DataFrame):
         title=title,
         labels={"serostatus": "Serostatus", "percent": "Percent of Participants"},
         text="percent",
+        **error_kwargs,
     )
     
     # Manually set colors after creation
@@ -70,22 +276,24 @@ def _compute_seroprevalence_fig(df3: pd.DataFrame):
     fig_sero.update_layout(yaxis_range=[0, 100], margin=dict(t=50, b=50, l=50, r=50))
     return fig_sero
 
-def _compute_vaccination_fig(df3: pd.DataFrame):
+def _compute_vaccination_fig(df3: pd.DataFrame | SerologyAggregates):
+    return _build_vaccination_fig(_aggregates(df3))
+
+def _build_vaccination_fig(agg: SerologyAggregates, ci: str | None = None,
+                           replicates: int = DEFAULT_REPLICATES):
     px.defaults.width = 800
     px.defaults.height = 500
 
-    first_numeric = pd.to_numeric(df3["X20_21_kurzfragen_cov19_vaccination_first_yn"], errors="coerce")
-    second_numeric = pd.to_numeric(df3["X20_21_kurzfragen_cov19_vaccination_second_yn"], errors="coerce")
-
-    n1_valid = first_numeric.notna().sum()
-    n1_yes = (first_numeric == 1).sum()
+    n1_valid = agg.n1_valid
+    n1_yes = agg.n1_yes
     first_rate = (n1_yes / n1_valid * 100.0) if n1_valid > 0 else 0.0
 
-    n2_valid = second_numeric.notna().sum()
-    n2_yes = (second_numeric == 1).sum()
+    n2_valid = agg.n2_valid
+    n2_yes = agg.n2_yes
     second_rate = (n2_yes / n2_valid * 100.0) if n2_valid > 0 else 0.0
 
     vac_df = pd.DataFrame({"dose": ["First Dose", "Second Dose"], "percent": [first_rate, second_rate]})
+    error_kwargs = _add_error_columns(vac_df, [n1_yes, n2_yes], [n1_valid, n2_valid], ci, replicates)
 
     base_title = "COVID-19 Vaccination Coverage (%)"
     title = f"{base_title} ({DATASET_TAG})"
@@ -96,6 +304,7 @@ def _compute_vaccination_fig(df3: pd.DataFrame):
         title=title,
         labels={"dose": "Dose", "percent": "Percent of Participants"},
         text="percent",
+        **error_kwargs,
     )
     
     # Manually set colors after creation
@@ -113,19 +322,26 @@ def _compute_vaccination_fig(df3: pd.DataFrame):
         "first_rate": float(first_rate), "second_rate": float(second_rate),
     }
 
-def _compute_vaccine_brand_mix_fig(df3: pd.DataFrame):
+def _compute_vaccine_brand_mix_fig(df3: pd.DataFrame | SerologyAggregates):
+    return _build_vaccine_brand_mix_fig(_aggregates(df3))
+
+def _build_vaccine_brand_mix_fig(agg: SerologyAggregates, ci: str | None = None,
+                                 replicates: int = DEFAULT_REPLICATES):
     px.defaults.width = 800
     px.defaults.height = 600
 
-    # Use value_counts(normalize=True) to compute brand proportions
-    brand_counts = df3['X20_21_kurzfragen_cov19_vaccination_first_type'].value_counts(normalize=True)
-    
+    # Brand proportions, most frequent first (ties by name so chunked and in-memory runs agree)
+    total = sum(agg.brand_counts.values())
+    ordered = sorted(agg.brand_counts.items(), key=lambda kv: (-kv[1], str(kv[0])))
+    proportions = pd.Series([v / total for _, v in ordered] if total else [], dtype="float64")
+
     # Build a DataFrame with columns: brand, proportion, percent
     brand_df = pd.DataFrame({
-        'brand': brand_counts.index,
-        'proportion': brand_counts.values,
-        'percent': brand_counts.values * 100
+        'brand': [k for k, _ in ordered],
+        'proportion': proportions.values,
+        'percent': proportions.values * 100
     })
+    error_kwargs = _add_error_columns(brand_df, [v for _, v in ordered], [total] * len(ordered), ci, replicates)
 
     # Plot with px.bar
     fig_brand = px.bar(
@@ -134,7 +350,8 @@ def _compute_vaccine_brand_mix_fig(df3: pd.DataFrame):
         y='percent',
         title='COVID-19 Vaccine Brand Distribution (%)',
         labels={'brand': 'Vaccine Brand', 'percent': 'Percent of Participants'},
-        text='percent'
+        text='percent',
+        **error_kwargs
     )
     
     # Update traces with formatting
@@ -152,38 +369,31 @@ def _compute_vaccine_brand_mix_fig(df3: pd.DataFrame):
     
     return fig_brand
 
-def _compute_seroprevalence_by_age_waves_fig(df3: pd.DataFrame):
+def _compute_seroprevalence_by_age_waves_fig(df3: pd.DataFrame | SerologyAggregates):
+    return _build_seroprevalence_by_age_waves_fig(_aggregates(df3))
+
+def _build_seroprevalence_by_age_waves_fig(agg: SerologyAggregates, ci: str | None = None,
+                                           replicates: int = DEFAULT_REPLICATES):
     px.defaults.width = 1200
     px.defaults.height = 800
     
     # Define waves
-    waves = ['X20_21_serostatus', 's22_nc_qualitative', 's23_nc_qualitative']
-    
-    # Age group column mapping for all waves to 'age_group_22_1' (as provided)
-    age_column_mapping = {
-        'X20_21_serostatus': 'age_group_22_1',
-        's22_nc_qualitative': 'age_group_22_1', 
-        's23_nc_qualitative': 'age_group_22_1'
-    }
-    
-    # Melt df3 into long form with id_vars age column(s) and value_vars waves; dropna on sero flag
-    long_df = pd.melt(df3, 
-                      id_vars=['age_group_22_1'], 
-                      value_vars=waves,
-                      var_name='wave', 
-                      value_name='status')
+    waves = SERO_WAVES
     
-    # Drop rows with missing status values
-    long_df = long_df.dropna(subset=['status'])
-    
-    # Attach correct age_group per row using the mapping (already using age_group_22_1)
-    long_df['age_group'] = long_df['age_group_22_1']
-    
-    # Drop rows with missing age groups
-    long_df = long_df.dropna(subset=['age_group'])
+    # Rows counted per (wave, age_group, status); missing statuses and age groups were dropped
+    # when aggregating, and every wave uses 'age_group_22_1'
+    keys = list(agg.wave_age_status.keys())
+    long_df = pd.DataFrame({
+        'wave': [k[0] for k in keys],
+        'age_group': [k[1] for k in keys],
+        'status': [k[2] for k in keys],
+        'count': list(agg.wave_age_status.values()),
+    })
     
     # Crosstab normalize by (wave, age_group) to get percentages per status
-    crosstab_result = pd.crosstab([long_df['wave'], long_df['age_group']], long_df['status'], normalize='index') * 100
+    count_result = pd.crosstab([long_df['wave'], long_df['age_group']], long_df['status'],
+                               values=long_df['count'], aggfunc='sum').fillna(0)
+    crosstab_result = count_result.div(count_result.sum(axis=1), axis=0) * 100
     
     # Reshape to long with columns wave, age_group, status, percent
     percent_df = crosstab_result.reset_index()
@@ -191,15 +401,18 @@ def _compute_seroprevalence_by_age_waves_fig(df3: pd.DataFrame):
                         id_vars=['wave', 'age_group'], 
                         var_name='status', 
                         value_name='percent')
+
+    # Intervals per (wave, age_group, status) cell; melt keeps the same row order for the counts
+    count_df = pd.melt(count_result.reset_index(), id_vars=['wave', 'age_group'],
+                       var_name='status', value_name='count')
+    error_kwargs = _add_error_columns(
+        percent_df, count_df['count'].to_numpy(),
+        count_df.groupby(['wave', 'age_group'])['count'].transform('sum').to_numpy(), ci, replicates)
     
-    # Relabel status: {0:'Negative',1:'Positive','seronegative':'Negative','seropositive':'Positive'}
-    status_mapping = {
-        0: 'Negative', '0': 'Negative', 0.0: 'Negative', '0.0': 'Negative',
-        1: 'Positive', '1': 'Positive', 1.0: 'Positive', '1.0': 'Positive',
-        'seronegative': 'Negative', 
-        'seropositive': 'Positive'
-    }
-    percent_df['status'] = percent_df['status'].map(status_mapping)
+    # Relabel status codes; values outside the vocabulary count towards the
+    # denominators above but get no bar of their own
+    percent_df['status'] = percent_df['status'].map({NEGATIVE: 'Negative', POSITIVE: 'Positive'})
+    percent_df = percent_df.dropna(subset=['status'])
     
     # Define age group order
     age_groups = ['18-29', '30-39', '40-49', '50-59', '60-69', '70-79', '80+']
@@ -222,7 +435,8 @@ def _compute_seroprevalence_by_age_waves_fig(df3: pd.DataFrame):
             'status': 'Serostatus',
             'wave': 'Wave'
         },
-        title='Seroprevalence by Age Group Across Waves'
+        title='Seroprevalence by Age Group Across Waves',
+        **error_kwargs
     )
     
     # Update layout
@@ -233,36 +447,158 @@ def _compute_seroprevalence_by_age_waves_fig(df3: pd.DataFrame):
     
     return fig_sero_age
 
-def export_figures(df3: pd.DataFrame, out_dir: str = "docs/assets/plots") -> dict:
+def preview_sample(df3: pd.DataFrame, n: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Stratified sample of n rows of df3 for --preview (see stratified_sample.py).
+    Strata are the set of SERO_WAVES a participant has a value in x standort x age
+    group, so the sample keeps each wave's, site's and age group's share of df3.
+    """
+    if n <= 0:
+        raise ValueError(f"The preview sample needs a positive number of rows, got {n}")
+    with span("preview_sample", rows=len(df3), sample=n):
+        waves = np.zeros(len(df3), dtype=np.int64)
+        for bit, wave in enumerate(SERO_WAVES):
+            if wave in df3.columns:
+                waves |= df3[wave].notna().to_numpy().astype(np.int64) << bit
+        strata, _ = stratum_codes([waves, *(df3[c] for c in PREVIEW_STRATA if c in df3.columns)])
+        return df3.iloc[sample_indices(strata, n, seed)]
+
+def _preview_bases(agg: SerologyAggregates) -> dict:
+    """The participant counts behind each figure's percentages, per figure."""
+    cells = Counter()
+    for (wave, age, _), count in agg.wave_age_status.items():
+        cells[(wave, age)] += count
+    return {
+        "serology_seroprevalence.json": [sum(agg.sero_counts.values())],
+        "vaccination_coverage.json": [agg.n1_valid, agg.n2_valid],
+        "vaccine_brand_distribution.json": [sum(agg.brand_counts.values())],
+        "seroprevalence_age_waves.json": list(cells.values()),
+    }
+
+def _annotate_preview(figures: dict, agg: SerologyAggregates, rows: int, sample: int) -> dict:
+    """
+    Label every figure as a preview with n, the smallest count behind one of its
+    percentages, and the worst-case 95% margin of error of that percentage.
+    Returns {filename: {"n", "margin_of_error"}}.
+    """
+    fraction = sample / rows if rows else 1.0
+    margins = {}
+    for filename, bases in _preview_bases(agg).items():
+        n = min(bases, default=0)
+        moe = float(margin_of_error(n, fraction))
+        figures[filename].add_annotation(
+            text=f"Preview: n = {n:,} · ±{moe:.1f} pp (95%) · {sample:,} of {rows:,} rows sampled",
+            xref="paper", yref="paper", x=1, y=1, xanchor="right", yanchor="bottom", yshift=24,
+            showarrow=False, font=dict(size=11, color="#888888"))
+        margins[filename] = {"n": int(n), "margin_of_error": round(moe, 2)}
+    return margins
+
+def export_figures(df3: pd.DataFrame, out_dir: str = "docs/assets/plots",
+                   hashed: bool = False, retain: int = DEFAULT_RETAIN,
+                   ci: str | None = None, replicates: int = DEFAULT_REPLICATES,
+                   precision: int | None = None, preview: int | None = None, seed: int = 0) -> dict:
+    """
+    Export the four serology figures as Plotly JSON plus plotly_manifest.json.
+    With hashed=True each figure is published under a content-hashed filename
+    (e.g. serology_seroprevalence.<hash>.json) that the manifest points to, and
+    all but the `retain` newest hashed versions of each figure are deleted.
+    ci="wilson" or ci="bootstrap" adds 95% interval error bars (error_y) to every
+    bar; bootstrap intervals use `replicates` resamples per stratum.
+    precision=N rounds float payloads to N decimals. The returned "sizes" compare
+    each written figure with its full-precision size.
+    preview=N builds the figures from a stratified sample of N rows (seeded by
+    `seed`, see preview_sample) for fast styling iterations, and labels each with
+    its sample size and margin of error.
+    """
+    with span("export_figures", rows=len(df3)):
+        if preview:
+            sample = preview_sample(df3, preview, seed)
+            agg = SerologyAggregates.from_frame(sample)
+            preview_info = {"rows": len(df3), "sample": len(sample), "seed": seed}
+        else:
+            agg = SerologyAggregates.from_frame(df3)
+            preview_info = None
+        return export_aggregates(agg, out_dir, hashed=hashed, retain=retain,
+                                 ci=ci, replicates=replicates, precision=precision, preview=preview_info)
+
+def export_figures_from_csv(csv_path: str | os.PathLike, out_dir: str = "docs/assets/plots",
+                            chunksize: int = DEFAULT_CHUNKSIZE,
+                            hashed: bool = False, retain: int = DEFAULT_RETAIN,
+                            ci: str | None = None, replicates: int = DEFAULT_REPLICATES,
+                            precision: int | None = None) -> dict:
+    """
+    Streaming variant of export_figures() for CSVs larger than memory: the file is
+    aggregated chunk by chunk (see aggregate_csv) and the figures are built from
+    the merged aggregates. The output is identical to export_figures(pd.read_csv(csv_path)).
+    """
+    with span("export_figures_from_csv", chunksize=chunksize):
+        return export_aggregates(aggregate_csv(csv_path, chunksize), out_dir, hashed=hashed, retain=retain,
+                                 ci=ci, replicates=replicates, precision=precision)
+
+def build_figures(agg: SerologyAggregates, ci: str | None = None, replicates: int = DEFAULT_REPLICATES):
+    """Build the four serology figures from aggregates. Returns ({filename: fig}, vaccination stats)."""
+    with span("build_figure", key="serology_seroprevalence"):
+        fig_sero = _build_seroprevalence_fig(agg, ci, replicates)
+    with span("build_figure", key="vaccination_coverage"):
+        fig_vac, stats = _build_vaccination_fig(agg, ci, replicates)
+    with span("build_figure", key="vaccine_brand_distribution"):
+        fig_brand = _build_vaccine_brand_mix_fig(agg, ci, replicates)
+    with span("build_figure", key="seroprevalence_age_waves"):
+        fig_sero_age = _build_seroprevalence_by_age_waves_fig(agg, ci, replicates)
+    return {
+        "serology_seroprevalence.json": fig_sero,
+        "vaccination_coverage.json": fig_vac,
+        "vaccine_brand_distribution.json": fig_brand,
+        "seroprevalence_age_waves.json": fig_sero_age,
+    }, stats
+
+def export_aggregates(agg: SerologyAggregates, out_dir: str | os.PathLike,
+                      hashed: bool = False, retain: int = DEFAULT_RETAIN,
+                      ci: str | None = None, replicates: int = DEFAULT_REPLICATES,
+                      precision: int | None = None, preview: dict | None = None) -> dict:
+    """
+    Build the figures from aggregates and write them plus plotly_manifest.json
+    (the shared tail of export_figures() and export_figures_from_csv()). With
+    preview={"rows", "sample", ...} the aggregates are of a sample and every
+    figure is labelled with its sample size and margin of error.
+    """
     out_path = _ensure_out_dir(out_dir)
 
-    fig_sero = _compute_seroprevalence_fig(df3)
-    fig_vac, stats = _compute_vaccination_fig(df3)
-    fig_brand = _compute_vaccine_brand_mix_fig(df3)
-    fig_sero_age = _compute_seroprevalence_by_age_waves_fig(df3)
+    figures, stats = build_figures(agg, ci, replicates)
+    if preview:
+        preview = {**preview, "margins": _annotate_preview(figures, agg, preview["rows"], preview["sample"])}
+    fig_sero = figures["serology_seroprevalence.json"]
+    fig_vac = figures["vaccination_coverage.json"]
+    fig_brand = figures["vaccine_brand_distribution.json"]
+    fig_sero_age = figures["seroprevalence_age_waves.json"]
 
-    sero_path = out_path / "serology_seroprevalence.json"
-    vac_path = out_path / "vaccination_coverage.json"
-    brand_path = out_path / "vaccine_brand_distribution.json"
-    sero_age_path = out_path / "seroprevalence_age_waves.json"
     manifest_path = out_path / "plotly_manifest.json"
 
-    sero_path.write_text(fig_sero.to_json(), encoding="utf-8")
-    vac_path.write_text(fig_vac.to_json(), encoding="utf-8")
-    brand_path.write_text(fig_brand.to_json(), encoding="utf-8")
-    sero_age_path.write_text(fig_sero_age.to_json(), encoding="utf-8")
+    # One figure at a time: each is serialized while it is written, then released
+    paths, sizes = {}, {}
+    for filename, fig in figures.items():
+        with span("to_json", file=filename):
+            chunks, full_precision_bytes = _serialize_figure(fig, precision)
+        with span("write", file=filename):
+            paths[filename], written = _write_asset(out_path, filename, chunks, hashed, retain)
+        sizes[filename] = {"full_precision_bytes": full_precision_bytes, "bytes": written}
+    sero_path = paths["serology_seroprevalence.json"]
+    vac_path = paths["vaccination_coverage.json"]
+    brand_path = paths["vaccine_brand_distribution.json"]
+    sero_age_path = paths["seroprevalence_age_waves.json"]
 
     manifest = {
         "version": 1,
         "basePath": "assets/plots/",
         "charts": [
-            { "id": "sero-prevalence", "title": fig_sero.layout.title.text or f"COVID-19 Seroprevalence (%) ({DATASET_TAG})", "file": "serology_seroprevalence.json", "width": 800, "height": 500 },
-            { "id": "vaccination-coverage", "title": fig_vac.layout.title.text or f"COVID-19 Vaccination Coverage (%) ({DATASET_TAG})", "file": "vaccination_coverage.json", "width": 800, "height": 500 },
-            { "id": "vaccine-brand-distribution", "title": fig_brand.layout.title.text or "COVID-19 Vaccine Brand Distribution (%)", "file": "vaccine_brand_distribution.json", "width": 800, "height": 600 },
-            { "id": "seroprevalence-age-waves", "title": fig_sero_age.layout.title.text or "Seroprevalence by Age Group Across Waves", "file": "seroprevalence_age_waves.json", "width": 1200, "height": 800 }
+            { "id": "sero-prevalence", "title": fig_sero.layout.title.text or f"COVID-19 Seroprevalence (%) ({DATASET_TAG})", "file": sero_path.name, "width": 800, "height": 500 },
+            { "id": "vaccination-coverage", "title": fig_vac.layout.title.text or f"COVID-19 Vaccination Coverage (%) ({DATASET_TAG})", "file": vac_path.name, "width": 800, "height": 500 },
+            { "id": "vaccine-brand-distribution", "title": fig_brand.layout.title.text or "COVID-19 Vaccine Brand Distribution (%)", "file": brand_path.name, "width": 800, "height": 600 },
+            { "id": "seroprevalence-age-waves", "title": fig_sero_age.layout.title.text or "Seroprevalence by Age Group Across Waves", "file": sero_age_path.name, "width": 1200, "height": 800 }
         ]
     }
-    manifest_path.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    with AtomicFile(manifest_path, only_if_changed=True) as f:
+        f.write_chunks(iter_json(manifest, indent=2))
 
     return {
         "serology_seroprevalence": str(sero_path),
@@ -272,14 +608,56 @@ def export_figures(df3: pd.DataFrame, out_dir: str = "docs/assets/plots") -> dic
         "manifest": str(manifest_path),
         "dataset_tag": DATASET_TAG,
         "stats": stats,
+        "sizes": sizes,
+        **({"preview": preview} if preview else {}),
     }
 
 if __name__ == "__main__":
-    import sys
-    if len(sys.argv) > 1:
-        csv_path = sys.argv[1]
-        df3 = pd.read_csv(csv_path)
-        out = export_figures(df3)
+    import argparse
+    parser = argparse.ArgumentParser(description="Export the serology figures from a df3 CSV as Plotly JSON.")
+    parser.add_argument("csv_path", nargs="?", help="Path to the df3 CSV")
+    parser.add_argument("--out-dir", default="docs/assets/plots", help="Output directory for figures and manifest")
+    parser.add_argument("--hashed", action="store_true", help="Publish figures under content-hashed filenames")
+    parser.add_argument("--retain", type=int, default=DEFAULT_RETAIN,
+                        help="Hashed versions to keep per figure when --hashed is set")
+    parser.add_argument("--chunksize", type=int, default=None,
+                        help=f"Stream the CSV in chunks of this many rows (e.g. {DEFAULT_CHUNKSIZE}) "
+                             "instead of loading it into memory")
+    parser.add_argument("--ci", choices=CI_METHODS, default=None,
+                        help="Add 95%% confidence-interval error bars (Wilson or bootstrap) to every figure")
+    parser.add_argument("--replicates", type=int, default=DEFAULT_REPLICATES,
+                        help="Bootstrap resamples per stratum when --ci bootstrap is set")
+    parser.add_argument("--precision", type=int, default=None,
+                        help="Round float payloads to this many decimals")
+    parser.add_argument("--preview", type=int, default=None, metavar="N",
+                        help="Build the figures from a stratified sample of N rows (by wave, standort and "
+                             "age group), labelled with sample size and margin of error")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed of the --preview sample")
+    parser.add_argument("--trace", metavar="PATH",
+                        help="Write Chrome trace-event JSON with per-stage timings and peak memory to PATH")
+    args = parser.parse_args()
+    if args.preview is not None and args.chunksize:
+        parser.error("--preview loads only the columns it needs and cannot be combined with --chunksize")
+    if args.preview is not None and args.preview <= 0:
+        parser.error("--preview needs a positive number of rows")
+
+    if args.trace:
+        tracing.enable(args.trace)
+
+    if args.csv_path and args.chunksize:
+        out = export_figures_from_csv(args.csv_path, args.out_dir, chunksize=args.chunksize,
+                                      hashed=args.hashed, retain=args.retain,
+                                      ci=args.ci, replicates=args.replicates, precision=args.precision)
+        print(json.dumps(out, indent=2))
+    elif args.csv_path:
+        with span("read_csv", path=args.csv_path):
+            if args.preview:
+                df3 = pd.read_csv(args.csv_path, usecols=lambda c: c in PREVIEW_COLUMNS)
+            else:
+                df3 = pd.read_csv(args.csv_path)
+        out = export_figures(df3, args.out_dir, hashed=args.hashed, retain=args.retain,
+                             ci=args.ci, replicates=args.replicates, precision=args.precision,
+                             preview=args.preview, seed=args.seed)
         print(json.dumps(out, indent=2))
     else:
-        print("Provide a CSV path for df3 or import and call export_figures(df3) from a notebook.")
\ No newline at end of file
+        print("Provide a CSV path for df3 or import and call export_figures(df3) from a notebook.")
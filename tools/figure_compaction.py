@@ -0,0 +1,112 @@
+"""
+Size reductions for Plotly figure JSON: float rounding and compact array encoding.
+
+round_floats() rounds every float to `precision` decimals. Plotly 7 writes numpy
+arrays as base64 typed arrays ({"dtype": "f8", "bdata": ...}), whose size does not
+depend on the values, so after rounding each typed array is re-encoded as the
+shorter of a plain JSON list and the narrowest typed array that still holds the
+rounded values exactly (i1/i2/i4 for whole numbers, f4 when within half a unit of
+the last decimal, else f8). encode_array() applies the same shortest exact
+encoding, without rounding, to other float arrays (e.g. quantile sketch levels).
+"""
+import base64
+import json
+
+import numpy as np
+
+_INT_DTYPES = [("i1", np.int8), ("i2", np.int16), ("i4", np.int32)]
+
+
+def dumps_compact(obj) -> str:
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False)
+
+
+def decode_typed_array(value: dict) -> np.ndarray:
+    """{"dtype", "bdata"[, "shape"]} -> numpy array (read-only view of the decoded bytes)."""
+    arr = np.frombuffer(base64.b64decode(value["bdata"]), dtype=np.dtype(value["dtype"]))
+    shape = value.get("shape")
+    if shape:
+        arr = arr.reshape([int(d) for d in str(shape).split(",")])
+    return arr
+
+
+def _encode_typed_array(arr: np.ndarray, dtype_name: str, numpy_dtype) -> dict:
+    out = {"dtype": dtype_name, "bdata": base64.b64encode(arr.astype(numpy_dtype).tobytes()).decode("ascii")}
+    if arr.ndim > 1:
+        out["shape"] = ",".join(str(d) for d in arr.shape)
+    return out
+
+
+def _round_typed_array(value: dict, precision: int):
+    arr = decode_typed_array(value)
+    if arr.dtype.kind != "f":
+        return value
+    rounded = np.round(arr, precision)
+    finite = np.isfinite(rounded)
+    candidates = []
+
+    if finite.all() and np.array_equal(rounded, np.round(rounded)):
+        for name, dtype in _INT_DTYPES:
+            info = np.iinfo(dtype)
+            if rounded.size == 0 or (rounded.min() >= info.min and rounded.max() <= info.max):
+                candidates.append(_encode_typed_array(rounded, name, dtype))
+                break
+    as_f4 = rounded.astype(np.float32)
+    if np.all(np.abs(as_f4[finite] - rounded[finite]) < 0.5 * 10.0 ** -precision):
+        candidates.append(_encode_typed_array(rounded, "f4", np.float32))
+    candidates.append(_encode_typed_array(rounded, "f8", np.float64))
+    if finite.all():
+        listed = rounded.tolist()
+        candidates.append(_round_plain(listed, precision))
+    return min(candidates, key=lambda c: len(dumps_compact(c)))
+
+
+def encode_array(arr: np.ndarray):
+    """
+    Shortest exact JSON form of a 1-d float array: a plain list or the narrowest typed
+    array (i1/i2/i4 for whole numbers, f4 when every value survives the cast, else f8)
+    that decode_array() turns back into the same values.
+    """
+    arr = np.asarray(arr, dtype=np.float64)
+    candidates = [_encode_typed_array(arr, "f8", np.float64)]
+    finite = np.isfinite(arr)
+    if finite.all() and np.array_equal(arr, np.round(arr)):
+        for name, dtype in _INT_DTYPES:
+            info = np.iinfo(dtype)
+            if arr.size == 0 or (arr.min() >= info.min and arr.max() <= info.max):
+                candidates.append(_encode_typed_array(arr, name, dtype))
+                break
+    if np.array_equal(arr.astype(np.float32), arr, equal_nan=True):
+        candidates.append(_encode_typed_array(arr, "f4", np.float32))
+    if finite.all():
+        candidates.append([int(v) if v.is_integer() and abs(v) < 2 ** 53 else v for v in arr.tolist()])
+    return min(candidates, key=lambda c: len(dumps_compact(c)))
+
+
+def decode_array(value) -> np.ndarray:
+    """Inverse of encode_array(): plain list or typed array -> float64 array."""
+    if isinstance(value, dict):
+        return decode_typed_array(value).astype(np.float64)
+    return np.asarray(value, dtype=np.float64)
+
+
+def _round_plain(obj, precision: int):
+    if isinstance(obj, float):
+        r = round(obj, precision)
+        return int(r) if r.is_integer() and abs(r) < 2 ** 53 else r
+    if isinstance(obj, list):
+        return [_round_plain(v, precision) for v in obj]
+    return obj
+
+
+def round_floats(obj, precision: int):
+    """Return a copy of a JSON-compatible structure with every float rounded to `precision` decimals."""
+    if isinstance(obj, float):
+        return _round_plain(obj, precision)
+    if isinstance(obj, dict):
+        if isinstance(obj.get("bdata"), str) and "dtype" in obj:
+            return _round_typed_array(obj, precision)
+        return {k: round_floats(v, precision) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [round_floats(v, precision) for v in obj]
+    return obj
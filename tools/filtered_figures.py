@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+The four serology figures of export_plotly_json.py for a filtered subset of df3,
+memoized per filter.
+
+A filter spec maps columns to allowed values or to an inclusive range:
+
+    {"standort": ["freiburg"], "sex": [2], "age_22": {"min": 30, "max": 49}}
+
+Clauses are combined with AND. Values are matched like normalization tokens, so
+2, 2.0 and "2" select the same rows. Each clause is turned into a boolean mask
+over the resident df3 once and kept in an LRU cache, so repeated or overlapping
+filters (e.g. the same standort with different age ranges) reuse it. The
+serostatus and vaccination codes are normalized once for the whole frame. The
+figure JSON of each filter is memoized in a bounded LRU keyed by the hash of
+the canonical filter, so the order of clauses and values does not matter.
+
+Usage:
+    python3 filtered_figures.py <df3.csv> --filter '{"standort": ["freiburg"]}' [--filter ...]
+                                [--out-dir DIR] [--ci wilson|bootstrap] [--replicates N]
+"""
+import hashlib
+import json
+import sys
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from confidence_intervals import DEFAULT_REPLICATES, METHODS as CI_METHODS
+from export_plotly_json import CODE_COLUMNS, REQUIRED_COLUMNS, SerologyAggregates, build_figures
+from figure_compaction import dumps_compact, round_floats
+from normalization import normalize_frame, token
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "python"))
+from tracing import span  # noqa: E402
+
+DEFAULT_MAXSIZE = 64  # memoized filters (four figures each)
+DEFAULT_MASK_CACHE_SIZE = 256  # cached clause masks (one bool per row each)
+FILTER_HASH_LENGTH = 16
+
+
+def canonical_filter(spec: dict) -> list:
+    """
+    Canonical, JSON-serializable form of a filter spec: clauses sorted by column,
+    [column, "in", sorted value tokens] or [column, "range", [min, max]] (None = open).
+    """
+    clauses = []
+    for column, allowed in spec.items():
+        if isinstance(allowed, dict):
+            unknown = set(allowed) - {"min", "max"}
+            if unknown:
+                raise ValueError(f"Unknown range bound(s) for {column}: {sorted(unknown)} (expected min/max)")
+            clauses.append([str(column), "range", [allowed.get("min"), allowed.get("max")]])
+        else:
+            values = allowed if isinstance(allowed, (list, tuple, set)) else [allowed]
+            clauses.append([str(column), "in", sorted({token(v) for v in values})])
+    return sorted(clauses, key=lambda c: (c[0], c[1]))
+
+
+def filter_hash(spec: dict) -> str:
+    """First FILTER_HASH_LENGTH hex digits of the SHA-256 of the canonical filter."""
+    return hashlib.sha256(dumps_compact(canonical_filter(spec)).encode("utf-8")).hexdigest()[:FILTER_HASH_LENGTH]
+
+
+class FilteredFigures:
+    """
+    Resident df3 plus the caches behind figures(spec). ci, replicates and precision
+    apply to every figure, as in export_figures().
+    """
+
+    def __init__(self, df3: pd.DataFrame, ci: str | None = None, replicates: int = DEFAULT_REPLICATES,
+                 precision: int | None = None, maxsize: int = DEFAULT_MAXSIZE,
+                 mask_cache_size: int = DEFAULT_MASK_CACHE_SIZE):
+        self.df3 = df3
+        self.ci = ci
+        self.replicates = replicates
+        self.precision = precision
+        self.maxsize = maxsize
+        self.mask_cache_size = mask_cache_size
+        with span("normalize", rows=len(df3)):
+            self._codes = normalize_frame(df3, CODE_COLUMNS)
+        self._figure_frame = df3[[c for c in REQUIRED_COLUMNS if c in df3.columns]]
+        self._masks: OrderedDict = OrderedDict()
+        self._figures: OrderedDict = OrderedDict()
+        self._numeric: dict = {}
+        self.stats = {"mask_hits": 0, "mask_misses": 0, "figure_hits": 0, "figure_misses": 0}
+
+    def _column(self, column: str) -> pd.Series:
+        if column not in self.df3.columns:
+            raise KeyError(f"Unknown filter column: {column}")
+        return self.df3[column]
+
+    def _range_values(self, column: str, as_dates: bool) -> np.ndarray:
+        """Column coerced to float (or datetime64) once; unparsable values never match."""
+        key = (column, as_dates)
+        if key not in self._numeric:
+            values = self._column(column)
+            if as_dates:
+                self._numeric[key] = pd.to_datetime(values, errors="coerce").to_numpy()
+            else:
+                self._numeric[key] = pd.to_numeric(values, errors="coerce").to_numpy(dtype="float64")
+        return self._numeric[key]
+
+    def _compute_mask(self, clause: tuple) -> np.ndarray:
+        column, op, arg = clause
+        if op == "in":
+            # One token lookup per distinct value, then a gather (as in normalization.encode)
+            codes, uniques = pd.factorize(self._column(column), use_na_sentinel=True)
+            allowed = set(arg)
+            table = np.zeros(len(uniques) + 1, dtype=bool)
+            for i, value in enumerate(uniques):
+                table[i] = token(value) in allowed
+            return table[codes]
+        low, high = arg
+        as_dates = isinstance(low, str) or isinstance(high, str)
+        values = self._range_values(column, as_dates)
+        mask = ~pd.isna(values)
+        if low is not None:
+            mask &= values >= (np.datetime64(pd.Timestamp(low)) if as_dates else low)
+        if high is not None:
+            mask &= values <= (np.datetime64(pd.Timestamp(high)) if as_dates else high)
+        return mask
+
+    def mask(self, clause) -> np.ndarray:
+        """Boolean row mask of one canonical clause, from the LRU mask cache."""
+        key = (clause[0], clause[1], tuple(clause[2]))
+        cached = self._masks.get(key)
+        if cached is not None:
+            self._masks.move_to_end(key)
+            self.stats["mask_hits"] += 1
+            return cached
+        self.stats["mask_misses"] += 1
+        with span("clause_mask", column=clause[0], op=clause[1]):
+            mask = self._compute_mask(key)
+        self._masks[key] = mask
+        if len(self._masks) > self.mask_cache_size:
+            self._masks.popitem(last=False)
+        return mask
+
+    def rows(self, spec: dict) -> np.ndarray:
+        """Combined boolean mask of a filter spec (all rows for an empty spec)."""
+        masks = [self.mask(clause) for clause in canonical_filter(spec)]
+        if not masks:
+            return np.ones(len(self.df3), dtype=bool)
+        return np.logical_and.reduce(masks)
+
+    def figures(self, spec: dict) -> dict:
+        """
+        Figures for the rows matching spec:
+        {"filter": canonical filter, "hash": filter hash, "rows": matching rows,
+         "figures": {filename: figure JSON text}, "stats": vaccination stats}.
+        Results are memoized; the returned dict is shared between calls, do not modify it.
+        """
+        key = filter_hash(spec)
+        cached = self._figures.get(key)
+        if cached is not None:
+            self._figures.move_to_end(key)
+            self.stats["figure_hits"] += 1
+            return cached
+        self.stats["figure_misses"] += 1
+
+        with span("filtered_figures", hash=key):
+            mask = self.rows(spec)
+            agg = SerologyAggregates.from_frame(self._figure_frame[mask], self._codes[mask])
+            figures, stats = build_figures(agg, self.ci, self.replicates)
+            texts = {}
+            for filename, fig in figures.items():
+                with span("to_json", file=filename):
+                    text = fig.to_json()
+                    if self.precision is not None:
+                        text = dumps_compact(round_floats(json.loads(text), self.precision))
+                texts[filename] = text
+
+        result = {"filter": canonical_filter(spec), "hash": key, "rows": int(mask.sum()),
+                  "figures": texts, "stats": stats}
+        self._figures[key] = result
+        if len(self._figures) > self.maxsize:
+            self._figures.popitem(last=False)
+        return result
+
+    def cache_info(self) -> dict:
+        return {**self.stats, "masks": len(self._masks), "figures": len(self._figures)}
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Export the serology figures for filtered subsets of df3.")
+    parser.add_argument("csv_path", help="Path to the df3 CSV")
+    parser.add_argument("--filter", action="append", default=[], metavar="JSON",
+                        help='Filter spec, e.g. \'{"standort": ["freiburg"], "age_22": {"min": 30}}\' (repeatable)')
+    parser.add_argument("--out-dir", default=None,
+                        help="Write each filter's figures to OUT_DIR/<filter hash>/ instead of printing them")
+    parser.add_argument("--ci", choices=CI_METHODS, default=None,
+                        help="Add 95%% confidence-interval error bars (Wilson or bootstrap) to every figure")
+    parser.add_argument("--replicates", type=int, default=DEFAULT_REPLICATES,
+                        help="Bootstrap resamples per stratum when --ci bootstrap is set")
+    parser.add_argument("--precision", type=int, default=None, help="Round float payloads to this many decimals")
+    args = parser.parse_args()
+
+    with span("read_csv", path=args.csv_path):
+        df3 = pd.read_csv(args.csv_path)
+    filtered = FilteredFigures(df3, ci=args.ci, replicates=args.replicates, precision=args.precision)
+    results = []
+    for text in args.filter or ["{}"]:
+        result = filtered.figures(json.loads(text))
+        summary = {k: result[k] for k in ("filter", "hash", "rows", "stats")}
+        if args.out_dir:
+            out_path = Path(args.out_dir) / result["hash"]
+            out_path.mkdir(parents=True, exist_ok=True)
+            for filename, fig_text in result["figures"].items():
+                (out_path / filename).write_text(fig_text, encoding="utf-8")
+            summary["out_dir"] = str(out_path)
+        else:
+            summary["figures"] = {k: json.loads(v) for k, v in result["figures"].items()}
+        results.append(summary)
+    print(json.dumps({"results": results, "cache": filtered.cache_info()}, indent=2))
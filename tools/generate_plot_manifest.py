@@ -2,17 +2,35 @@
 """
 Generate manifest.json for HTML plot files in docs/plots/
 
+Generation is incremental: a per-file record keyed by mtime and size is cached
+next to the manifest (.manifest_cache.json), so only new or changed plots are
+re-read. Each manifest entry carries the file size, trace count, total point
+count and a content hash so clients can decide what to prefetch.
+
+With --hashed, each plot is also published as "<name>.<hash>.html" and the
+manifest points at that immutable copy; --retain sets how many hashed versions
+of each plot are kept.
+
 Usage:
-    python3 generate_plot_manifest.py [plots_dir] [output_path]
+    python3 generate_plot_manifest.py [plots_dir] [output_path] [--hashed] [--retain N]
     
 Default:
     python3 generate_plot_manifest.py docs/plots docs/assets/plots/manifest.json
 """
-import os
+import hashlib
 import json
 import re
+import sys
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "python"))
+import serology_plots  # noqa: E402
+from hashed_assets import DEFAULT_RETAIN, HASH_LENGTH, collect_garbage, is_hashed_filename, publish_file  # noqa: E402
+from thumbnail_index import thumbnail_for  # noqa: E402
+
+CACHE_FILENAME = ".manifest_cache.json"
+CACHE_VERSION = 1
+
 def title_from_filename(filename):
     """Convert filename to friendly title"""
     # Remove .html extension
@@ -22,28 +40,81 @@ def title_from_filename(filename):
     # Title case
     return name.title()
 
+def extract_title_from_layout(layout_text):
+    """Extract title from the layout object of a Plotly.newPlot call"""
+    # The layout is small JSON; its top-level title wins over axis titles
+    try:
+        layout = json.loads(layout_text)
+    except json.JSONDecodeError:
+        layout = None
+    if isinstance(layout, dict):
+        layout_title = layout.get("title")
+        if isinstance(layout_title, dict):
+            return layout_title.get("text") or None
+        if isinstance(layout_title, str) and layout_title.strip():
+            return layout_title.strip()
+        return None
+    
+    # Look for Plotly layout title in the format: "title":{"text":"Title Here"}
+    title_match = re.search(r'"title":\s*\{\s*"text":\s*"([^"]+)"', layout_text)
+    if title_match:
+        return title_match.group(1)
+    
+    # Fallback: look for simpler title format: "title":"Title Here"
+    title_match = re.search(r'"title":\s*"([^"]+)"', layout_text)
+    if title_match:
+        return title_match.group(1)
+    
+    return None
+
+def scan_plot_file(html_file_path):
+    """
+    Read one HTML plot and return its manifest metadata:
+    {"title", "bytes", "traces", "points", "hash"}.
+    Only the layout argument of Plotly.newPlot is searched for the title,
+    never the embedded plotly.js bundle.
+    """
+    raw = Path(html_file_path).read_bytes()
+    record = {
+        "title": None,
+        "bytes": len(raw),
+        "traces": 0,
+        "points": 0,
+        "hash": hashlib.sha256(raw).hexdigest()[:16],
+    }
+    html_content = raw.decode('utf-8', errors='replace')
+    if 'Plotly.newPlot' not in html_content:
+        return record
+    try:
+        _, data_str, layout_str, _ = serology_plots._extract_plotly_call_args(html_content)
+        record["title"] = extract_title_from_layout(layout_str)
+        record.update(serology_plots.figure_stats({"data": json.loads(data_str)}))
+    except (ValueError, json.JSONDecodeError) as e:
+        print(f"Warning: Failed to parse Plotly call in {html_file_path}: {e}")
+    return record
+
 def extract_title_from_html(html_file_path):
     """Extract title from HTML file's Plotly layout configuration"""
     try:
-        with open(html_file_path, 'r', encoding='utf-8') as f:
-            html_content = f.read()
-        
-        # Look for Plotly layout title in the format: "title":{"text":"Title Here"}
-        title_match = re.search(r'"title":\s*\{\s*"text":\s*"([^"]+)"\s*\}', html_content)
-        if title_match:
-            return title_match.group(1)
-        
-        # Fallback: look for simpler title format: "title":"Title Here"
-        title_match = re.search(r'"title":\s*"([^"]+)"', html_content)
-        if title_match:
-            return title_match.group(1)
-        
-        return None
+        return scan_plot_file(html_file_path)["title"]
     except Exception as e:
         print(f"Warning: Failed to extract title from {html_file_path}: {e}")
         return None
 
-def generate_manifest(plots_dir, output_path):
+def _load_cache(cache_path):
+    try:
+        cache = json.loads(cache_path.read_text(encoding='utf-8'))
+    except (OSError, json.JSONDecodeError):
+        return {}
+    if cache.get("version") != CACHE_VERSION:
+        return {}
+    return cache.get("files", {})
+
+def _save_cache(cache_path, files):
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    cache_path.write_text(json.dumps({"version": CACHE_VERSION, "files": files}, indent=1), encoding='utf-8')
+
+def generate_manifest(plots_dir, output_path, hashed=False, retain=DEFAULT_RETAIN):
     """Generate manifest.json for HTML plots"""
     plots_path = Path(plots_dir)
     
@@ -51,25 +122,43 @@ def generate_manifest(plots_dir, output_path):
         print(f"Plots directory not found: {plots_dir}")
         return
         
-    # Find all .html files
-    html_files = list(plots_path.glob('*.html'))
+    # Find all .html files (hashed copies are published outputs, not sources)
+    html_files = [p for p in plots_path.glob('*.html') if not is_hashed_filename(p.name)]
     
     if not html_files:
         print(f"No HTML files found in {plots_dir}")
         return
         
+    output_path = Path(output_path)
+    cache_path = output_path.parent / CACHE_FILENAME
+    cached = _load_cache(cache_path)
+    records = {}
+
     # Create manifest entries
     charts = []
     for html_file in sorted(html_files):
         filename = html_file.name
+        st = html_file.stat()
+        
+        record = cached.get(filename)
+        if record and record.get("mtime_ns") == st.st_mtime_ns and record.get("size") == st.st_size:
+            print(f"Unchanged: {filename}")
+        else:
+            try:
+                record = scan_plot_file(html_file)
+            except OSError as e:
+                print(f"Warning: Failed to read {html_file}: {e}")
+                continue
+            record["mtime_ns"] = st.st_mtime_ns
+            record["size"] = st.st_size
+            print(f"Scanned {filename}: {record['traces']} traces, {record['points']} points")
+        records[filename] = record
         
-        # Try to extract title from HTML content first
-        extracted_title = extract_title_from_html(html_file)
-        if extracted_title:
-            title = extracted_title
+        # Prefer the title from the HTML content, fall back to the filename
+        if record.get("title"):
+            title = record["title"]
             print(f"Extracted title from {filename}: {title}")
         else:
-            # Fallback to filename-based title
             title = title_from_filename(filename)
             print(f"Using filename-based title for {filename}: {title}")
         
@@ -77,10 +166,25 @@ def generate_manifest(plots_dir, output_path):
             "id": filename.replace('.html', '').replace(' ', '-').lower(),
             "title": title,
             "file": filename,
-            "type": "html"
+            "type": "html",
+            "bytes": record["bytes"],
+            "traces": record["traces"],
+            "points": record["points"],
+            "hash": record["hash"],
         }
+        # Keep the SVG preview written by make_thumbnails.py while the plot is unchanged
+        thumbnail = thumbnail_for(chart_entry["id"], record["hash"], output_path.parent)
+        if thumbnail:
+            chart_entry["thumbnail"] = thumbnail
+        if hashed:
+            chart_entry["file"] = publish_file(html_file, record["hash"][:HASH_LENGTH])
+            chart_entry["source"] = filename
+            for stale in collect_garbage(plots_path, filename, retain):
+                print(f"Removed stale {stale.name}")
         charts.append(chart_entry)
     
+    _save_cache(cache_path, records)
+    
     # Create manifest
     manifest = {
         "version": 1,
@@ -89,7 +193,6 @@ def generate_manifest(plots_dir, output_path):
     }
     
     # Write manifest
-    output_path = Path(output_path)
     output_path.parent.mkdir(parents=True, exist_ok=True)
     
     with open(output_path, 'w', encoding='utf-8') as f:
@@ -102,8 +205,13 @@ def generate_manifest(plots_dir, output_path):
     return manifest
 
 if __name__ == "__main__":
-    import sys
-    plots_dir = sys.argv[1] if len(sys.argv) > 1 else "docs/plots"
-    output_path = sys.argv[2] if len(sys.argv) > 2 else "docs/assets/plots/manifest.json"
+    import argparse
+    parser = argparse.ArgumentParser(description="Generate manifest.json for HTML plots.")
+    parser.add_argument("plots_dir", nargs="?", default="docs/plots")
+    parser.add_argument("output_path", nargs="?", default="docs/assets/plots/manifest.json")
+    parser.add_argument("--hashed", action="store_true", help="Publish plots under content-hashed filenames")
+    parser.add_argument("--retain", type=int, default=DEFAULT_RETAIN,
+                        help="Hashed versions to keep per plot when --hashed is set")
+    args = parser.parse_args()
     
-    generate_manifest(plots_dir, output_path)
\ No newline at end of file
+    generate_manifest(args.plots_dir, args.output_path, hashed=args.hashed, retain=args.retain)
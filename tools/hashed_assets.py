@@ -0,0 +1,106 @@
+"""
+Content-hashed asset publishing shared by export_plotly_json.py and generate_plot_manifest.py.
+
+An asset "Prevalence.html" is published as "Prevalence.<hash>.html", where <hash>
+is the first HASH_LENGTH hex digits of the SHA-256 of its content. The manifest
+records the hashed name, so every file except the manifest itself can be served
+with far-future immutable cache headers. Older hashed copies are garbage-collected,
+keeping the `retain` most recently published versions of each asset so pages that
+still hold the previous manifest keep working.
+"""
+import hashlib
+import os
+import re
+from pathlib import Path
+
+HASH_LENGTH = 10
+DEFAULT_RETAIN = 2
+
+_HASHED_RE = re.compile(r"\.([0-9a-f]{%d})(\.[^.]+)$" % HASH_LENGTH)
+
+
+def content_hash(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()[:HASH_LENGTH]
+
+
+def hashed_filename(filename: str, digest: str) -> str:
+    """"Prevalence.html" + "0123456789" -> "Prevalence.0123456789.html"."""
+    path = Path(filename)
+    return f"{path.stem}.{digest[:HASH_LENGTH]}{path.suffix}"
+
+
+def is_hashed_filename(filename: str) -> bool:
+    return _HASHED_RE.search(filename) is not None
+
+
+def _mark_current(path: Path) -> None:
+    # The newest mtime identifies the current version for garbage collection
+    os.utime(path)
+
+
+def publish(directory, filename: str, content: bytes) -> str:
+    """Write content under its hashed name in directory (if not already there) and return that name."""
+    directory = Path(directory)
+    name = hashed_filename(filename, content_hash(content))
+    target = directory / name
+    if not target.exists():
+        tmp = target.with_name(target.name + ".tmp")
+        tmp.write_bytes(content)
+        os.replace(tmp, target)
+    _mark_current(target)
+    return name
+
+
+def publish_file(path, digest: str = None) -> str:
+    """Publish an existing file as a hashed sibling and return the hashed name."""
+    path = Path(path)
+    content = None
+    if digest is None:
+        content = path.read_bytes()
+        digest = content_hash(content)
+    name = hashed_filename(path.name, digest)
+    target = path.with_name(name)
+    if not target.exists():
+        if content is None:
+            content = path.read_bytes()
+        tmp = target.with_name(target.name + ".tmp")
+        tmp.write_bytes(content)
+        os.replace(tmp, target)
+    _mark_current(target)
+    return name
+
+
+def publish_written(directory, filename: str, written) -> str:
+    """
+    Publish a fully written json_stream.AtomicFile under its hashed name in directory:
+    its temporary file is moved there, or discarded when that version already exists.
+    Returns the hashed name.
+    """
+    name = hashed_filename(filename, written.hexdigest())
+    target = Path(directory) / name
+    if target.exists():
+        written.discard()
+    else:
+        written.commit(target)
+    _mark_current(target)
+    return name
+
+
+def collect_garbage(directory, filename: str, retain: int = DEFAULT_RETAIN) -> list:
+    """
+    Delete hashed copies of filename in directory beyond the `retain` most recently
+    published ones (together with their .gz siblings). Returns the removed paths.
+    """
+    directory = Path(directory)
+    base = Path(filename)
+    pattern = re.compile(re.escape(base.stem) + r"\.[0-9a-f]{%d}" % HASH_LENGTH + re.escape(base.suffix) + "$")
+    versions = [p for p in directory.iterdir() if p.is_file() and pattern.match(p.name)]
+    versions.sort(key=lambda p: p.stat().st_mtime_ns, reverse=True)
+
+    removed = []
+    for stale in versions[max(retain, 1):]:
+        for p in (stale, stale.with_name(stale.name + ".gz")):
+            if p.exists():
+                p.unlink()
+                removed.append(p)
+    return removed
@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+Fine-grained histogram counts of every numeric catalog column, from which the
+dashboard's histograms at any coarser bin count are sums of adjacent bins.
+
+binNumeric(values, nbins) in docs/index.html splits [min, max] of the values into
+nbins equal bins (the last one closed) and the colored-histogram override in
+docs/assets/dashboard-fixes.js re-filters the rows of every category for every
+bin. Here each column is binned once over the same [min, max] into 2^levels base
+bins (1024 by default) with one bincount, optionally split by the values of one
+categorical column ("(empty)" for missing, as the dashboard labels them).
+
+Columns whose values lie on a decimal grid (whole numbers, or at most
+MAX_DECIMALS decimals, e.g. weights in 0.1 kg) with at most 2^MAX_DISCRETE_LEVELS
+grid points get one base bin per grid value (padded to a power of two), so any
+histogram of them is exact: each base bin is assigned to the binNumeric bin of
+its value, with the browser's comparisons. Other columns get 2^levels bins over
+[min, max]; coarsening these to nbins is exact for powers of two (the levels of
+the pyramid), and for other nbins a value is off by at most one bin, and only
+when it lies within (max - min) / 2^levels of a bin boundary.
+
+Counts are written dense with figure_compaction.encode_array; runs of empty bins
+compress well when the file is served gzipped (compress_assets.py).
+
+Usage:
+    python3 histogram_pyramid.py <df3.csv> [out.json] [--by standort] [--levels 10]
+                                 [--columns a,b] [--chunksize N]
+
+Default:
+    python3 histogram_pyramid.py docs/data/df3_full_for_pivot.csv docs/data/histogram_pyramid.json
+"""
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from data_catalog import NUMERIC_COLUMNS
+from figure_compaction import decode_array, dumps_compact, encode_array
+from normalization import token
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "python"))
+import tracing  # noqa: E402
+from tracing import span  # noqa: E402
+
+PYRAMID_VERSION = 1
+DEFAULT_LEVELS = 10  # 1024 base bins
+MAX_DISCRETE_LEVELS = 12  # up to 4096 grid values get a base bin each
+MAX_DECIMALS = 3
+DEFAULT_CHUNKSIZE = 250_000
+EMPTY_CATEGORY = "(empty)"
+
+
+def bin_index(values: np.ndarray, lo: float, width: float, nbins: int) -> np.ndarray:
+    """
+    Bin of each finite value among nbins bins of `width` starting at lo, with the
+    comparisons of binNumeric() (lo + i * width <= v < lo + (i + 1) * width, last bin closed).
+    """
+    if width <= 0:
+        return np.full(len(values), nbins - 1, dtype=np.int64)  # min == max: binNumeric's closed last bin
+    index = np.floor((values - lo) / width).astype(np.int64)
+    # Settle values the division rounded across a boundary the way the browser's comparisons do
+    index -= values < lo + index * width
+    index += values >= lo + (index + 1) * width
+    return np.clip(index, 0, nbins - 1)
+
+
+def base_layout(bounds: dict, levels: int = DEFAULT_LEVELS):
+    """(base bin width, base bins, discrete) of a column with bounds {"min", "max", "decimals"}."""
+    lo, hi, decimals = bounds["min"], bounds["max"], bounds["decimals"]
+    if decimals is not None:
+        grid_values = round((hi - lo) * 10 ** decimals) + 1
+        if grid_values <= 1 << MAX_DISCRETE_LEVELS:
+            return 10.0 ** -decimals, 1 << max(0, (grid_values - 1).bit_length()), True
+    return (hi - lo) / (1 << levels), 1 << levels, False
+
+
+def _grid_values(lo: float, decimals: int, bins: int) -> np.ndarray:
+    # Integer / 10^d is the correctly rounded double, i.e. the value the CSV text parses to
+    scale = 10 ** decimals
+    return (round(lo * scale) + np.arange(bins, dtype=np.float64)) / scale
+
+
+def targets(column: dict, nbins: int) -> np.ndarray:
+    """binNumeric bin (of nbins over [min, max]) of every base bin of a pyramid column."""
+    lo, hi = column["min"], column["max"]
+    base = len(column["counts"])
+    if column["discrete"]:
+        return bin_index(_grid_values(lo, column["decimals"], base), lo, (hi - lo) / nbins, nbins)
+    return np.arange(base) * nbins // base
+
+
+def coarsen(counts: np.ndarray, column_targets: np.ndarray, nbins: int) -> np.ndarray:
+    """Sum base counts into nbins bins by their targets() (repeat with the same targets per category)."""
+    return np.bincount(column_targets, weights=counts, minlength=nbins).astype(np.int64)
+
+
+def bin_centers(lo: float, hi: float, nbins: int) -> np.ndarray:
+    """Bin centers as binNumeric() reports them."""
+    width = (hi - lo) / nbins
+    return lo + (np.arange(nbins) + 0.5) * width
+
+
+def _numeric(series: pd.Series) -> np.ndarray:
+    return pd.to_numeric(series, errors="coerce").to_numpy(dtype=np.float64)
+
+
+def _categories(series: pd.Series):
+    """(codes, category labels) with missing values as EMPTY_CATEGORY."""
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    labels = [token(u) for u in uniques]
+    # Values that share a token (2 and "2") share a category
+    merged = sorted(set(labels))
+    position = {label: i for i, label in enumerate(merged)}
+    lookup = np.array([position[label] for label in labels] + [len(merged)], dtype=np.int64)
+    return lookup[codes], merged + [EMPTY_CATEGORY]
+
+
+def column_ranges(df: pd.DataFrame, columns) -> dict:
+    """
+    {column: {"min", "max", "decimals"}} of the finite values of each column (None
+    when there are none); decimals is the fewest decimals (up to MAX_DECIMALS) that
+    represent every value, or None.
+    """
+    ranges = {}
+    for column in columns:
+        values = _numeric(df[column])
+        finite = values[np.isfinite(values)]
+        if not len(finite):
+            ranges[column] = None
+            continue
+        distinct = np.unique(finite)
+        decimals = next((d for d in range(MAX_DECIMALS + 1)
+                         if np.array_equal(np.round(distinct, d), distinct)), None)
+        ranges[column] = {"min": float(distinct[0]), "max": float(distinct[-1]), "decimals": decimals}
+    return ranges
+
+
+def _merge_ranges(into: dict, other: dict) -> dict:
+    for column, bounds in other.items():
+        if bounds is None:
+            into.setdefault(column, None)
+        elif into.get(column) is None:
+            into[column] = bounds
+        else:
+            decimals = [into[column]["decimals"], bounds["decimals"]]
+            into[column] = {"min": min(into[column]["min"], bounds["min"]),
+                            "max": max(into[column]["max"], bounds["max"]),
+                            "decimals": None if None in decimals else max(decimals)}
+    return into
+
+
+def count_bins(df: pd.DataFrame, ranges: dict, by: str | None = None, levels: int = DEFAULT_LEVELS) -> dict:
+    """
+    {column: {"counts": base counts, "split": {category: base counts}}} over the given
+    ranges ("split" only with `by`). Columns with no finite values are skipped.
+    """
+    if by is not None:
+        category_codes, categories = _categories(df[by])
+    result = {}
+    for column, bounds in ranges.items():
+        if bounds is None:
+            continue
+        with span("count_bins", column=column, rows=len(df)):
+            width, bins, discrete = base_layout(bounds, levels)
+            values = _numeric(df[column])
+            finite = np.isfinite(values)
+            if discrete:
+                scale = 10 ** bounds["decimals"]
+                index = (np.rint(values[finite] * scale) - round(bounds["min"] * scale)).astype(np.int64)
+            else:
+                index = bin_index(values[finite], bounds["min"], width, bins)
+            entry = {"counts": np.bincount(index, minlength=bins)}
+            if by is not None:
+                # One bincount over category * bins + bin instead of a pass per category
+                flat = category_codes[finite] * bins + index
+                split = np.bincount(flat, minlength=len(categories) * bins).reshape(len(categories), bins)
+                entry["split"] = {label: split[i] for i, label in enumerate(categories) if split[i].any()}
+            result[column] = entry
+    return result
+
+
+def _merge_counts(into: dict, other: dict) -> dict:
+    for column, entry in other.items():
+        if column not in into:
+            into[column] = entry
+            continue
+        into[column]["counts"] = into[column]["counts"] + entry["counts"]
+        split = into[column].get("split")
+        for label, counts in entry.get("split", {}).items():
+            split[label] = split[label] + counts if label in split else counts
+    return into
+
+
+def build_pyramid(df: pd.DataFrame, columns=None, by: str | None = None, levels: int = DEFAULT_LEVELS) -> dict:
+    """Pyramid (see to_dict layout) of an in-memory df3."""
+    columns = [c for c in (columns or NUMERIC_COLUMNS) if c in df.columns]
+    ranges = column_ranges(df, columns)
+    return {"levels": levels, "by": by, "rows": len(df), "ranges": ranges,
+            "columns": count_bins(df, ranges, by, levels)}
+
+
+def pyramid_csv(csv_path, columns=None, by: str | None = None, levels: int = DEFAULT_LEVELS,
+                chunksize: int = DEFAULT_CHUNKSIZE) -> dict:
+    """Streaming build_pyramid(): one pass for the column ranges, one for the counts."""
+    wanted = set(columns or NUMERIC_COLUMNS) | ({by} if by else set())
+
+    def chunks():
+        return pd.read_csv(csv_path, usecols=lambda c: c in wanted, chunksize=chunksize, low_memory=False)
+
+    ranges, rows = {}, 0
+    with span("ranges", path=str(csv_path)):
+        for chunk in chunks():
+            present = [c for c in (columns or NUMERIC_COLUMNS) if c in chunk.columns]
+            _merge_ranges(ranges, column_ranges(chunk, present))
+            rows += len(chunk)
+    counts = {}
+    with span("counts", path=str(csv_path)):
+        for chunk in chunks():
+            _merge_counts(counts, count_bins(chunk, ranges, by, levels))
+    return {"levels": levels, "by": by, "rows": rows, "ranges": ranges, "columns": counts}
+
+
+def to_dict(pyramid: dict) -> dict:
+    """
+    JSON form: {"version", "levels", "by", "rows", "columns": {column: {"min", "max",
+    "discrete", "decimals", "width", "n", "counts", "categories", "split"}}}, counts
+    encoded by encode_array. "discrete" columns have one base bin per grid value
+    from min, `width` = 10^-decimals apart.
+    """
+    columns = {}
+    for column, entry in pyramid["columns"].items():
+        bounds = pyramid["ranges"][column]
+        width, _, discrete = base_layout(bounds, pyramid["levels"])
+        out = {"min": bounds["min"], "max": bounds["max"], "discrete": discrete, "decimals": bounds["decimals"],
+               "width": width, "n": int(entry["counts"].sum()), "counts": encode_array(entry["counts"])}
+        if "split" in entry:
+            out["categories"] = list(entry["split"])
+            out["split"] = [encode_array(counts) for counts in entry["split"].values()]
+        columns[column] = out
+    return {"version": PYRAMID_VERSION, "levels": pyramid["levels"], "by": pyramid["by"],
+            "rows": pyramid["rows"], "columns": columns}
+
+
+def load_pyramid(path) -> dict:
+    """{column: {"min", "max", "discrete", "decimals", "width", "n", "counts", "split": {category: counts}}}."""
+    data = json.loads(Path(path).read_text(encoding="utf-8"))
+    if data.get("version") != PYRAMID_VERSION:
+        raise ValueError(f"{path}: unsupported histogram pyramid version {data.get('version')!r}")
+    columns = {}
+    for column, entry in data["columns"].items():
+        columns[column] = {
+            **{k: entry[k] for k in ("min", "max", "discrete", "decimals", "width", "n")},
+            "counts": decode_array(entry["counts"]).astype(np.int64),
+            "split": {label: decode_array(counts).astype(np.int64)
+                      for label, counts in zip(entry.get("categories", []), entry.get("split", []))},
+        }
+    return columns
+
+
+def histogram(column: dict, nbins: int, category: str | None = None) -> dict:
+    """{"bins", "counts", "min", "max", "binWidth"} as binNumeric() returns them, from the base counts."""
+    counts = column["counts"] if category is None else column["split"][category]
+    lo, hi = column["min"], column["max"]
+    return {"bins": bin_centers(lo, hi, nbins).tolist(),
+            "counts": coarsen(counts, targets(column, nbins), nbins).tolist(),
+            "min": lo, "max": hi, "binWidth": (hi - lo) / nbins}
+
+
+def write_pyramid(path, pyramid: dict) -> int:
+    """Write the pyramid atomically; returns the file size in bytes."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    text = dumps_compact(to_dict(pyramid))
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    tmp_path.write_text(text, encoding="utf-8")
+    os.replace(tmp_path, path)
+    return len(text.encode("utf-8"))
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Precompute multi-resolution histogram counts per numeric column.")
+    parser.add_argument("csv_path", help="Path to the df3 CSV")
+    parser.add_argument("out_path", nargs="?", default="docs/data/histogram_pyramid.json", help="Output JSON")
+    parser.add_argument("--by", default=None, help="Categorical column to split the counts by (e.g. standort)")
+    parser.add_argument("--levels", type=int, default=DEFAULT_LEVELS,
+                        help="Base resolution as a power of two (10 = 1024 bins)")
+    parser.add_argument("--columns", default=None, help="Comma-separated numeric columns (default: catalog sliders)")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE, help="Rows per CSV chunk")
+    parser.add_argument("--trace", metavar="PATH",
+                        help="Write Chrome trace-event JSON with per-stage timings and peak memory to PATH")
+    args = parser.parse_args()
+
+    if args.trace:
+        tracing.enable(args.trace)
+
+    start = time.perf_counter()
+    pyramid = pyramid_csv(args.csv_path, args.columns.split(",") if args.columns else None, args.by,
+                          args.levels, args.chunksize)
+    size = write_pyramid(args.out_path, pyramid)
+    print(json.dumps({"output": args.out_path, "rows": pyramid["rows"], "levels": args.levels, "by": args.by,
+                      "columns": len(pyramid["columns"]), "bytes": size,
+                      "seconds": round(time.perf_counter() - start, 3)}, indent=2))
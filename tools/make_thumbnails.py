@@ -0,0 +1,450 @@
+#!/usr/bin/env python3
+"""
+Render small static SVG previews of every plot so the gallery can show all charts
+without loading Plotly, a browser or kaleido.
+
+Each figure (HTML plots via serology_plots.get_figure_json, exported figures via
+plotly_manifest.json) is drawn from its data arrays as a sparkline, bar, box,
+pie or heatmap preview. Thumbnails are published as thumbs/<id>.<hash>.svg and
+indexed in thumbs/index.json by the SHA-256 of the source file, so unchanged
+plots are not even parsed on the next run. The manifests in out_dir get a
+"thumbnail" field (relative to the manifest's directory) for every chart.
+
+Usage:
+    python3 make_thumbnails.py [out_dir] [--plots-dir docs/plots] [--width 160] [--height 90]
+
+Default:
+    python3 make_thumbnails.py docs/assets/plots --plots-dir docs/plots
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "python"))
+import serology_plots  # noqa: E402
+from figure_compaction import decode_typed_array  # noqa: E402
+from hashed_assets import DEFAULT_RETAIN, collect_garbage, publish  # noqa: E402
+from thumbnail_index import INDEX_FILENAME, THUMBS_DIRNAME, load_index  # noqa: E402
+DEFAULT_WIDTH = 160
+DEFAULT_HEIGHT = 90
+# Bump when the drawing code changes so cached thumbnails are re-rendered
+RENDER_VERSION = 1
+
+PADDING = 4
+MAX_BARS = 48
+HISTOGRAM_BINS = 24
+MAX_HEATMAP_CELLS = (18, 32)  # rows, columns
+PALETTE = ["#636EFA", "#EF553B", "#00CC96", "#AB63FA", "#FFA15A",
+           "#19D3F3", "#FF6692", "#B6E880", "#FF97FF", "#FECB52"]
+MANIFESTS = ["manifest.json", "plotly_manifest.json", "dashboard_manifest.json"]
+
+_BAR_TYPES = {"bar", "funnel", "waterfall"}
+_HISTOGRAM_TYPES = {"histogram", "histogram2d"}
+_BOX_TYPES = {"box", "violin"}
+_PIE_TYPES = {"pie", "sunburst", "treemap", "funnelarea"}
+_GRID_TYPES = {"heatmap", "heatmapgl", "contour", "histogram2dcontour", "surface"}
+
+
+def _values(value):
+    """Trace array (list, nested list or typed array) -> numpy array, or None."""
+    if isinstance(value, dict) and isinstance(value.get("bdata"), str):
+        return decode_typed_array(value).astype("float64")
+    if isinstance(value, list) and value:
+        return np.asarray(value, dtype=object)
+    return None
+
+
+def _numeric(arr):
+    """Float array for numeric data; None when the values are categories or dates."""
+    if arr is None:
+        return None
+    if arr.dtype.kind == "f":
+        return arr
+    try:
+        return arr.astype("float64")
+    except (TypeError, ValueError):
+        return None
+
+
+def _color(trace, index):
+    marker = trace.get("marker") or {}
+    for candidate in (marker.get("color"), (trace.get("line") or {}).get("color")):
+        if isinstance(candidate, str):
+            return candidate
+    return PALETTE[index % len(PALETTE)]
+
+
+def _fmt(v):
+    return f"{v:.1f}".rstrip("0").rstrip(".")
+
+
+class _Canvas:
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.parts = []
+
+    def rect(self, x, y, w, h, fill, opacity=None):
+        extra = f' fill-opacity="{opacity}"' if opacity is not None else ""
+        self.parts.append(f'<rect x="{_fmt(x)}" y="{_fmt(y)}" width="{_fmt(max(w, 0.5))}" '
+                          f'height="{_fmt(max(h, 0.5))}" fill="{fill}"{extra}/>')
+
+    def polyline(self, xs, ys, stroke):
+        points = " ".join(f"{_fmt(x)},{_fmt(y)}" for x, y in zip(xs, ys))
+        self.parts.append(f'<polyline points="{points}" fill="none" stroke="{stroke}" '
+                          'stroke-width="1.2" stroke-linejoin="round"/>')
+
+    def line(self, x1, y1, x2, y2, stroke):
+        self.parts.append(f'<line x1="{_fmt(x1)}" y1="{_fmt(y1)}" x2="{_fmt(x2)}" y2="{_fmt(y2)}" '
+                          f'stroke="{stroke}" stroke-width="1"/>')
+
+    def path(self, d, fill):
+        self.parts.append(f'<path d="{d}" fill="{fill}"/>')
+
+    def text(self, x, y, label):
+        label = str(label).replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+        self.parts.append(f'<text x="{_fmt(x)}" y="{_fmt(y)}" font-family="sans-serif" font-size="9" '
+                          f'fill="#6c757d" text-anchor="middle">{label}</text>')
+
+    def svg(self):
+        return (f'<svg xmlns="http://www.w3.org/2000/svg" width="{self.width}" height="{self.height}" '
+                f'viewBox="0 0 {self.width} {self.height}"><rect width="100%" height="100%" fill="#fff"/>'
+                + "".join(self.parts) + "</svg>")
+
+
+def _scale(lo, hi, out_lo, out_hi):
+    span = (hi - lo) or 1.0
+    return lambda v: out_lo + (np.asarray(v, dtype="float64") - lo) / span * (out_hi - out_lo)
+
+
+def _bucket_minmax(x, y, buckets):
+    """Keep the min and max of y per x-bucket so the line keeps its shape at any length."""
+    if len(y) <= 2 * buckets:
+        return x, y
+    edges = np.linspace(0, len(y), buckets + 1).astype(int)
+    keep = []
+    for start, stop in zip(edges[:-1], edges[1:]):
+        seg = y[start:stop]
+        if len(seg) == 0:
+            continue
+        i, j = start + int(np.nanargmin(seg)), start + int(np.nanargmax(seg))
+        keep.extend(sorted({i, j}))
+    keep = np.asarray(keep)
+    return x[keep], y[keep]
+
+
+def _draw_lines(canvas, traces):
+    series = []
+    for index, trace in traces:
+        y = _numeric(_values(trace.get("y")))
+        if y is None:
+            y = _numeric(_values(trace.get("r")))
+        if y is None or not len(y):
+            continue
+        x = _numeric(_values(trace.get("x")))
+        if x is None or len(x) != len(y):
+            x = np.arange(len(y), dtype="float64")
+        ok = np.isfinite(x) & np.isfinite(y)
+        if ok.any():
+            series.append((index, trace, x[ok], y[ok]))
+    if not series:
+        return False
+    xs = np.concatenate([s[2] for s in series])
+    ys = np.concatenate([s[3] for s in series])
+    sx = _scale(xs.min(), xs.max(), PADDING, canvas.width - PADDING)
+    sy = _scale(ys.min(), ys.max(), canvas.height - PADDING, PADDING)
+    for index, trace, x, y in series:
+        order = np.argsort(x, kind="stable")
+        x, y = _bucket_minmax(x[order], y[order], canvas.width // 2)
+        canvas.polyline(sx(x), sy(y), _color(trace, index))
+    return True
+
+
+def _draw_bars(canvas, groups):
+    """groups: [(color, [values...])] drawn as grouped bars over a shared category axis."""
+    groups = [(c, np.nan_to_num(v[:MAX_BARS])) for c, v in groups if v is not None and len(v)]
+    if not groups:
+        return False
+    n_categories = max(len(v) for _, v in groups)
+    top = max(max(v.max() for _, v in groups), 0)
+    bottom = min(min(v.min() for _, v in groups), 0)
+    sy = _scale(bottom, top, canvas.height - PADDING, PADDING)
+    zero = float(sy(0))
+    slot = (canvas.width - 2 * PADDING) / n_categories
+    bar = slot * 0.8 / len(groups)
+    for g, (color, values) in enumerate(groups):
+        for i, v in enumerate(values):
+            x = PADDING + i * slot + slot * 0.1 + g * bar
+            y = float(sy(v))
+            canvas.rect(x, min(y, zero), bar, abs(zero - y), color)
+    return True
+
+
+def _bar_values(trace):
+    horizontal = trace.get("orientation") == "h"
+    values = _numeric(_values(trace.get("x" if horizontal else "y")))
+    if values is None:
+        # Category-only bars (e.g. value counts drawn by Plotly): one unit per category
+        cats = _values(trace.get("y" if horizontal else "x"))
+        values = np.ones(len(cats)) if cats is not None else None
+    return values
+
+
+def _histogram_values(trace):
+    data = _numeric(_values(trace.get("x")))
+    if data is None:
+        data = _numeric(_values(trace.get("y")))
+    if data is None:
+        cats = _values(trace.get("x"))
+        if cats is None:
+            return None
+        _, counts = np.unique(cats.astype(str), return_counts=True)
+        return counts.astype("float64")
+    data = data[np.isfinite(data)]
+    if not len(data):
+        return None
+    counts, _ = np.histogram(data, bins=HISTOGRAM_BINS)
+    return counts.astype("float64")
+
+
+def _draw_boxes(canvas, traces):
+    stats = []
+    for index, trace in traces:
+        data = _numeric(_values(trace.get("y")))
+        if data is None:
+            data = _numeric(_values(trace.get("x")))
+        if data is None:
+            continue
+        data = data[np.isfinite(data)]
+        if len(data):
+            stats.append((_color(trace, index), np.percentile(data, [0, 25, 50, 75, 100])))
+    if not stats:
+        return False
+    lo = min(s[1][0] for s in stats)
+    hi = max(s[1][4] for s in stats)
+    sy = _scale(lo, hi, canvas.height - PADDING, PADDING)
+    slot = (canvas.width - 2 * PADDING) / len(stats)
+    for i, (color, (q0, q1, q2, q3, q4)) in enumerate(stats):
+        cx = PADDING + (i + 0.5) * slot
+        w = slot * 0.5
+        canvas.line(cx, float(sy(q0)), cx, float(sy(q4)), color)
+        canvas.rect(cx - w / 2, float(sy(q3)), w, float(sy(q1)) - float(sy(q3)), color, opacity=0.45)
+        canvas.line(cx - w / 2, float(sy(q2)), cx + w / 2, float(sy(q2)), color)
+    return True
+
+
+def _draw_pie(canvas, trace):
+    values = _numeric(_values(trace.get("values")))
+    if values is None:
+        labels = _values(trace.get("labels"))
+        if labels is None:
+            return False
+        _, values = np.unique(labels.astype(str), return_counts=True)
+        values = values.astype("float64")
+    values = np.clip(np.nan_to_num(values), 0, None)
+    total = values.sum()
+    if total <= 0:
+        return False
+    cx, cy = canvas.width / 2, canvas.height / 2
+    r = min(canvas.width, canvas.height) / 2 - PADDING
+    colors = (trace.get("marker") or {}).get("colors")
+    angle = -np.pi / 2
+    for i, v in enumerate(values):
+        sweep = v / total * 2 * np.pi
+        if sweep <= 0:
+            continue
+        color = colors[i] if isinstance(colors, list) and i < len(colors) and isinstance(colors[i], str) \
+            else PALETTE[i % len(PALETTE)]
+        if sweep >= 2 * np.pi - 1e-9:
+            canvas.parts.append(f'<circle cx="{_fmt(cx)}" cy="{_fmt(cy)}" r="{_fmt(r)}" fill="{color}"/>')
+            break
+        x1, y1 = cx + r * np.cos(angle), cy + r * np.sin(angle)
+        angle += sweep
+        x2, y2 = cx + r * np.cos(angle), cy + r * np.sin(angle)
+        large = 1 if sweep > np.pi else 0
+        canvas.path(f"M{_fmt(cx)},{_fmt(cy)} L{_fmt(x1)},{_fmt(y1)} "
+                    f"A{_fmt(r)},{_fmt(r)} 0 {large} 1 {_fmt(x2)},{_fmt(y2)} Z", color)
+    return True
+
+
+def _draw_grid(canvas, trace):
+    z = _values(trace.get("z"))
+    z = _numeric(z) if z is not None and z.dtype.kind == "f" else None
+    if z is None:
+        raw = trace.get("z")
+        try:
+            z = np.asarray(raw, dtype="float64")
+        except (TypeError, ValueError):
+            return False
+    if z.ndim != 2 or not z.size:
+        return False
+    rows, cols = z.shape
+    max_rows, max_cols = MAX_HEATMAP_CELLS
+    ri = np.linspace(0, rows, min(rows, max_rows) + 1).astype(int)
+    ci = np.linspace(0, cols, min(cols, max_cols) + 1).astype(int)
+    cells = np.array([[np.nanmean(z[r0:r1, c0:c1]) for c0, c1 in zip(ci[:-1], ci[1:])]
+                      for r0, r1 in zip(ri[:-1], ri[1:])])
+    finite = np.isfinite(cells)
+    if not finite.any():
+        return False
+    lo, hi = cells[finite].min(), cells[finite].max()
+    norm = (cells - lo) / ((hi - lo) or 1.0)
+    h = (canvas.height - 2 * PADDING) / cells.shape[0]
+    w = (canvas.width - 2 * PADDING) / cells.shape[1]
+    for r in range(cells.shape[0]):
+        for c in range(cells.shape[1]):
+            if finite[r, c]:
+                # Bottom row of z is drawn at the bottom, as Plotly does
+                canvas.rect(PADDING + c * w, canvas.height - PADDING - (r + 1) * h, w, h,
+                            PALETTE[0], opacity=round(0.1 + 0.9 * float(norm[r, c]), 2))
+    return True
+
+
+def render_svg(fig, width=DEFAULT_WIDTH, height=DEFAULT_HEIGHT) -> str:
+    """Return an SVG preview of a figure dict ({"data": [...], "layout": {...}})."""
+    canvas = _Canvas(width, height)
+    traces = [(i, t) for i, t in enumerate(fig.get("data") or []) if isinstance(t, dict) and t.get("visible", True) is not False]
+    kinds = {}
+    for index, trace in traces:
+        kinds.setdefault(trace.get("type", "scatter"), []).append((index, trace))
+
+    drawn = False
+    if any(k in _PIE_TYPES for k in kinds):
+        drawn = _draw_pie(canvas, next(t for k, ts in kinds.items() if k in _PIE_TYPES for _, t in ts))
+    elif any(k in _GRID_TYPES for k in kinds):
+        drawn = _draw_grid(canvas, next(t for k, ts in kinds.items() if k in _GRID_TYPES for _, t in ts))
+    elif any(k in _BOX_TYPES for k in kinds):
+        drawn = _draw_boxes(canvas, [it for k, ts in kinds.items() if k in _BOX_TYPES for it in ts])
+    elif any(k in _BAR_TYPES or k in _HISTOGRAM_TYPES for k in kinds):
+        groups = []
+        for k, ts in kinds.items():
+            for index, trace in ts:
+                if k in _BAR_TYPES:
+                    groups.append((_color(trace, index), _bar_values(trace)))
+                elif k in _HISTOGRAM_TYPES:
+                    groups.append((_color(trace, index), _histogram_values(trace)))
+        drawn = _draw_bars(canvas, groups)
+    if not drawn:
+        drawn = _draw_lines(canvas, traces)
+    if not drawn:
+        label = traces[0][1].get("type", "scatter") if traces else "empty"
+        canvas.text(width / 2, height / 2 + 3, label)
+    return canvas.svg()
+
+
+def _source_hash(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()[:16]
+
+
+def _chart_id(filename: str) -> str:
+    # Same rule as generate_plot_manifest.py, so ids match manifest.json
+    return filename.replace('.html', '').replace(' ', '-').lower()
+
+
+def _sources(out_path: Path, plots_path: Path):
+    """Yield (chart_id, source_path, load_figure) for every HTML plot and exported figure."""
+    listed = set()
+    try:
+        html_charts = json.loads((out_path / "manifest.json").read_text(encoding="utf-8")).get("charts", [])
+    except (OSError, json.JSONDecodeError):
+        html_charts = []
+    registry = serology_plots.PlotRegistry(manifest_path=out_path / "manifest.json", plots_dir=plots_path)
+    in_repo_plots = plots_path.resolve() == serology_plots._plots_dir().resolve()
+
+    def loader(filename, path):
+        # Registered plots go through get_figure_json(); other files (or another plots_dir) are parsed directly
+        registered = serology_plots.REGISTRY.by_filename(filename) if in_repo_plots else None
+        if registered:
+            return lambda: serology_plots.get_figure_json(registered.key)
+        return lambda: serology_plots.load_plot_json_from_html(path)
+
+    for chart in html_charts:
+        filename = chart.get("source") or chart.get("file", "")
+        listed.add(filename)
+        path = plots_path / filename
+        yield chart.get("id") or _chart_id(filename), path, loader(filename, path)
+    for e in registry:
+        if e.filename not in listed:
+            path = plots_path / e.filename
+            yield _chart_id(e.filename), path, loader(e.filename, path)
+
+    try:
+        figures = json.loads((out_path / "plotly_manifest.json").read_text(encoding="utf-8")).get("charts", [])
+    except (OSError, json.JSONDecodeError):
+        figures = []
+    for chart in figures:
+        path = out_path / chart["file"]
+        yield chart["id"], path, lambda path=path: json.loads(path.read_text(encoding="utf-8"))
+
+
+def _update_manifests(out_path: Path, index: dict) -> None:
+    for name in MANIFESTS:
+        path = out_path / name
+        try:
+            manifest = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            continue
+        changed = False
+        for chart in manifest.get("charts", []):
+            entry = index.get(chart.get("id"))
+            if entry and chart.get("thumbnail") != f"{THUMBS_DIRNAME}/{entry['file']}":
+                chart["thumbnail"] = f"{THUMBS_DIRNAME}/{entry['file']}"
+                changed = True
+        if changed:
+            path.write_text(json.dumps(manifest, indent=2, ensure_ascii=False), encoding="utf-8")
+            print(f"Updated thumbnails in {path}")
+
+
+def make_thumbnails(out_dir="docs/assets/plots", plots_dir="docs/plots",
+                    width=DEFAULT_WIDTH, height=DEFAULT_HEIGHT, retain=DEFAULT_RETAIN) -> dict:
+    """Render (or reuse) a thumbnail per chart, update the manifests and return the index."""
+    out_path = Path(out_dir)
+    plots_path = Path(plots_dir)
+    thumbs_dir = out_path / THUMBS_DIRNAME
+    thumbs_dir.mkdir(parents=True, exist_ok=True)
+    index = load_index(thumbs_dir)
+    params = f"{width}x{height}/v{RENDER_VERSION}"
+
+    for chart_id, path, load_figure in _sources(out_path, plots_path):
+        try:
+            source_hash = _source_hash(path.read_bytes())
+        except FileNotFoundError:
+            continue
+        cached = index.get(chart_id)
+        if (cached and cached.get("source") == source_hash and cached.get("params") == params
+                and (thumbs_dir / cached["file"]).exists()):
+            print(f"  = {chart_id} (cached)")
+            continue
+        try:
+            fig = load_figure()
+        except Exception as e:
+            print(f"  ✗ {chart_id}: {e}")
+            continue
+        svg = render_svg(fig, width, height)
+        name = publish(thumbs_dir, f"{chart_id}.svg", svg.encode("utf-8"))
+        collect_garbage(thumbs_dir, f"{chart_id}.svg", retain)
+        index[chart_id] = {"source": source_hash, "params": params, "file": name}
+        print(f"  ✓ {chart_id} -> {THUMBS_DIRNAME}/{name} ({len(svg)} bytes)")
+
+    (thumbs_dir / INDEX_FILENAME).write_text(json.dumps(index, indent=2, sort_keys=True), encoding="utf-8")
+    _update_manifests(out_path, index)
+    return index
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Render SVG thumbnails for the plot gallery.")
+    parser.add_argument("out_dir", nargs="?", default="docs/assets/plots", help="Directory holding the manifests")
+    parser.add_argument("--plots-dir", default="docs/plots", help="Directory with the saved Plotly HTML plots")
+    parser.add_argument("--width", type=int, default=DEFAULT_WIDTH)
+    parser.add_argument("--height", type=int, default=DEFAULT_HEIGHT)
+    parser.add_argument("--retain", type=int, default=DEFAULT_RETAIN,
+                        help="Thumbnail versions to keep per chart")
+    args = parser.parse_args()
+
+    make_thumbnails(args.out_dir, args.plots_dir, args.width, args.height, args.retain)
@@ -0,0 +1,102 @@
+"""
+Shared normalization of serostatus and vaccination yes/no columns into int8 codes.
+
+Raw values differ between waves and sources: X20_21_serostatus holds labels such
+as "seropositive", the later *_nc_qualitative columns hold 0/1 floats, and CSV
+round-trips turn those into "0.0"/"1.0" strings. Every such column is encoded as
+
+    MISSING  = -1  (NaN / empty)
+    NEGATIVE =  0  (seronegative / no)
+    POSITIVE =  1  (seropositive / yes)
+    OTHER    =  2  (present but not in the vocabulary)
+
+in one vectorized pass: pd.factorize() finds the distinct values, only those are
+looked up in the vocabulary, and the resulting table is indexed with the
+factorized codes. The per-row cost is a single NumPy gather, independent of how
+values are spelled.
+"""
+import re
+
+import numpy as np
+import pandas as pd
+
+from data_catalog import CATALOG_BY_NAME
+
+MISSING = -1
+NEGATIVE = 0
+POSITIVE = 1
+OTHER = 2
+N_CODES = 3  # non-missing codes, for bincount layouts
+
+SEROSTATUS_LABELS = {NEGATIVE: "seronegative", POSITIVE: "seropositive"}
+
+_SERO_NEGATIVE = {"0", "false", "f", "no", "n", "seronegative", "negative", "neg", "-", "non-reactive", "nonreactive"}
+_SERO_POSITIVE = {"1", "true", "t", "yes", "y", "seropositive", "positive", "pos", "+", "reactive"}
+SEROSTATUS_VOCABULARY = {**{t: NEGATIVE for t in _SERO_NEGATIVE}, **{t: POSITIVE for t in _SERO_POSITIVE}}
+
+_NO = {"0", "false", "f", "no", "n", "nein"}
+_YES = {"1", "true", "t", "yes", "y", "ja"}
+YES_NO_VOCABULARY = {**{t: NEGATIVE for t in _NO}, **{t: POSITIVE for t in _YES}}
+
+_SEROSTATUS_RE = re.compile(r"(serostatus|_qualitative)$", re.IGNORECASE)
+_YES_NO_RE = re.compile(r"vacc.*_yn$", re.IGNORECASE)
+
+
+def is_serostatus_column(name: str) -> bool:
+    return _SEROSTATUS_RE.search(name) is not None
+
+
+def is_yes_no_column(name: str) -> bool:
+    """Vaccination flags: *vacc*_yn columns and vaccination checkboxes of the data catalog."""
+    if _YES_NO_RE.search(name):
+        return True
+    field = CATALOG_BY_NAME.get(name)
+    return field is not None and field["type"] == "checkbox" and "vacc" in name.lower()
+
+
+def token(value) -> str:
+    """Canonical lookup key: 1, 1.0, "1.0" and " 1 " all become "1"; labels are lower-cased."""
+    if isinstance(value, (bool, np.bool_)):
+        return "1" if value else "0"
+    if isinstance(value, (int, float, np.integer, np.floating)):
+        value = float(value)
+        return str(int(value)) if value.is_integer() else repr(value)
+    s = str(value).strip().lower()
+    try:
+        f = float(s)
+    except ValueError:
+        return s
+    return str(int(f)) if f.is_integer() else s
+
+
+def encode(values, vocabulary) -> np.ndarray:
+    """Encode one column as int8 codes using vocabulary (token -> code); unknown values become OTHER."""
+    codes, uniques = pd.factorize(values, use_na_sentinel=True)
+    # One lookup per distinct value; the extra last slot receives factorize's -1 (missing)
+    table = np.empty(len(uniques) + 1, dtype="int8")
+    for i, value in enumerate(uniques):
+        table[i] = vocabulary.get(token(value), OTHER)
+    table[-1] = MISSING
+    return table[codes]
+
+
+def encode_serostatus(values) -> np.ndarray:
+    return encode(values, SEROSTATUS_VOCABULARY)
+
+
+def encode_yes_no(values) -> np.ndarray:
+    return encode(values, YES_NO_VOCABULARY)
+
+
+def normalize_frame(df: pd.DataFrame, columns=None) -> pd.DataFrame:
+    """
+    Return a DataFrame (same index) with the int8 codes of every serostatus and
+    vaccination yes/no column of df, or of `columns` when given.
+    """
+    if columns is None:
+        columns = [c for c in df.columns if is_serostatus_column(c) or is_yes_no_column(c)]
+    out = {}
+    for name in columns:
+        vocabulary = SEROSTATUS_VOCABULARY if is_serostatus_column(name) else YES_NO_VOCABULARY
+        out[name] = encode(df[name], vocabulary)
+    return pd.DataFrame(out, index=df.index)
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Longitudinal participant x wave index: which study waves every participant
+(merge_id) took part in, as one bitmask byte per participant.
+
+Bit i of a mask is set when the participant has a value in any catalog column of
+WAVES[i] (identifier columns excluded); rows sharing a merge_id are combined, so
+wide and long extracts, and CSV chunks, give the same index. Participants are
+kept sorted by merge_id next to a uint8 array of their masks, and every query is
+vectorized over those arrays: participation counts and wave-to-wave retention
+come from the 2^len(WAVES)-bin histogram of the masks, cohorts (present in waves
+A and B, optionally absent from C) from one mask test over all participants.
+
+The index is written as one JSON file holding packed arrays: the masks as a
+base64 u1 typed array, numeric merge_ids as the first id plus the shortest
+exact encoding of the (small) gaps between sorted ids (see
+figure_compaction.encode_array). Non-numeric merge_ids are stored as a list.
+
+Usage:
+    python3 participation_index.py <df3.csv> [out.json] [--chunksize N] [--cohort s22,s23] [--absent w22]
+
+Default:
+    python3 participation_index.py docs/data/df3_full_for_pivot.csv docs/data/participation_index.json
+"""
+import base64
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from data_catalog import DATA_CATALOG
+from figure_compaction import decode_array, decode_typed_array, dumps_compact, encode_array
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "python"))
+import tracing  # noqa: E402
+from tracing import span  # noqa: E402
+
+INDEX_VERSION = 1
+ID_COLUMN = "merge_id"
+# Study waves in order; WAVES[i] is bit i of a participation mask (at most 8 waves)
+WAVES = ["X20_21", "s22", "w22", "s23", "s24"]
+DEFAULT_CHUNKSIZE = 250_000
+
+
+def wave_columns(columns=None, waves=WAVES) -> dict:
+    """{wave: catalog columns of that wave}, limited to `columns` when given; identifiers are not evidence."""
+    available = None if columns is None else set(columns)
+    out = {}
+    for wave in waves:
+        prefix = f"{wave}_".lower()
+        out[wave] = [f["name"] for f in DATA_CATALOG
+                     if f["section"] != "Identifiers" and f["name"].lower().startswith(prefix)
+                     and (available is None or f["name"] in available)]
+    return out
+
+
+def _normalize_ids(ids) -> np.ndarray:
+    """merge_ids as int64 when they are all whole numbers, else as strings."""
+    numeric = pd.to_numeric(pd.Series(ids), errors="coerce")
+    values = numeric.to_numpy(dtype=np.float64)
+    if len(values) and np.isfinite(values).all() and np.array_equal(values, np.round(values)):
+        return values.astype(np.int64)
+    return pd.Series(ids).astype(str).to_numpy(dtype=object)
+
+
+def _combine(ids: np.ndarray, masks: np.ndarray) -> tuple:
+    """Sort by id and OR together the masks of repeated ids. Returns (unique ids, masks)."""
+    if not len(ids):
+        return ids, masks
+    order = np.argsort(ids, kind="stable")
+    ids, masks = ids[order], masks[order]
+    starts = np.flatnonzero(np.concatenate(([True], ids[1:] != ids[:-1])))
+    return ids[starts], np.bitwise_or.reduceat(masks, starts)
+
+
+class ParticipationIndex:
+    """Sorted merge_ids and their wave bitmasks (uint8), with vectorized queries."""
+
+    def __init__(self, ids=None, masks=None, waves=WAVES, rows: int = 0):
+        if len(waves) > 8:
+            raise ValueError(f"At most 8 waves fit in a uint8 mask, got {len(waves)}")
+        self.waves = list(waves)
+        self.ids = np.asarray(ids if ids is not None else np.empty(0, dtype=np.int64))
+        self.masks = np.asarray(masks if masks is not None else np.empty(0, dtype=np.uint8), dtype=np.uint8)
+        self.rows = rows
+        self._patterns = None
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, waves=WAVES) -> "ParticipationIndex":
+        """Index the rows of df; rows without a merge_id are skipped."""
+        if ID_COLUMN not in df.columns:
+            raise ValueError(f"Column {ID_COLUMN!r} not found")
+        with span("participation_masks", rows=len(df)):
+            masks = np.zeros(len(df), dtype=np.uint8)
+            for bit, columns in enumerate(wave_columns(df.columns, waves).values()):
+                if columns:
+                    present = df[columns].notna().any(axis=1).to_numpy()
+                    masks |= present.astype(np.uint8) << np.uint8(bit)
+            keyed = df[ID_COLUMN].notna().to_numpy()
+            ids, masks = _combine(_normalize_ids(df[ID_COLUMN].to_numpy()[keyed]), masks[keyed])
+        return cls(ids, masks, waves, rows=len(df))
+
+    def merge(self, other: "ParticipationIndex") -> "ParticipationIndex":
+        """Fold other into self (masks of shared merge_ids are OR-ed) and return self."""
+        if other.waves != self.waves:
+            raise ValueError(f"Cannot merge indexes over different waves: {self.waves} vs {other.waves}")
+        ids = np.concatenate([self.ids, other.ids])
+        if ids.dtype == object:
+            ids = np.array([str(v) for v in ids], dtype=object)
+        self.ids, self.masks = _combine(ids, np.concatenate([self.masks, other.masks]))
+        self.rows += other.rows
+        self._patterns = None
+        return self
+
+    def _bits(self, waves) -> int:
+        unknown = [w for w in waves if w not in self.waves]
+        if unknown:
+            raise KeyError(f"Unknown wave(s) {unknown} (expected some of {self.waves})")
+        return sum(1 << self.waves.index(w) for w in waves)
+
+    def pattern_counts(self) -> np.ndarray:
+        """Participants per mask value (2^len(waves) bins)."""
+        if self._patterns is None:
+            self._patterns = np.bincount(self.masks, minlength=1 << len(self.waves))
+        return self._patterns
+
+    def _pattern_bits(self) -> np.ndarray:
+        patterns = np.arange(1 << len(self.waves))
+        return (patterns[:, None] >> np.arange(len(self.waves))) & 1
+
+    def participation_counts(self) -> dict:
+        """Participants per wave and the number of participants who took part in 0..len(waves) waves."""
+        counts = self.pattern_counts()
+        bits = self._pattern_bits()
+        per_wave = counts @ bits
+        attended = np.bincount(bits.sum(axis=1), weights=counts, minlength=len(self.waves) + 1)
+        return {
+            "participants": int(len(self.ids)),
+            "per_wave": {w: int(n) for w, n in zip(self.waves, per_wave)},
+            "waves_attended": [int(n) for n in attended],
+        }
+
+    def retention_matrix(self, normalize: bool = False) -> np.ndarray:
+        """
+        (waves x waves) matrix: entry [a, b] counts participants in both wave a and wave b
+        (the diagonal is each wave's size). normalize=True divides row a by the size of
+        wave a, giving the share of wave a's participants who also took part in wave b.
+        """
+        counts = self.pattern_counts()
+        bits = self._pattern_bits()
+        both = bits.T @ (bits * counts[:, None])
+        if not normalize:
+            return both
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return both / np.diag(both)[:, None]
+
+    def cohort_mask(self, present=(), absent=()) -> np.ndarray:
+        """Boolean array over participants: in every wave of `present` and none of `absent`."""
+        need, avoid = self._bits(present), self._bits(absent)
+        return ((self.masks & np.uint8(need)) == need) & ((self.masks & np.uint8(avoid)) == 0)
+
+    def cohort(self, present=(), absent=()) -> np.ndarray:
+        """merge_ids of the participants in every wave of `present` and none of `absent`."""
+        return self.ids[self.cohort_mask(present, absent)]
+
+    def cohort_size(self, present=(), absent=()) -> int:
+        """Size of cohort(present, absent), read from the mask histogram."""
+        need, avoid = self._bits(present), self._bits(absent)
+        patterns = np.arange(1 << len(self.waves))
+        return int(self.pattern_counts()[((patterns & need) == need) & ((patterns & avoid) == 0)].sum())
+
+    def lookup(self, ids) -> np.ndarray:
+        """Masks of the given merge_ids (0 for unknown ids)."""
+        ids = _normalize_ids(ids) if self.ids.dtype != object else np.asarray([str(v) for v in ids], dtype=object)
+        if not len(self.ids):
+            return np.zeros(len(ids), dtype=np.uint8)
+        pos = np.clip(np.searchsorted(self.ids, ids), 0, len(self.ids) - 1)
+        return np.where(self.ids[pos] == ids, self.masks[pos], 0).astype(np.uint8)
+
+    def to_dict(self) -> dict:
+        if self.ids.dtype == object:
+            ids = {"values": [str(v) for v in self.ids]}
+        else:
+            ids = {"start": int(self.ids[0]) if len(self.ids) else 0, "gaps": encode_array(np.diff(self.ids))}
+        return {
+            "version": INDEX_VERSION,
+            "waves": self.waves,
+            "rows": self.rows,
+            "participants": int(len(self.ids)),
+            "ids": ids,
+            "masks": {"dtype": "u1", "bdata": base64.b64encode(self.masks.tobytes()).decode("ascii")},
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ParticipationIndex":
+        if data.get("version") != INDEX_VERSION:
+            raise ValueError(f"Unsupported participation index version {data.get('version')!r}")
+        masks = decode_typed_array(data["masks"]).astype(np.uint8)
+        if "values" in data["ids"]:
+            ids = np.array(data["ids"]["values"], dtype=object)
+        elif data["participants"]:
+            gaps = decode_array(data["ids"]["gaps"]).astype(np.int64)
+            ids = np.concatenate(([data["ids"]["start"]], data["ids"]["start"] + np.cumsum(gaps)))
+        else:
+            ids = np.empty(0, dtype=np.int64)
+        return cls(ids, masks, data["waves"], rows=data["rows"])
+
+
+def index_csv(csv_path: str | os.PathLike, chunksize: int = DEFAULT_CHUNKSIZE, waves=WAVES) -> ParticipationIndex:
+    """Stream csv_path in chunks, reading only merge_id and the wave columns."""
+    wanted = {ID_COLUMN, *(c for columns in wave_columns(None, waves).values() for c in columns)}
+    index = ParticipationIndex(waves=waves)
+    with span("index_csv", path=str(csv_path), chunksize=chunksize):
+        reader = pd.read_csv(csv_path, usecols=lambda c: c in wanted, chunksize=chunksize, low_memory=False)
+        for chunk in reader:
+            index.merge(ParticipationIndex.from_frame(chunk, waves))
+    return index
+
+
+def load_index(path) -> ParticipationIndex:
+    return ParticipationIndex.from_dict(json.loads(Path(path).read_text(encoding="utf-8")))
+
+
+def write_index(path, index: ParticipationIndex) -> int:
+    """Write the index atomically; returns the file size in bytes."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    text = dumps_compact(index.to_dict())
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    tmp_path.write_text(text, encoding="utf-8")
+    os.replace(tmp_path, path)
+    return len(text.encode("utf-8"))
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Build the participant x wave index keyed on merge_id.")
+    parser.add_argument("csv_path", help="Path to the df3 CSV")
+    parser.add_argument("out_path", nargs="?", default="docs/data/participation_index.json", help="Output JSON")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE, help="Rows per CSV chunk")
+    parser.add_argument("--cohort", default=None, help="Comma-separated waves a cohort must have taken part in")
+    parser.add_argument("--absent", default=None, help="With --cohort: comma-separated waves it must have missed")
+    parser.add_argument("--trace", metavar="PATH",
+                        help="Write Chrome trace-event JSON with per-stage timings and peak memory to PATH")
+    args = parser.parse_args()
+
+    if args.trace:
+        tracing.enable(args.trace)
+
+    start = time.perf_counter()
+    index = index_csv(args.csv_path, args.chunksize)
+    size = write_index(args.out_path, index)
+    out = {
+        "output": args.out_path, "rows": index.rows, "bytes": size,
+        "seconds": round(time.perf_counter() - start, 3),
+        **index.participation_counts(),
+        "retention": {a: {b: None if np.isnan(r) else round(float(r), 4) for b, r in zip(index.waves, row)}
+                      for a, row in zip(index.waves, index.retention_matrix(normalize=True))},
+    }
+    if args.cohort:
+        try:
+            present = args.cohort.split(",")
+            absent = args.absent.split(",") if args.absent else []
+            out["cohort"] = {"present": present, "absent": absent, "size": index.cohort_size(present, absent)}
+        except KeyError as e:
+            print(f"Error: {e.args[0]}", file=sys.stderr)
+            sys.exit(1)
+    print(json.dumps(out, indent=2))
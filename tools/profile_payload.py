@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Profile what the dashboard downloads: size, gzip size and decode cost of every asset.
+
+Every JSON, HTML, CSV, packed .bin and SVG asset under the given directories is
+listed with its raw size and gzip size (level 9, as compress_assets.py serves it;
+an up-to-date .gz sibling is measured instead of recompressing). Figures (saved
+Plotly HTML via serology_plots.load_plot_json_from_html, exported figure JSON)
+also get their trace and point counts, the time to decode them in Python, the
+bytes of their data/layout/config parts and the layout and template keys that
+take the most bytes. Manifest entries supply chart ids and titles. The worst
+offenders are ranked by gzip size.
+
+A budget file caps figures by bytes, gzip_bytes, points or traces; the exit
+status is 1 when any figure exceeds its budget:
+
+    {"default": {"bytes": 5000000, "points": 200000},
+     "figures": {"vaccination-coverage": {"gzip_bytes": 2000}, "NPI.html": {"points": 50000}}}
+
+Entries under "figures" are keyed by chart id or file name and override "default".
+
+Usage:
+    python3 profile_payload.py [dir ...] [--budget budgets.json] [--top N] [--json report.json]
+
+Default:
+    python3 profile_payload.py docs/assets/plots docs/plots docs/data --top 15
+"""
+import json
+import sys
+import time
+from pathlib import Path
+
+from compress_assets import DEFAULT_DIRS, _gzip_bytes, _iter_assets, is_fresh
+from figure_compaction import dumps_compact
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "python"))
+import serology_plots  # noqa: E402
+
+MANIFESTS = ["manifest.json", "plotly_manifest.json", "dashboard_manifest.json"]
+BUDGET_KEYS = ("bytes", "gzip_bytes", "points", "traces")
+DEFAULT_TOP = 15
+TOP_KEYS = 5
+
+
+def _gzip_size(path: Path, raw: bytes) -> int:
+    gz_path = path.with_name(path.name + ".gz")
+    if is_fresh(path, gz_path):
+        return gz_path.stat().st_size
+    return len(_gzip_bytes(raw))
+
+
+def _json_bytes(value) -> int:
+    return len(dumps_compact(value).encode("utf-8"))
+
+
+def _chart_index(paths) -> dict:
+    """{file name: {"id", "title", "manifest"}} from every manifest among paths."""
+    charts = {}
+    for path in paths:
+        if path.name not in MANIFESTS:
+            continue
+        try:
+            manifest = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Warning: could not read {path}: {e}")
+            continue
+        for chart in manifest.get("charts", []):
+            for name in {chart.get("file"), chart.get("source")} - {None}:
+                charts.setdefault(Path(name).name, {"id": chart.get("id"), "title": chart.get("title"),
+                                                    "manifest": path.name})
+    return charts
+
+
+def _template_key_sizes(template: dict) -> dict:
+    sizes = {}
+    for part in ("data", "layout"):
+        for key, value in (template.get(part) or {}).items():
+            sizes[f"template.{part}.{key}"] = _json_bytes(value)
+    return sizes
+
+
+def layout_key_sizes(fig: dict) -> list:
+    """[(key, bytes)] of the figure's layout keys, largest first; the template is split per key."""
+    sizes = {}
+    for key, value in (fig.get("layout") or {}).items():
+        if key == "template" and isinstance(value, dict):
+            sizes.update(_template_key_sizes(value))
+        else:
+            sizes[f"layout.{key}"] = _json_bytes(value)
+    return sorted(sizes.items(), key=lambda kv: -kv[1])
+
+
+def _load_figure(path: Path, raw: bytes):
+    """(figure dict or None, decode seconds). HTML without a Plotly.newPlot call is not a figure."""
+    start = time.perf_counter()
+    if path.suffix.lower() == ".html":
+        if b"Plotly.newPlot" not in raw:
+            return None, 0.0
+        serology_plots.load_plot_json_from_html.cache_clear()
+        try:
+            fig = serology_plots.load_plot_json_from_html(path)
+        finally:
+            serology_plots.load_plot_json_from_html.cache_clear()
+    else:
+        fig = json.loads(raw)
+    return fig, time.perf_counter() - start
+
+
+def profile_asset(path: Path, chart: dict | None = None) -> dict:
+    """Profile one asset; figure fields are only present for figures."""
+    raw = path.read_bytes()
+    record = {"file": str(path), "kind": path.suffix.lower().lstrip("."),
+              "bytes": len(raw), "gzip_bytes": _gzip_size(path, raw)}
+    if chart:
+        record.update(id=chart["id"], title=chart["title"])
+    if path.suffix.lower() not in (".json", ".html"):
+        return record
+    try:
+        fig, seconds = _load_figure(path, raw)
+    except (ValueError, json.JSONDecodeError) as e:
+        record["error"] = str(e)
+        return record
+    if fig is None:
+        return record
+    record["decode_ms"] = round(seconds * 1000, 2)
+    if isinstance(fig, dict) and isinstance(fig.get("data"), list):
+        record["kind"] = "figure"
+        record.update(serology_plots.figure_stats(fig))
+        record["parts"] = {part: _json_bytes(fig[part]) for part in ("data", "layout", "config") if part in fig}
+        record["top_keys"] = layout_key_sizes(fig)[:TOP_KEYS]
+    return record
+
+
+def profile_payload(dirs=None) -> list:
+    """Profile every asset under dirs (default: compress_assets.DEFAULT_DIRS)."""
+    paths = list(_iter_assets(dirs or DEFAULT_DIRS))
+    charts = _chart_index(paths)
+    records = []
+    for path in paths:
+        if path.name.endswith(".tmp"):
+            continue
+        records.append(profile_asset(path, charts.get(path.name)))
+    return records
+
+
+def load_budgets(budget_path) -> dict:
+    budgets = json.loads(Path(budget_path).read_text(encoding="utf-8"))
+    for limits in [budgets.get("default", {}), *budgets.get("figures", {}).values()]:
+        unknown = set(limits) - set(BUDGET_KEYS)
+        if unknown:
+            raise ValueError(f"Unknown budget key(s) {sorted(unknown)} in {budget_path} (expected {BUDGET_KEYS})")
+    return budgets
+
+
+def check_budgets(records: list, budgets: dict) -> list:
+    """Budget violations of the figures in records, as human-readable strings."""
+    default = budgets.get("default", {})
+    per_figure = budgets.get("figures", {})
+    violations = []
+    for record in records:
+        if record.get("kind") != "figure":
+            continue
+        name = Path(record["file"]).name
+        limits = {**default, **per_figure.get(name, {}), **per_figure.get(record.get("id"), {})}
+        for key, limit in limits.items():
+            if record.get(key, 0) > limit:
+                violations.append(f"{record['file']}: {key} {record[key]:,} exceeds budget {limit:,}")
+    return violations
+
+
+def print_report(records: list, top: int = DEFAULT_TOP) -> None:
+    ranked = sorted(records, key=lambda r: -r["gzip_bytes"])
+    print(f"{'asset':<56} {'bytes':>13} {'gzip':>11} {'traces':>6} {'points':>10} {'decode ms':>10}  largest key")
+    for r in ranked[:top]:
+        largest = r["top_keys"][0] if r.get("top_keys") else None
+        print(f"{r['file'][-56:]:<56} {r['bytes']:>13,} {r['gzip_bytes']:>11,} "
+              f"{r.get('traces', '-'):>6} {r.get('points', '-'):>10} {r.get('decode_ms', '-'):>10}  "
+              + (f"{largest[0]} ({largest[1]:,} B)" if largest else ""))
+    figures = [r for r in records if r.get("kind") == "figure"]
+    print(f"{len(records)} assets, {sum(r['bytes'] for r in records):,} bytes "
+          f"({sum(r['gzip_bytes'] for r in records):,} gzipped); {len(figures)} figures, "
+          f"{sum(r['points'] for r in figures):,} points")
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Report size, gzip size and decode cost of dashboard assets.")
+    parser.add_argument("dirs", nargs="*", default=DEFAULT_DIRS, help="Asset directories to scan")
+    parser.add_argument("--budget", metavar="PATH", help="JSON budget file; exit 1 when a figure exceeds it")
+    parser.add_argument("--top", type=int, default=DEFAULT_TOP, help="Assets to list, largest gzip size first")
+    parser.add_argument("--json", metavar="PATH", help="Also write the full per-asset report as JSON to PATH")
+    args = parser.parse_args()
+
+    budgets = load_budgets(args.budget) if args.budget else None
+    records = profile_payload(args.dirs)
+    if not records:
+        print(f"No assets found in {', '.join(str(d) for d in args.dirs)}")
+    else:
+        print_report(records, args.top)
+    violations = check_budgets(records, budgets) if budgets else []
+    if args.json:
+        Path(args.json).write_text(json.dumps({"assets": records, "violations": violations}, indent=2),
+                                   encoding="utf-8")
+    for violation in violations:
+        print(f"Over budget: {violation}")
+    if violations:
+        sys.exit(1)
@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+"""
+Mergeable quantile sketches of every numeric catalog column, overall and per
+category of every categorical column, so box-plot statistics for any union of
+strata come from merging a few small sketches instead of sorting all values.
+
+The sketch is KLL (Karnin, Lang, Liberty 2016): level h holds values of weight
+2^h, and a level over its capacity (k * (2/3)^depth, at least 2) is sorted and
+every other value, starting at a random offset, is promoted to level h + 1.
+Merging two sketches concatenates their levels and compacts, so a merged sketch
+is as accurate as one built over the union. Min, max, count and sum are exact;
+while a sketch holds no more than k values nothing is compacted and quantiles
+are exact (with the interpolation of quantile() in docs/index.html).
+
+Error bound: a compaction at level h moves the estimated rank of any value by
+0 or +-2^h with equal probability, independently of the others. With V the sum
+of 4^h over all compactions of a sketch (kept in the sketch, and added up on
+merge), Hoeffding's inequality gives, for any single quantile,
+
+    P(|estimated rank - true rank| > t) <= 2 exp(-t^2 / (2 V)),
+
+so rank_error(delta) = sqrt(2 V ln(2 / delta)) / n bounds the normalized rank
+error with probability 1 - delta (divide delta by the number of quantiles to
+cover them all at once). For k = 200 this is about 2% of n at delta = 0.01;
+--verify compares it with the error measured against exact sorting.
+
+The sketches are written as one JSON file; sketch levels use the shortest exact
+encoding of figure_compaction.encode_array (small integer columns become i1/i2
+typed arrays).
+
+Usage:
+    python3 quantile_sketches.py <df3.csv> [out.json] [--k 200] [--chunksize N]
+                                 [--columns a,b] [--strata a,b] [--verify]
+
+Default:
+    python3 quantile_sketches.py docs/data/df3_full_for_pivot.csv docs/data/quantile_sketches.json
+"""
+import json
+import math
+import os
+import sys
+import time
+import zlib
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from data_catalog import CATEGORICAL_COLUMNS, NUMERIC_COLUMNS
+from figure_compaction import decode_array, dumps_compact, encode_array
+from normalization import token
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "python"))
+import tracing  # noqa: E402
+from tracing import span  # noqa: E402
+
+SKETCHES_VERSION = 1
+DEFAULT_K = 200
+DEFAULT_DELTA = 0.01
+DEFAULT_CHUNKSIZE = 250_000
+CAPACITY_DECAY = 2 / 3
+BOX_QUANTILES = (0.25, 0.5, 0.75)
+
+
+class KLLSketch:
+    """KLL quantile sketch of float values; see the module docstring for the error bound."""
+
+    def __init__(self, k: int = DEFAULT_K, seed=(0,)):
+        self.k = k
+        self.seed = tuple(seed)
+        self.n = 0
+        self.min = math.inf
+        self.max = -math.inf
+        self.sum = 0.0
+        self.compactions = 0
+        self.variance = 0  # sum of 4^h over compactions
+        self.levels = [np.empty(0)]
+
+    def _capacity(self, h: int) -> int:
+        return max(2, math.ceil(self.k * CAPACITY_DECAY ** (len(self.levels) - 1 - h)))
+
+    def _compress(self) -> None:
+        h = 0
+        while h < len(self.levels):
+            level = self.levels[h]
+            if len(level) > self._capacity(h):
+                if h + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                level = np.sort(level)
+                odd = len(level) % 2  # an odd value out stays at this level
+                offset = int(np.random.default_rng([*self.seed, self.compactions]).integers(2))
+                self.levels[h + 1] = np.concatenate([self.levels[h + 1], level[odd + offset::2]])
+                self.levels[h] = level[:odd]
+                self.compactions += 1
+                self.variance += 4 ** h
+            h += 1
+
+    def update(self, values) -> "KLLSketch":
+        """Add values (NaN is skipped) and return self."""
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if len(values):
+            self.n += len(values)
+            self.min = min(self.min, float(values.min()))
+            self.max = max(self.max, float(values.max()))
+            self.sum += float(values.sum())
+            self.levels[0] = np.concatenate([self.levels[0], values])
+            self._compress()
+        return self
+
+    def merge(self, other: "KLLSketch") -> "KLLSketch":
+        """Fold other into self in place and return self."""
+        if other.k != self.k:
+            raise ValueError(f"Cannot merge KLL sketches with different k ({self.k} and {other.k})")
+        self.n += other.n
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.sum += other.sum
+        self.compactions += other.compactions
+        self.variance += other.variance
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for h, level in enumerate(other.levels):
+            self.levels[h] = np.concatenate([self.levels[h], level])
+        self._compress()
+        return self
+
+    def rank_error(self, delta: float = DEFAULT_DELTA) -> float:
+        """Normalized rank error bound of a single quantile, with probability 1 - delta."""
+        if not self.n:
+            return 0.0
+        return math.sqrt(2 * self.variance * math.log(2 / delta)) / self.n
+
+    def quantiles(self, qs) -> np.ndarray:
+        """Estimated quantiles (NaN for an empty sketch)."""
+        qs = np.asarray(qs, dtype=np.float64)
+        if not self.n:
+            return np.full(qs.shape, np.nan)
+        if len(self.levels) == 1:
+            return np.quantile(self.levels[0], qs)
+        values = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(level), 1 << h, dtype=np.int64) for h, level in enumerate(self.levels)])
+        order = np.argsort(values, kind="stable")
+        values, cumulative = values[order], np.cumsum(weights[order])
+        picked = values[np.minimum(np.searchsorted(cumulative, qs * self.n), len(values) - 1)]
+        return np.where(qs <= 0, self.min, np.where(qs >= 1, self.max, picked))
+
+    def box_stats(self) -> dict:
+        """Plotly box statistics: n, mean, min, q1, median, q3, max and Tukey fences."""
+        if not self.n:
+            return {"n": 0}
+        q1, median, q3 = (float(v) for v in self.quantiles(BOX_QUANTILES))
+        low, high = q1 - 1.5 * (q3 - q1), q3 + 1.5 * (q3 - q1)
+        values = np.concatenate([*self.levels, [self.min, self.max]])
+        return {
+            "n": self.n, "mean": self.sum / self.n, "min": self.min, "q1": q1, "median": median, "q3": q3,
+            "max": self.max, "lowerfence": float(values[values >= low].min()),
+            "upperfence": float(values[values <= high].max()),
+        }
+
+    def to_dict(self) -> dict:
+        return {
+            "k": self.k, "seed": list(self.seed), "n": self.n,
+            "min": self.min if self.n else None, "max": self.max if self.n else None, "sum": self.sum,
+            "compactions": self.compactions, "variance": self.variance,
+            "levels": [encode_array(level) for level in self.levels],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "KLLSketch":
+        sketch = cls(data["k"], data["seed"])
+        sketch.n = data["n"]
+        if sketch.n:
+            sketch.min, sketch.max = data["min"], data["max"]
+        sketch.sum = data["sum"]
+        sketch.compactions = data["compactions"]
+        sketch.variance = data["variance"]
+        sketch.levels = [decode_array(level) for level in data["levels"]]
+        return sketch
+
+
+def _seed(column: str, stratum_column: str | None, value: str | None, part: int):
+    # Distinct per sketch and per chunk, so merged sketches never share offsets
+    return zlib.crc32(f"{column}\0{stratum_column}\0{value}".encode("utf-8")), part
+
+
+def build_sketches(df: pd.DataFrame, columns=None, strata=None, k: int = DEFAULT_K, part: int = 0) -> dict:
+    """
+    {column: {"all": sketch, "strata": {stratum column: {value token: sketch}}}} for the
+    numeric `columns` (default: catalog NUMERIC_COLUMNS present in df) and categorical
+    `strata` (default: catalog CATEGORICAL_COLUMNS present in df). Rows with a missing
+    stratum value only enter "all". `part` distinguishes chunks of one dataset.
+    """
+    columns = [c for c in (columns or NUMERIC_COLUMNS) if c in df.columns]
+    strata = [c for c in (strata or CATEGORICAL_COLUMNS) if c in df.columns]
+    groupings = {}
+    with span("group_strata", strata=len(strata)):
+        for stratum in strata:
+            # Stable sort by stratum code: each stratum's rows are one contiguous slice of `order`
+            codes, uniques = pd.factorize(df[stratum], use_na_sentinel=True)
+            order = np.argsort(codes, kind="stable")
+            bounds = np.searchsorted(codes[order], np.arange(len(uniques) + 1))
+            groupings[stratum] = ([token(u) for u in uniques], order, bounds)
+    result = {}
+    for column in columns:
+        with span("sketch_column", column=column, rows=len(df)):
+            values = pd.to_numeric(df[column], errors="coerce").to_numpy(dtype=np.float64)
+            entry = {"all": KLLSketch(k, _seed(column, None, None, part)).update(values), "strata": {}}
+            for stratum, (keys, order, bounds) in groupings.items():
+                grouped = values[order]
+                sketches = entry["strata"].setdefault(stratum, {})
+                for i, key in enumerate(keys):
+                    sketch = KLLSketch(k, _seed(column, stratum, key, part)).update(grouped[bounds[i]:bounds[i + 1]])
+                    if key in sketches:
+                        sketches[key].merge(sketch)  # values with the same token, e.g. 2 and "2"
+                    else:
+                        sketches[key] = sketch
+            result[column] = entry
+    return result
+
+
+def merge_sketch_sets(into: dict, other: dict) -> dict:
+    """Fold the sketch set `other` (as from build_sketches) into `into` and return it."""
+    for column, entry in other.items():
+        if column not in into:
+            into[column] = entry
+            continue
+        into[column]["all"].merge(entry["all"])
+        for stratum, sketches in entry["strata"].items():
+            target = into[column]["strata"].setdefault(stratum, {})
+            for key, sketch in sketches.items():
+                if key in target:
+                    target[key].merge(sketch)
+                else:
+                    target[key] = sketch
+    return into
+
+
+def sketch_csv(csv_path, columns=None, strata=None, k: int = DEFAULT_K,
+               chunksize: int = DEFAULT_CHUNKSIZE) -> tuple:
+    """Stream csv_path in chunks and return (sketch set, rows)."""
+    wanted = set(columns or NUMERIC_COLUMNS) | set(strata or CATEGORICAL_COLUMNS)
+    sketches, rows = {}, 0
+    with span("sketch_csv", path=str(csv_path), chunksize=chunksize):
+        reader = pd.read_csv(csv_path, usecols=lambda c: c in wanted, chunksize=chunksize, low_memory=False)
+        for part, chunk in enumerate(reader):
+            merge_sketch_sets(sketches, build_sketches(chunk, columns, strata, k, part))
+            rows += len(chunk)
+    return sketches, rows
+
+
+def sketches_to_dict(sketches: dict, rows: int, k: int = DEFAULT_K) -> dict:
+    return {
+        "version": SKETCHES_VERSION,
+        "k": k,
+        "rows": rows,
+        "columns": {
+            column: {"all": entry["all"].to_dict(),
+                     "strata": {stratum: {key: s.to_dict() for key, s in sorted(sketches_by_key.items())}
+                                for stratum, sketches_by_key in entry["strata"].items()}}
+            for column, entry in sketches.items()
+        },
+    }
+
+
+def load_sketches(path) -> dict:
+    """Read a sketch file written by write_sketches() back into a sketch set."""
+    data = json.loads(Path(path).read_text(encoding="utf-8"))
+    if data.get("version") != SKETCHES_VERSION:
+        raise ValueError(f"{path}: unsupported sketch file version {data.get('version')!r}")
+    return {
+        column: {"all": KLLSketch.from_dict(entry["all"]),
+                 "strata": {stratum: {key: KLLSketch.from_dict(s) for key, s in by_key.items()}
+                            for stratum, by_key in entry["strata"].items()}}
+        for column, entry in data["columns"].items()
+    }
+
+
+def write_sketches(path, sketches: dict, rows: int, k: int = DEFAULT_K) -> int:
+    """Write the sketch set atomically; returns the file size in bytes."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    text = dumps_compact(sketches_to_dict(sketches, rows, k))
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    tmp_path.write_text(text, encoding="utf-8")
+    os.replace(tmp_path, path)
+    return len(text.encode("utf-8"))
+
+
+def union_sketch(sketches: dict, column: str, stratum: str | None = None, values=None) -> KLLSketch:
+    """
+    New sketch merging the sketches of `column` for the given values of `stratum`
+    (all values when None), or of the whole column when stratum is None.
+    """
+    entry = sketches[column]
+    if stratum is None:
+        parts = [entry["all"]]
+    else:
+        by_key = entry["strata"][stratum]
+        keys = by_key if values is None else [token(v) for v in values]
+        parts = [by_key[key] for key in keys if key in by_key]
+    merged = KLLSketch(entry["all"].k, entry["all"].seed)
+    for part in parts:
+        merged.merge(part)  # leaves part unchanged
+    return merged
+
+
+def observed_rank_error(sketch: KLLSketch, sorted_values: np.ndarray, qs) -> float:
+    """Largest normalized distance between q * n and the true rank range of the estimated q-quantile."""
+    if not len(sorted_values):
+        return 0.0
+    n = len(sorted_values)
+    estimates = sketch.quantiles(qs)
+    low = np.searchsorted(sorted_values, estimates, side="left")
+    high = np.searchsorted(sorted_values, estimates, side="right")
+    target = np.asarray(qs) * n
+    return float(np.max(np.maximum(0, np.maximum(low - target, target - high)) / n))
+
+
+def verify(df: pd.DataFrame, sketches: dict, delta: float = DEFAULT_DELTA) -> dict:
+    """Per column: worst observed rank error over all strata and the worst bound, against exact sorting."""
+    qs = np.linspace(0.01, 0.99, 99)
+    stratum_keys = {}
+    report = {}
+    for column, entry in sketches.items():
+        values = pd.to_numeric(df[column], errors="coerce").to_numpy(dtype=np.float64)
+        checks = [(entry["all"], values)]
+        for stratum, by_key in entry["strata"].items():
+            if stratum not in stratum_keys:
+                codes, uniques = pd.factorize(df[stratum], use_na_sentinel=True)
+                stratum_keys[stratum] = np.array([token(u) for u in uniques] + [None], dtype=object)[codes]
+            keys = stratum_keys[stratum]
+            checks += [(sketch, values[keys == key]) for key, sketch in by_key.items()]
+        errors = [observed_rank_error(s, np.sort(v[~np.isnan(v)]), qs) for s, v in checks]
+        report[column] = {"sketches": len(checks), "max_observed": round(max(errors), 5),
+                          "max_bound": round(max(s.rank_error(delta) for s, _ in checks), 5)}
+    return report
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Build mergeable KLL quantile sketches per column and stratum.")
+    parser.add_argument("csv_path", help="Path to the df3 CSV")
+    parser.add_argument("out_path", nargs="?", default="docs/data/quantile_sketches.json", help="Output JSON")
+    parser.add_argument("--k", type=int, default=DEFAULT_K, help="Sketch size parameter (larger = more accurate)")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE, help="Rows per CSV chunk")
+    parser.add_argument("--columns", default=None, help="Comma-separated numeric columns (default: catalog sliders)")
+    parser.add_argument("--strata", default=None,
+                        help="Comma-separated stratum columns (default: catalog select columns)")
+    parser.add_argument("--verify", action="store_true",
+                        help="Reload the CSV and compare every sketch with exact sorting")
+    parser.add_argument("--trace", metavar="PATH",
+                        help="Write Chrome trace-event JSON with per-stage timings and peak memory to PATH")
+    args = parser.parse_args()
+
+    if args.trace:
+        tracing.enable(args.trace)
+
+    columns = args.columns.split(",") if args.columns else None
+    strata = args.strata.split(",") if args.strata else None
+    start = time.perf_counter()
+    sketches, rows = sketch_csv(args.csv_path, columns, strata, args.k, args.chunksize)
+    size = write_sketches(args.out_path, sketches, rows, args.k)
+    out = {
+        "output": args.out_path, "rows": rows, "bytes": size, "seconds": round(time.perf_counter() - start, 3),
+        "columns": {c: {"strata": sum(len(v) for v in e["strata"].values()),
+                        "rank_error_bound": round(e["all"].rank_error(), 5), "box": e["all"].box_stats()}
+                    for c, e in sketches.items()},
+    }
+    if args.verify:
+        out["verify"] = verify(pd.read_csv(args.csv_path, low_memory=False), sketches)
+    print(json.dumps(out, indent=2))
@@ -0,0 +1,88 @@
+"""
+Vectorized stratified sampling with proportional allocation.
+
+A sample of n rows gives every stratum round(n * N_h / N) rows (largest
+remainders break the ties, so the sizes add up to n exactly), drawn uniformly
+without replacement within the stratum: every row gets a uniform random key and
+each stratum keeps the rows with its smallest keys. Only rows whose key is below
+a per-stratum threshold (the expected quantile plus a few standard deviations)
+can be among those, so only they are sorted and the work beyond one pass over
+the codes is proportional to the sample size. No Python loop runs over strata
+or rows.
+
+export_plotly_json.py uses it for --preview: strata are the serology waves a
+participant took part in x standort x age group, so the sample keeps each
+wave's, site's and age group's share of the full table.
+"""
+import numpy as np
+import pandas as pd
+
+# Slack of the candidate threshold, in standard deviations of a stratum's candidate count
+_SLACK_SD = 4
+_SLACK_ROWS = 8
+
+
+def stratum_codes(keys) -> tuple:
+    """
+    Combine parallel keys (arrays or Series, one per stratification variable; missing
+    values are a stratum of their own) into one code per row. Returns (codes, number
+    of codes). Pass string columns as Series: pandas factorizes them much faster
+    than object arrays.
+    """
+    codes = None
+    n_codes = 1
+    for key in keys:
+        index, labels = pd.factorize(key, use_na_sentinel=False)
+        codes = index if codes is None else codes * len(labels) + index
+        n_codes *= max(len(labels), 1)
+    if codes is None:
+        raise ValueError("At least one stratification key is required")
+    return np.asarray(codes, dtype=np.int64), n_codes
+
+
+def allocate(sizes, n: int) -> np.ndarray:
+    """Proportional sample size per stratum for n rows in total (largest-remainder rounding)."""
+    sizes = np.asarray(sizes, dtype=np.int64)
+    population = int(sizes.sum())
+    if n >= population:
+        return sizes.copy()
+    quotas = sizes * (n / population)
+    alloc = np.floor(quotas).astype(np.int64)
+    remainder = n - int(alloc.sum())
+    if remainder:
+        alloc[np.argsort(alloc - quotas, kind="stable")[:remainder]] += 1
+    return alloc
+
+
+def sample_indices(codes, n: int, seed: int = 0) -> np.ndarray:
+    """Sorted positions of a proportionally allocated stratified sample of n rows."""
+    codes = np.asarray(codes)
+    if n >= len(codes):
+        return np.arange(len(codes))
+    sizes = np.bincount(codes)
+    alloc = allocate(sizes, n)
+    keys = np.random.default_rng(seed).random(len(codes))
+    limit = np.ones(sizes.size)
+    np.divide(alloc + _SLACK_SD * np.sqrt(alloc) + _SLACK_ROWS, sizes, out=limit, where=sizes > 0)
+    while True:
+        candidates = np.flatnonzero(keys < limit[codes])
+        found = np.bincount(codes[candidates], minlength=sizes.size)
+        short = found < alloc
+        if not short.any():
+            break
+        # Rare: too few keys fell below the threshold, so take the whole stratum into account
+        limit[short] = 1.0
+    candidate_codes = codes[candidates]
+    order = np.lexsort((keys[candidates], candidate_codes))
+    grouped = candidate_codes[order]
+    starts = np.concatenate(([0], np.cumsum(found)[:-1]))
+    rank = np.arange(len(candidates)) - starts[grouped]
+    picked = candidates[order[rank < alloc[grouped]]]
+    picked.sort()
+    return picked
+
+
+def stratified_sample(df: pd.DataFrame, n: int, keys, seed: int = 0) -> pd.DataFrame:
+    """Stratified sample of n rows of df, stratified by the parallel `keys` (see stratum_codes)."""
+    codes, _ = stratum_codes(keys)
+    return df.iloc[sample_indices(codes, n, seed)]
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Seeded synthetic data for benchmarks: schema-valid df3 frames/CSVs and Plotly HTML plots.
+
+Columns follow data_catalog.DATA_CATALOG (the dashboard's dataCatalog): serostatus
+columns per wave, vaccination flags, dates and brands, age groups derived from the
+generated ages, standort sites and so on. Participants skip follow-up waves at
+realistic rates, in which case every column of that wave is missing.
+
+Usage:
+    python3 synthetic_data.py csv <rows> <out.csv> [--seed N]
+    python3 synthetic_data.py html <bytes> <out.html> [--traces N] [--seed N]
+"""
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from data_catalog import DATA_CATALOG
+
+# Column prefix -> (probability of taking part in the wave, first and last day of the wave)
+WAVES = {
+    "X20_21_": (0.97, "2020-11-01", "2021-09-30"),
+    "s22_": (0.72, "2022-04-01", "2022-07-31"),
+    "w22_": (0.61, "2022-11-01", "2023-02-28"),
+    "s23_": (0.55, "2023-04-01", "2023-07-31"),
+    "s24_": (0.48, "2024-04-01", "2024-07-31"),
+}
+
+AGE_BINS = [18, 30, 40, 50, 60, 70, 80, 200]
+AGE_LABELS = ["18-29", "30-39", "40-49", "50-59", "60-69", "70-79", "80+"]
+AGE_BINS_2 = [18, 30, 35, 40, 50, 65, 80, 200]
+AGE_LABELS_2 = ["18-29", "30-34", "35-39", "40-49", "50-64", "65-79", "80+"]
+
+MISSING_RATE = 0.05
+
+# Share of 1s for binary flags that are far from 50/50 in the study
+FLAG_RATES = {
+    "X20_21_kurzfragen_cov19_vaccination_first_yn": 0.8,
+    "s22_nc_qualitative": 0.35,
+    "s23_nc_qualitative": 0.6,
+}
+OPTION_WEIGHTS = {
+    "X20_21_serostatus": [0.85, 0.15],
+    "X20_21_kurzfragen_cov19_vaccination_first_type": [0.6, 0.15, 0.15, 0.05, 0.01, 0.04],
+}
+
+
+def _wave_prefix(name):
+    lowered = name.lower()
+    for prefix in WAVES:
+        if lowered.startswith(prefix.lower()):
+            return prefix
+    return None
+
+
+def _dates(rng, n, start, end):
+    start = np.datetime64(start, "D")
+    span = int((np.datetime64(end, "D") - start).astype(int)) + 1
+    return start + rng.integers(0, span, n).astype("timedelta64[D]")
+
+
+def _iso(dates, missing):
+    out = np.datetime_as_string(dates, unit="D").astype(object)
+    out[missing] = None
+    return out
+
+
+def _with_missing(rng, values, rate=MISSING_RATE):
+    values = values.astype(object) if values.dtype.kind in "OUS" else values.astype("float64")
+    missing = rng.random(len(values)) < rate
+    values[missing] = None if values.dtype == object else np.nan
+    return values
+
+
+def make_df3(n_rows, seed=0, columns=None, id_offset=0):
+    """
+    Return a synthetic df3 with n_rows rows. `columns` restricts the output to a
+    subset of catalog columns (all of them by default); each column draws from its
+    own seeded stream, so the values of a column do not depend on which others are kept.
+    """
+    rng = np.random.default_rng(seed)
+    n = int(n_rows)
+    wanted = set(columns) if columns is not None else None
+    out = {}
+
+    participates = {prefix: rng.random(n) < p for prefix, (p, _, _) in WAVES.items()}
+
+    age_22 = np.clip(np.rint(rng.normal(52, 16, n)), 20, 106).astype("int64")
+    vacc_first = rng.random(n) < FLAG_RATES["X20_21_kurzfragen_cov19_vaccination_first_yn"]
+    vacc_second = vacc_first & (rng.random(n) < 0.9)
+    first_date = _dates(rng, n, "2021-01-01", "2021-09-30")
+    second_date = first_date + rng.integers(21, 85, n).astype("timedelta64[D]")
+    ids = np.arange(id_offset, id_offset + n, dtype="int64")
+
+    # Columns that are functions of the shared draws above, built only when requested
+    derived = {
+        "merge_id": lambda: ids,
+        "X20_21_user_id": lambda: ids * 7 + 100_000,
+        "age_22": lambda: age_22,
+        "age_23": lambda: age_22 + 1,
+        "birth_year": lambda: 2022 - age_22,
+        "age_group_22_1": lambda: pd.cut(age_22, AGE_BINS, right=False, labels=AGE_LABELS).astype(object),
+        "age_group_22_2": lambda: pd.cut(age_22, AGE_BINS_2, right=False, labels=AGE_LABELS_2).astype(object),
+        "age_group_23_1": lambda: pd.cut(age_22 + 1, AGE_BINS, right=False, labels=AGE_LABELS).astype(object),
+        "age_group_23_2": lambda: pd.cut(age_22 + 1, AGE_BINS_2, right=False, labels=AGE_LABELS_2).astype(object),
+        "X20_21_kurzfragen_cov19_vaccination_first_yn": lambda: vacc_first.astype("float64"),
+        "X20_21_kurzfragen_cov19_vaccination_second_yn": lambda: vacc_second.astype("float64"),
+        "X20_21_vacc_first_date": lambda: _iso(first_date, ~vacc_first),
+        "X20_21_vacc_second_date": lambda: _iso(second_date, ~vacc_second),
+        "dose_interval_days": lambda: np.where(vacc_second, (second_date - first_date).astype("int64"), np.nan),
+    }
+
+    for index, f in enumerate(DATA_CATALOG):
+        name = f["name"]
+        if wanted is not None and name not in wanted:
+            continue
+        col_rng = np.random.default_rng([seed, index])
+        if name in derived:
+            values = np.asarray(derived[name]())
+        elif name == "X20_21_check_in_zip_code":
+            values = np.char.zfill(col_rng.integers(1000, 99_999, n).astype(str), 5).astype(object)
+        elif f["type"] == "select":
+            p = OPTION_WEIGHTS.get(name)
+            values = _with_missing(col_rng, col_rng.choice(np.array(f["options"], dtype=object), n, p=p))
+        elif f["type"] == "slider":
+            values = col_rng.integers(f["min"], f["max"] + 1, n)
+            if name == "X20_21_wohlbefinden_weight_new":
+                values = np.round(values + col_rng.random(n), 1)
+            values = _with_missing(col_rng, values)
+        elif f["type"] == "checkbox":
+            values = _with_missing(col_rng, (col_rng.random(n) < FLAG_RATES.get(name, 0.2)).astype("float64"))
+        elif f["type"] == "date":
+            _, start, end = WAVES[_wave_prefix(name) or "X20_21_"]
+            values = _iso(_dates(col_rng, n, start, end), col_rng.random(n) < MISSING_RATE)
+        else:
+            values = _with_missing(col_rng, col_rng.integers(0, 1_000_000, n))
+
+        prefix = _wave_prefix(name)
+        if prefix and prefix != "X20_21_":
+            values = values.astype(object) if values.dtype == object else values.astype("float64")
+            values[~participates[prefix]] = None if values.dtype == object else np.nan
+        out[name] = values
+
+    return pd.DataFrame(out)
+
+
+def write_csv(path, n_rows, seed=0, columns=None, chunk_rows=1_000_000):
+    """Write a synthetic df3 CSV of n_rows rows in chunks, so memory stays bounded for 10M+ rows."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    written = 0
+    chunk_index = 0
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        while written < n_rows:
+            rows = min(chunk_rows, n_rows - written)
+            chunk = make_df3(rows, seed=seed + chunk_index, columns=columns, id_offset=written)
+            chunk.to_csv(f, index=False, header=(written == 0))
+            written += rows
+            chunk_index += 1
+    return path
+
+
+_HTML_TEMPLATE = """<html>
+<head><meta charset="utf-8" /></head>
+<body>
+    <div>                        <script type="text/javascript">window.PlotlyConfig = {{MathJaxConfig: 'local'}};</script>
+        <script charset="utf-8" src="https://cdn.plot.ly/plotly-2.35.2.min.js"></script>                <div id="{plot_id}" class="plotly-graph-div" style="height:100%; width:100%;"></div>            <script type="text/javascript">                                    window.PLOTLYENV=window.PLOTLYENV || {{}};                                    if (document.getElementById("{plot_id}")) {{                    Plotly.newPlot(                        "{plot_id}",                        {data},                        {layout},                        {{"responsive": true}}                    )                }};                            </script>        </div>
+</body>
+</html>"""
+
+
+def _trace(rng, i, n_points, start=0):
+    return {
+        "type": "scatter",
+        "mode": "markers",
+        "name": f"series {i}",
+        "x": np.arange(start, start + n_points).tolist(),
+        "y": np.round(rng.normal(50, 15, n_points), 4).tolist(),
+    }
+
+
+def make_plot_html(path, target_bytes, traces=1, seed=0, title="Synthetic Plot"):
+    """
+    Write a saved-Plotly-style HTML file of roughly target_bytes bytes whose
+    Plotly.newPlot call holds `traces` scatter traces of equal length.
+    """
+    rng = np.random.default_rng(seed)
+    plot_id = f"synthetic-{seed}"
+    layout = {"title": {"text": title}, "xaxis": {"title": {"text": "x"}}, "yaxis": {"title": {"text": "y"}}}
+    overhead = len(_HTML_TEMPLATE.format(plot_id=plot_id, data="[]", layout=json.dumps(layout)))
+
+    # Calibrate bytes per point on samples (x grows wider with n), then size the traces
+    n_points = 1000
+    for _ in range(2):
+        sample = json.dumps(_trace(rng, 0, 1000, start=max(n_points - 1000, 0)), separators=(",", ":"))
+        per_point = len(sample) / 1000
+        n_points = max(1, int((target_bytes - overhead) / per_point / max(traces, 1)))
+
+    data = json.dumps([_trace(rng, i, n_points) for i in range(traces)], separators=(",", ":"))
+    html = _HTML_TEMPLATE.format(plot_id=plot_id, data=data, layout=json.dumps(layout))
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(html, encoding="utf-8")
+    return path
+
+
+def parse_size(text):
+    """Parse "10k", "1M", "100KB", "200MB" or plain integers."""
+    t = str(text).strip().upper().rstrip("B")
+    factor = 1
+    if t.endswith("K"):
+        factor, t = 1_000, t[:-1]
+    elif t.endswith("M"):
+        factor, t = 1_000_000, t[:-1]
+    elif t.endswith("G"):
+        factor, t = 1_000_000_000, t[:-1]
+    return int(float(t) * factor)
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Generate synthetic df3 CSVs or Plotly HTML plots.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    csv_p = sub.add_parser("csv", help="Write a synthetic df3 CSV")
+    csv_p.add_argument("rows", type=parse_size)
+    csv_p.add_argument("out")
+    csv_p.add_argument("--seed", type=int, default=0)
+    html_p = sub.add_parser("html", help="Write a synthetic Plotly HTML file")
+    html_p.add_argument("size", type=parse_size)
+    html_p.add_argument("out")
+    html_p.add_argument("--traces", type=int, default=1)
+    html_p.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.command == "csv":
+        print(write_csv(args.out, args.rows, seed=args.seed))
+    else:
+        print(make_plot_html(args.out, args.size, traces=args.traces, seed=args.seed))
@@ -0,0 +1,31 @@
+"""
+The thumbnail index (thumbs/index.json) shared by make_thumbnails.py and generate_plot_manifest.py.
+
+make_thumbnails.py writes one entry per chart id: the published SVG ("file") and
+the hash of the figure it was drawn from ("source"). generate_plot_manifest.py
+only reads it, to keep the thumbnail of unchanged plots, and runs in CI without
+third-party packages, so this module uses the standard library only.
+"""
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+THUMBS_DIRNAME = "thumbs"
+INDEX_FILENAME = "index.json"
+
+
+def load_index(thumbs_dir: Path) -> dict:
+    try:
+        return json.loads((Path(thumbs_dir) / INDEX_FILENAME).read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+
+def thumbnail_for(chart_id: str, source_hash: str, out_dir="docs/assets/plots") -> str | None:
+    """Manifest "thumbnail" value for chart_id if its cached thumbnail matches source_hash."""
+    thumbs_dir = Path(out_dir) / THUMBS_DIRNAME
+    entry = load_index(thumbs_dir).get(chart_id)
+    if entry and entry.get("source") == source_hash and (thumbs_dir / entry["file"]).exists():
+        return f"{THUMBS_DIRNAME}/{entry['file']}"
+    return None
@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""
+Watch the plot sources, the data CSV and the figure output directory and
+rebuild only what a change affects:
+
+- docs/plots/<name>.html changed  -> re-extract that plot to figures/<key>.json, rescan it
+                                     in manifest.json (incremental) and patch its
+                                     dashboard_manifest.json entry
+- the df3 CSV changed             -> re-export the serology figures; figures whose
+                                     JSON comes out identical are not rewritten
+- figure JSON edited externally   -> refresh the figure entries of dashboard_manifest.json
+  (out_dir or out_dir/figures/)
+
+Changes are picked up with inotify on Linux and by polling mtimes elsewhere (or with
+--poll). Bursts of events are debounced into one rebuild, and every rebuild is
+logged with its latency. Files the watcher writes itself are not fed back into it.
+
+Usage:
+    python3 watch_assets.py [--csv docs/data/df3_full_for_pivot.csv] [--plots-dir docs/plots]
+                            [--out-dir docs/assets/plots] [--debounce 0.3] [--poll] [--interval 1.0]
+                            [--chunksize N] [--initial]
+"""
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "python"))
+from tracing import span  # noqa: E402
+from convert_html_plots import (FIGURES_DIRNAME, UNIFIED_MANIFEST, convert_html_plots,  # noqa: E402
+                                refresh_figures, update_plots)
+from generate_plot_manifest import CACHE_FILENAME, generate_manifest  # noqa: E402
+from hashed_assets import is_hashed_filename  # noqa: E402
+
+DEFAULT_CSV = "docs/data/df3_full_for_pivot.csv"
+DEFAULT_DEBOUNCE = 0.3
+DEFAULT_INTERVAL = 1.0
+# A steady stream of events still triggers a rebuild after this many debounce periods
+MAX_DEBOUNCE_PERIODS = 10
+
+# Outputs of the pipeline that never trigger a rebuild themselves
+IGNORED_NAMES = {UNIFIED_MANIFEST, CACHE_FILENAME}
+IGNORED_SUFFIXES = {".gz", ".tmp"}
+
+# inotify(7) event bits
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+class InotifyWatcher:
+    """Directory watcher on top of the inotify syscalls (Linux only, via ctypes)."""
+
+    def __init__(self, dirs):
+        libc_name = ctypes.util.find_library("c")
+        if not sys.platform.startswith("linux") or not libc_name:
+            raise OSError("inotify is only available on Linux")
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self.fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.dirs = {}
+        for d in dirs:
+            wd = self._libc.inotify_add_watch(self.fd, os.fsencode(str(d)), WATCH_MASK)
+            if wd < 0:
+                err = ctypes.get_errno()
+                os.close(self.fd)
+                raise OSError(err, f"inotify_add_watch failed for {d}")
+            self.dirs[wd] = Path(d)
+        self.paths = list(self.dirs.values())
+
+    def poll(self, timeout=None) -> set:
+        """Return the paths changed within timeout seconds (None blocks until something changes)."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+        try:
+            buf = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+        changed = set()
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(buf):
+            wd, mask, _, length = _EVENT_HEADER.unpack_from(buf, offset)
+            name = buf[offset + _EVENT_HEADER.size: offset + _EVENT_HEADER.size + length].rstrip(b"\0")
+            offset += _EVENT_HEADER.size + length
+            if mask & IN_Q_OVERFLOW:
+                # Events were dropped; report every watched directory as changed
+                changed.update(self.dirs.values())
+            elif wd in self.dirs and name:
+                changed.add(self.dirs[wd] / os.fsdecode(name))
+        return changed
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    """Portable fallback: compares (mtime, size) of the files in each directory every interval seconds."""
+
+    def __init__(self, dirs, interval=DEFAULT_INTERVAL):
+        self.paths = [Path(d) for d in dirs]
+        self.interval = interval
+        self._snapshot = self._scan()
+
+    def _scan(self) -> dict:
+        snapshot = {}
+        for d in self.paths:
+            try:
+                entries = list(os.scandir(d))
+            except FileNotFoundError:
+                continue
+            for entry in entries:
+                try:
+                    st = entry.stat()
+                except FileNotFoundError:
+                    continue
+                snapshot[d / entry.name] = (st.st_mtime_ns, st.st_size)
+        return snapshot
+
+    def poll(self, timeout=None) -> set:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            current = self._scan()
+            changed = {p for p in current.keys() | self._snapshot.keys() if current.get(p) != self._snapshot.get(p)}
+            self._snapshot = current
+            if changed:
+                return changed
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return set()
+                time.sleep(min(self.interval, remaining))
+            else:
+                time.sleep(self.interval)
+
+    def close(self):
+        pass
+
+
+def make_watcher(dirs, poll=False, interval=DEFAULT_INTERVAL):
+    """inotify where available, polling otherwise (or when poll=True)."""
+    if not poll:
+        try:
+            return InotifyWatcher(dirs)
+        except (OSError, AttributeError) as e:
+            print(f"inotify unavailable ({e}); polling every {interval}s")
+    return PollingWatcher(dirs, interval)
+
+
+def collect_changes(watcher, debounce=DEFAULT_DEBOUNCE) -> set:
+    """Block until something changes, then keep collecting until debounce seconds pass quietly."""
+    changed = set(watcher.poll(None))
+    started = time.monotonic()
+    while time.monotonic() - started < debounce * MAX_DEBOUNCE_PERIODS:
+        more = watcher.poll(debounce)
+        if not more:
+            break
+        changed |= more
+    return changed
+
+
+def _stat_key(path: Path):
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+class AssetWatcher:
+    """Maps changed paths to pipeline stages and runs only those stages."""
+
+    def __init__(self, csv_path, plots_dir="docs/plots", out_dir="docs/assets/plots", chunksize=None):
+        self.csv_path = Path(csv_path).resolve() if csv_path else None
+        self.plots_dir = Path(plots_dir).resolve()
+        self.out_dir = Path(out_dir).resolve()
+        self.figures_dir = self.out_dir / FIGURES_DIRNAME
+        self.manifest_path = self.out_dir / "manifest.json"
+        self.chunksize = chunksize
+        # (mtime, size) of every file this process wrote, so its own output is not treated as a change
+        self._written = {}
+
+    def watched_dirs(self) -> list:
+        dirs = [self.plots_dir, self.out_dir, self.figures_dir]
+        if self.csv_path is not None:
+            dirs.append(self.csv_path.parent)
+        existing = []
+        for d in dict.fromkeys(dirs):
+            if d.is_dir():
+                existing.append(d)
+            else:
+                print(f"Warning: {d} does not exist; not watching it")
+        return existing
+
+    def classify(self, paths) -> dict:
+        """Split changed paths into {"csv": bool, "plots": {filenames}, "figures": bool}."""
+        stages = {"csv": False, "plots": set(), "figures": False}
+        for p in paths:
+            p = Path(p)
+            if self._written.get(p, False) == _stat_key(p):
+                continue
+            if p in (self.plots_dir, self.out_dir, self.figures_dir):
+                # Queue overflow: the whole directory is suspect
+                if p == self.plots_dir:
+                    stages["plots"].update(f.name for f in self.plots_dir.glob("*.html") if not is_hashed_filename(f.name))
+                else:
+                    stages["figures"] = True
+                continue
+            if p.name in IGNORED_NAMES or p.suffix in IGNORED_SUFFIXES or is_hashed_filename(p.name):
+                continue
+            if self.csv_path is not None and p == self.csv_path:
+                stages["csv"] = True
+            elif p.parent == self.plots_dir and p.suffix == ".html":
+                stages["plots"].add(p.name)
+            elif p.parent in (self.out_dir, self.figures_dir) and p.suffix == ".json":
+                stages["figures"] = True
+        return stages
+
+    def _remember_outputs(self):
+        for d in (self.plots_dir, self.out_dir, self.figures_dir):
+            if d.is_dir():
+                for p in d.iterdir():
+                    self._written[p] = _stat_key(p)
+
+    def _timed(self, stage, detail, fn):
+        t0 = time.perf_counter()
+        with span("watch_rebuild", stage=stage, detail=detail):
+            try:
+                fn()
+                status = "rebuilt"
+            except Exception as e:
+                status = f"failed ({type(e).__name__}: {e})"
+        ms = (time.perf_counter() - t0) * 1000
+        print(f"[{time.strftime('%H:%M:%S')}] {stage}: {detail} {status} in {ms:.1f} ms", flush=True)
+
+    def _export(self):
+        import export_plotly_json
+        if self.chunksize:
+            export_plotly_json.export_figures_from_csv(self.csv_path, self.out_dir, chunksize=self.chunksize)
+        else:
+            import pandas as pd
+            export_plotly_json.export_figures(pd.read_csv(self.csv_path), self.out_dir)
+        refresh_figures(self.out_dir)
+
+    def _plots(self, filenames):
+        generate_manifest(self.plots_dir, self.manifest_path)
+        update_plots(filenames, self.out_dir, self.plots_dir)
+
+    def rebuild(self, stages):
+        if stages["plots"]:
+            names = sorted(stages["plots"])
+            self._timed("plots", ", ".join(names), lambda: self._plots(names))
+        if stages["csv"]:
+            self._timed("figures", self.csv_path.name, self._export)
+        elif stages["figures"] and not stages["plots"]:
+            self._timed("manifest", UNIFIED_MANIFEST, lambda: refresh_figures(self.out_dir))
+        self._remember_outputs()
+
+    def initial_build(self):
+        """Run every stage once, as a full non-incremental rebuild."""
+        self._timed("manifest", "manifest.json", lambda: generate_manifest(self.plots_dir, self.manifest_path))
+        if self.csv_path is not None and self.csv_path.exists():
+            self._timed("figures", self.csv_path.name, self._export)
+        self._timed("plots", "all", lambda: convert_html_plots(self.out_dir, self.plots_dir))
+        self._remember_outputs()
+
+    def run(self, debounce=DEFAULT_DEBOUNCE, poll=False, interval=DEFAULT_INTERVAL, initial=False):
+        if initial:
+            self.initial_build()
+        else:
+            self._remember_outputs()
+        if self.out_dir.is_dir():
+            # Watch figures/ from the start, even before the first plot is converted into it
+            self.figures_dir.mkdir(exist_ok=True)
+        watcher = make_watcher(self.watched_dirs(), poll=poll, interval=interval)
+        print(f"Watching {', '.join(str(d) for d in watcher.paths)} "
+              f"({type(watcher).__name__}, debounce {debounce}s). Ctrl+C to stop.", flush=True)
+        try:
+            while True:
+                stages = self.classify(collect_changes(watcher, debounce))
+                if stages["csv"] or stages["plots"] or stages["figures"]:
+                    self.rebuild(stages)
+        except KeyboardInterrupt:
+            print("Stopped.")
+        finally:
+            watcher.close()
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Rebuild figures and manifests incrementally as their sources change.")
+    parser.add_argument("--csv", default=DEFAULT_CSV, help="df3 CSV the serology figures are exported from")
+    parser.add_argument("--plots-dir", default="docs/plots", help="Directory with the saved Plotly HTML plots")
+    parser.add_argument("--out-dir", default="docs/assets/plots", help="Figure and manifest output directory")
+    parser.add_argument("--debounce", type=float, default=DEFAULT_DEBOUNCE,
+                        help="Seconds without events before a burst of changes is rebuilt")
+    parser.add_argument("--poll", action="store_true", help="Poll mtimes instead of using inotify")
+    parser.add_argument("--interval", type=float, default=DEFAULT_INTERVAL, help="Polling interval in seconds")
+    parser.add_argument("--chunksize", type=int, default=None, help="Stream the CSV in chunks when re-exporting")
+    parser.add_argument("--initial", action="store_true", help="Run a full rebuild before watching")
+    args = parser.parse_args()
+
+    AssetWatcher(args.csv, args.plots_dir, args.out_dir, chunksize=args.chunksize).run(
+        debounce=args.debounce, poll=args.poll, interval=args.interval, initial=args.initial)
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Per-zip-code aggregate table with minimum-count suppression, indexed by prefix.
+
+The dashboard only offers X20_21_check_in_zip_code as a free-text filter, so any
+geographic view would have to scan every row in the browser. Here the rows are
+counted once per five-digit zip code (participants, serostatus and vaccination
+answers, coded by normalization.py like the exported figures), and the counts are
+summed up the prefix hierarchy, by default the 2-digit, 3-digit and full zip code
+(LEVELS). A map view or a prefix filter then needs one lookup in "cells".
+
+Privacy: a cell is published only if at least `min_count` participants fall into
+it (DEFAULT_MIN_COUNT). Suppressed cells are rolled up: their counts stay in
+their parent prefix and are published as the parent's "other" row, so the
+children of every published parent still add up to it. When the suppressed
+children of a parent sum to fewer than min_count, the smallest published
+siblings are suppressed as well until their sum reaches min_count (or the
+whole group is suppressed), so no small cell can be recovered by subtracting
+the published siblings from the parent. Cells below a suppressed parent are
+never published. Rows without a valid zip code form an "unknown" cell next to
+the 2-digit prefixes, under the same rule. Rates are percentages rounded to
+one decimal and are null, with their denominator, when the denominator is
+below min_count.
+
+Usage:
+    python3 zip_aggregates.py <df3.csv> [out.json] [--min-count 10] [--levels 2,3,5] [--chunksize N]
+
+Default:
+    python3 zip_aggregates.py docs/data/df3_full_for_pivot.csv docs/data/zip_aggregates.json
+"""
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from figure_compaction import dumps_compact
+from normalization import MISSING, POSITIVE, normalize_frame
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "python"))
+import tracing  # noqa: E402
+from tracing import span  # noqa: E402
+
+TABLE_VERSION = 1
+ZIP_COLUMN = "X20_21_check_in_zip_code"
+SERO_COLUMN = "X20_21_serostatus"
+VACC_FIRST_COLUMN = "X20_21_kurzfragen_cov19_vaccination_first_yn"
+VACC_SECOND_COLUMN = "X20_21_kurzfragen_cov19_vaccination_second_yn"
+REQUIRED_COLUMNS = [ZIP_COLUMN, SERO_COLUMN, VACC_FIRST_COLUMN, VACC_SECOND_COLUMN]
+
+ZIP_DIGITS = 5
+LEVELS = (2, 3, 5)
+DEFAULT_MIN_COUNT = 10
+DEFAULT_CHUNKSIZE = 250_000
+UNKNOWN = "unknown"
+
+# Counts kept per zip code: rows, then (answered, positive) per coded column
+COUNT_COLUMNS = ["n", "sero_n", "sero_pos", "dose1_n", "dose1_yes", "dose2_n", "dose2_yes"]
+# Published row: rows, then (denominator, percent) per rate
+ROW_COLUMNS = ["n", "sero_n", "seroprevalence", "dose1_n", "dose1_rate", "dose2_n", "dose2_rate"]
+_RATES = [("sero_n", "sero_pos"), ("dose1_n", "dose1_yes"), ("dose2_n", "dose2_yes")]
+
+
+def normalize_zip(values) -> pd.Series:
+    """
+    Five-digit zip code strings; "" where a value is missing or not a zip code.
+    Numeric reads that lost a leading zero ("7910", "7910.0") are padded again.
+    """
+    text = pd.Series(values, dtype="string").str.strip().str.replace(r"\.0$", "", regex=True)
+    text = text.where(text.str.len() != ZIP_DIGITS - 1, "0" + text)
+    valid = text.str.fullmatch(rf"\d{{{ZIP_DIGITS}}}").fillna(False).astype(bool)
+    return pd.Series(np.where(valid.to_numpy(), text.to_numpy(dtype=object, na_value=""), ""),
+                     index=text.index, dtype=object)
+
+
+def zip_counts(df: pd.DataFrame) -> pd.DataFrame:
+    """COUNT_COLUMNS per zip code ("" for rows without one), indexed by zip code."""
+    with span("zip_counts", rows=len(df)):
+        zips = normalize_zip(df[ZIP_COLUMN]) if ZIP_COLUMN in df.columns else pd.Series("", index=df.index)
+        codes = normalize_frame(df, [c for c in REQUIRED_COLUMNS[1:] if c in df.columns])
+        counts = {"n": np.ones(len(df), dtype=np.int64)}
+        for column, (valid_name, positive_name) in zip(REQUIRED_COLUMNS[1:], _RATES):
+            code = codes[column].to_numpy() if column in codes.columns else np.full(len(df), MISSING)
+            counts[valid_name] = (code != MISSING).astype(np.int64)
+            counts[positive_name] = (code == POSITIVE).astype(np.int64)
+        frame = pd.DataFrame(counts, index=pd.Index(zips.to_numpy(), name="zip"))[COUNT_COLUMNS]
+        return frame.groupby(level=0, sort=True).sum()
+
+
+def merge_counts(parts) -> pd.DataFrame:
+    """Counts of the union of disjoint row sets from their zip_counts()."""
+    parts = list(parts)
+    if not parts:
+        return pd.DataFrame(columns=COUNT_COLUMNS, index=pd.Index([], name="zip"), dtype=np.int64)
+    return pd.concat(parts).groupby(level=0, sort=True).sum()
+
+
+def zip_counts_csv(csv_path, chunksize: int = DEFAULT_CHUNKSIZE) -> pd.DataFrame:
+    """Streaming zip_counts(): reads only REQUIRED_COLUMNS, zip codes as text."""
+    with span("zip_counts_csv", path=str(csv_path), chunksize=chunksize):
+        reader = pd.read_csv(csv_path, usecols=lambda c: c in REQUIRED_COLUMNS, dtype={ZIP_COLUMN: str},
+                             chunksize=chunksize)
+        return merge_counts(zip_counts(chunk) for chunk in reader)
+
+
+def _suppressed(parents: np.ndarray, n: np.ndarray, min_count: int) -> np.ndarray:
+    """
+    Which children to suppress, given their parent keys and counts: those below
+    min_count and, in a group where those sum to less than min_count, its
+    smallest remaining children until the suppressed sum reaches min_count.
+    """
+    if not len(n):
+        return np.zeros(0, dtype=bool)
+    order = np.lexsort((n, parents))
+    group_start = np.r_[True, parents[order][1:] != parents[order][:-1]]
+    group = np.cumsum(group_start) - 1
+    sorted_n = n[order]
+    before = np.cumsum(sorted_n) - sorted_n
+    before -= before[group_start][group]  # suppressed sum of the smaller siblings
+    primary = sorted_n < min_count
+    has_primary = np.bincount(group, weights=primary, minlength=group[-1] + 1)[group] > 0
+    out = np.empty(len(n), dtype=bool)
+    out[order] = primary | (has_primary & (before < min_count))
+    return out
+
+
+def _row(counts: np.ndarray, min_count: int) -> list:
+    values = dict(zip(COUNT_COLUMNS, counts.tolist()))
+    row = [values["n"]]
+    for valid_name, positive_name in _RATES:
+        total = values[valid_name]
+        if total < min_count:
+            row += [None, None]
+        else:
+            row += [total, round(values[positive_name] / total * 100, 1)]
+    return row
+
+
+def build_table(counts: pd.DataFrame, levels=LEVELS, min_count: int = DEFAULT_MIN_COUNT) -> dict:
+    """
+    Hierarchical, suppressed table from zip_counts(): {"total", "cells": {prefix:
+    row}, "other": {parent prefix ("" for the top): row of its suppressed children},
+    "suppressed": {level: cells}} with rows laid out as ROW_COLUMNS.
+    """
+    levels = sorted(set(int(level) for level in levels))
+    if not levels or levels[0] < 1 or levels[-1] > ZIP_DIGITS:
+        raise ValueError(f"Levels must lie between 1 and {ZIP_DIGITS}, got {levels}")
+    zips = counts.index.to_numpy(dtype=object).astype(str)
+    values = counts[COUNT_COLUMNS].to_numpy(dtype=np.int64)
+    known = zips != ""
+    total = values.sum(axis=0) if len(values) else np.zeros(len(COUNT_COLUMNS), dtype=np.int64)
+
+    cells, other, suppressed = {}, {}, {}
+    published = {""}  # parent prefixes whose children may be published
+    parent_level = 0
+    with span("suppress", zips=int(known.sum()), levels=levels, min_count=min_count):
+        for level in levels:
+            keys = pd.Series(zips[known], dtype=object).str[:level].to_numpy(dtype=object)
+            level_values = values[known]
+            if level == levels[0]:
+                # Rows without a zip code are one more child of the top level
+                keys = np.concatenate([keys, [UNKNOWN] * int((~known).sum())]).astype(object)
+                level_values = np.concatenate([level_values, values[~known]])
+            prefixes, inverse = np.unique(keys, return_inverse=True)
+            sums = np.zeros((len(prefixes), len(COUNT_COLUMNS)), dtype=np.int64)
+            np.add.at(sums, inverse, level_values)
+            parents = np.where(prefixes == UNKNOWN, "",
+                               pd.Series(prefixes, dtype=object).str[:parent_level].to_numpy(dtype=object))
+            open_parent = pd.Series(parents).isin(published).to_numpy()
+            hidden = ~open_parent
+            hidden[open_parent] = _suppressed(parents[open_parent].astype(str), sums[open_parent, 0], min_count)
+            for prefix, row_counts in zip(prefixes[~hidden], sums[~hidden]):
+                cells[prefix] = _row(row_counts, min_count)
+            rolled = open_parent & hidden
+            rolled_parents, rolled_index = np.unique(parents[rolled], return_inverse=True)
+            rolled_sums = np.zeros((len(rolled_parents), len(COUNT_COLUMNS)), dtype=np.int64)
+            np.add.at(rolled_sums, rolled_index, sums[rolled])
+            for parent, row_counts in zip(rolled_parents, rolled_sums):
+                other[parent] = _row(row_counts, min_count)
+            suppressed[level] = int(hidden.sum())
+            published = set(prefixes[~hidden]) - {UNKNOWN}
+            parent_level = level
+    return {"levels": levels, "min_count": min_count, "rows": int(total[0]),
+            "total": _row(total, min_count), "cells": cells, "other": other, "suppressed": suppressed}
+
+
+def to_dict(table: dict) -> dict:
+    """JSON form: the table plus "version", "column" and the row layout under "columns"."""
+    return {"version": TABLE_VERSION, "column": ZIP_COLUMN, "columns": ROW_COLUMNS,
+            **{key: table[key] for key in ("levels", "min_count", "rows", "total", "cells", "other")},
+            "suppressed": {str(level): n for level, n in table["suppressed"].items()}}
+
+
+def load_table(path) -> dict:
+    data = json.loads(Path(path).read_text(encoding="utf-8"))
+    if data.get("version") != TABLE_VERSION:
+        raise ValueError(f"{path}: unsupported zip aggregate version {data.get('version')!r}")
+    return data
+
+
+def lookup(table: dict, prefix: str) -> dict | None:
+    """
+    The row of a zip code or prefix as {column: value}, or None when it is
+    suppressed or absent. The prefix length must be one of the table's levels.
+    """
+    if prefix != UNKNOWN and len(prefix) not in table["levels"]:
+        raise ValueError(f"Prefix length must be one of {table['levels']}, got {prefix!r}")
+    row = table["cells"].get(prefix)
+    return None if row is None else dict(zip(ROW_COLUMNS, row))
+
+
+def write_table(path, table: dict) -> int:
+    """Write the table atomically; returns the file size in bytes."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    text = dumps_compact(to_dict(table))
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    tmp_path.write_text(text, encoding="utf-8")
+    os.replace(tmp_path, path)
+    return len(text.encode("utf-8"))
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Build the privacy-thresholded per-zip-code aggregate table.")
+    parser.add_argument("csv_path", help="Path to the df3 CSV")
+    parser.add_argument("out_path", nargs="?", default="docs/data/zip_aggregates.json", help="Output JSON")
+    parser.add_argument("--min-count", type=int, default=DEFAULT_MIN_COUNT,
+                        help="Smallest number of participants a published cell may hold")
+    parser.add_argument("--levels", default=",".join(map(str, LEVELS)),
+                        help="Comma-separated zip prefix lengths to aggregate (5 = full zip code)")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE, help="Rows per CSV chunk")
+    parser.add_argument("--trace", metavar="PATH",
+                        help="Write Chrome trace-event JSON with per-stage timings and peak memory to PATH")
+    args = parser.parse_args()
+
+    if args.trace:
+        tracing.enable(args.trace)
+
+    start = time.perf_counter()
+    try:
+        table = build_table(zip_counts_csv(args.csv_path, args.chunksize),
+                            [int(level) for level in args.levels.split(",")], args.min_count)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    size = write_table(args.out_path, table)
+    print(json.dumps({"output": args.out_path, "rows": table["rows"], "min_count": table["min_count"],
+                      "cells": len(table["cells"]), "suppressed": table["suppressed"], "bytes": size,
+                      "seconds": round(time.perf_counter() - start, 3)}, indent=2))